@@ -0,0 +1,102 @@
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_NOISE = (
+    "<script>window.__STATE__ = {\"tracking\": true, \"experiments\": [1, 2, 3]};</script>"
+    "<style>.card{display:flex}.price{color:red}</style>"
+    "<nav class='menu'><a href='/'>Home</a><a href='/deals'>Deals</a><a href='/help'>Help</a></nav>"
+)
+
+
+def listing_page(records: int, noise: int = 20) -> str:
+    """
+    A search-results style page with records product cards, surrounded by
+    noise blocks of scripts, styles and navigation like a real storefront.
+    """
+    cards = "".join(
+        f"<div class='card' data-id='{i}'><h2 class='title'>Product {i}</h2>"
+        f"<span class='price'>${10 + i}.99</span><a href='/item/{i}'>View</a></div>"
+        for i in range(records)
+    )
+    return f"<html><head>{_NOISE * noise}</head><body>{_NOISE * noise}<main>{cards}</main></body></html>"
+
+
+def listing_markdown(records: int) -> str:
+    lines = [f"## Product {i}\n\n${10 + i}.99 [View](/item/{i})\n" for i in range(records)]
+    return "# Search results\n\n" + "\n".join(lines)
+
+
+class FakeBrightDataServer:
+    """
+    Local stand-in for https://api.brightdata.com/request. Every POST sleeps
+    for latency (plus up to jitter) seconds and answers with a listing page
+    of records products; error_rate of the requests get a 503 instead.
+    latencies overrides latency for specific target urls.
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, records: int = 20,
+                 error_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0, latencies: dict = None):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.html = listing_page(records).encode("utf-8")
+        self.markdown = listing_markdown(records).encode("utf-8")
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/request"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                    failed = random.random() < server.error_rate
+                    server.errors += failed
+                time.sleep(server.latencies.get(body.get("url"), server.latency) + random.uniform(0, server.jitter))
+                with server._lock:
+                    server.in_flight -= 1
+                if failed:
+                    status, data = 503, b"Service Unavailable"
+                else:
+                    status = 200
+                    data = server.html if body.get("data_format") == "html" else server.markdown
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeBrightDataServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-brightdata", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
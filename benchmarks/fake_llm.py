@@ -0,0 +1,110 @@
+import json
+import time
+import asyncio
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+CHARS_PER_TOKEN = 4
+TOKENS_PER_CHUNK = 8
+
+
+def listing_response(records: int) -> str:
+    return json.dumps({"listings": [{"title": f"Product {i}", "price": f"${10 + i}.99"} for i in range(records)]})
+
+
+def _token_count(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model with Gemini-like timing and no network: each call waits
+    latency seconds plus prompt tokens / prefill_tokens_per_second, then
+    produces response at tokens_per_second (0 means instantly).
+
+    For agent runs, tool_calls lists {"name": ..., "args": ...} calls the
+    model makes one per turn, before answering with response.
+    """
+
+    response: str = listing_response(5)
+    latency: float = 0.2
+    tokens_per_second: float = 0.0
+    prefill_tokens_per_second: float = 0.0
+    tool_calls: list = []
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next_message(self, messages) -> AIMessage:
+        done = sum(isinstance(message, ToolMessage) for message in messages)
+        prompt_tokens = sum(_token_count(str(message.content)) for message in messages)
+        if done < len(self.tool_calls):
+            call = self.tool_calls[done]
+            return AIMessage(content="", tool_calls=[{"name": call["name"], "args": call["args"], "id": f"call_{done}"}],
+                             usage_metadata={"input_tokens": prompt_tokens, "output_tokens": 1,
+                                             "total_tokens": prompt_tokens + 1})
+        output_tokens = _token_count(self.response)
+        return AIMessage(content=self.response,
+                         usage_metadata={"input_tokens": prompt_tokens, "output_tokens": output_tokens,
+                                         "total_tokens": prompt_tokens + output_tokens})
+
+    def _first_token_delay(self, message: AIMessage) -> float:
+        prompt_tokens = message.usage_metadata["input_tokens"]
+        prefill = prompt_tokens / self.prefill_tokens_per_second if self.prefill_tokens_per_second else 0.0
+        return self.latency + prefill
+
+    def _chunks(self, message: AIMessage):
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield AIMessageChunk(content="", tool_call_chunks=[{
+                "name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}]), 0.0
+            return
+        step = CHARS_PER_TOKEN * TOKENS_PER_CHUNK
+        delay = TOKENS_PER_CHUNK / self.tokens_per_second if self.tokens_per_second else 0.0
+        starts = range(0, len(message.content), step)
+        for start in starts:
+            # Like Gemini, usage arrives with the last chunk
+            usage = message.usage_metadata if start == starts[-1] else None
+            yield AIMessageChunk(content=message.content[start:start + step], usage_metadata=usage), delay
+
+    def _generation_time(self, message: AIMessage) -> float:
+        return sum(delay for _, delay in self._chunks(message))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        message = self._next_message(messages)
+        time.sleep(self._first_token_delay(message) + self._generation_time(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        message = self._next_message(messages)
+        await asyncio.sleep(self._first_token_delay(message) + self._generation_time(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        message = self._next_message(messages)
+        time.sleep(self._first_token_delay(message))
+        for chunk, delay in self._chunks(message):
+            time.sleep(delay)
+            if run_manager and isinstance(chunk.content, str):
+                run_manager.on_llm_new_token(chunk.content)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        message = self._next_message(messages)
+        await asyncio.sleep(self._first_token_delay(message))
+        for chunk, delay in self._chunks(message):
+            await asyncio.sleep(delay)
+            if run_manager and isinstance(chunk.content, str):
+                await run_manager.on_llm_new_token(chunk.content)
+            yield ChatGenerationChunk(message=chunk)
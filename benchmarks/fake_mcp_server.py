@@ -0,0 +1,86 @@
+"""
+Stand-in for the Bright Data MCP server (@brightdata/mcp) exposing the same
+tool names, for benchmarking MCP agent runs offline. Every tool call sleeps
+for BENCH_MCP_LATENCY seconds.
+
+Run with: python benchmarks/fake_mcp_server.py  (stdio transport)
+"""
+import os
+import sys
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
+sys.path.insert(0, one_levels_up)
+
+from benchmarks.fake_brightdata import listing_markdown, listing_page
+
+LATENCY = float(os.getenv("BENCH_MCP_LATENCY") or 0.05)
+RECORDS = int(os.getenv("BENCH_RECORDS") or 20)
+
+mcp = FastMCP("Bright Data", log_level="WARNING")
+state = {"url": None}
+
+
+def _wait():
+    time.sleep(LATENCY)
+
+
+@mcp.tool()
+def search_engine(query: str, engine: str = "google") -> str:
+    _wait()
+    return "\n".join(f"- [Result {i} for {query}](https://example.com/{i})" for i in range(10))
+
+
+@mcp.tool()
+def scrape_as_markdown(url: str) -> str:
+    _wait()
+    return listing_markdown(RECORDS)
+
+
+@mcp.tool()
+def scrape_as_html(url: str) -> str:
+    _wait()
+    return listing_page(RECORDS)
+
+
+@mcp.tool()
+def scraping_browser_navigate(url: str) -> str:
+    _wait()
+    state["url"] = url
+    return f"Navigated to {url}"
+
+
+@mcp.tool()
+def scraping_browser_click(selector: str) -> str:
+    _wait()
+    return f"Clicked {selector}"
+
+
+@mcp.tool()
+def scraping_browser_type(selector: str, text: str, submit: bool = False) -> str:
+    _wait()
+    return f"Typed into {selector}"
+
+
+@mcp.tool()
+def scraping_browser_wait_for(selector: str, timeout: int = 30000) -> str:
+    _wait()
+    return f"Found {selector}"
+
+
+@mcp.tool()
+def scraping_browser_get_text(selector: str = "body") -> str:
+    _wait()
+    return listing_markdown(RECORDS)
+
+
+@mcp.tool()
+def scraping_browser_get_html(selector: str = "body") -> str:
+    _wait()
+    return listing_page(RECORDS)
+
+
+if __name__ == "__main__":
+    mcp.run()
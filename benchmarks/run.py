@@ -0,0 +1,274 @@
+"""
+Offline benchmarks for the scraper tool and the MCP agent. Bright Data,
+Gemini and the Bright Data MCP server are replaced by local fakes, so no
+keys or network are needed and runs are comparable between machines and CI.
+
+Scenarios:
+    run     BrightQLAgentScraperTool._run, one url after another
+    batch   BrightQLAgentScraperTool.scrape_many over --iterations urls
+    agent   MCPAgent.run on a warm client against benchmarks/fake_mcp_server.py
+
+Each scenario reports throughput, p50/p95/p99 latency and the peak memory
+allocated by Python while it ran (tracemalloc). For batch runs latency is
+the time from the start of the batch until each result arrived.
+
+Run with: python -m benchmarks.run --iterations 50 --json results.json
+Fail on regressions: python -m benchmarks.run --baseline results.json --max-regression 0.2
+"""
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tracemalloc
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+
+one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
+sys.path.insert(0, one_levels_up)
+
+from benchmarks.fake_brightdata import FakeBrightDataServer
+from benchmarks.fake_llm import FakeChatModel, listing_response
+
+SCHEMA = "{ listings[] { title price } }"
+SCENARIOS = ("run", "batch", "agent")
+FAKE_MCP_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_mcp_server.py")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    Nearest-rank percentile; q in [0, 100].
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+    wall: float = 0.0
+    peak_memory: int = 0
+    extra: dict = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        count = len(self.latencies)
+        return {
+            "count": count,
+            "errors": self.errors,
+            "wall_s": round(self.wall, 4),
+            "throughput_per_s": round(count / self.wall, 3) if self.wall else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+            "peak_memory_mb": round(self.peak_memory / 1024 / 1024, 2),
+            **self.extra,
+        }
+
+
+class _Measure:
+    def __init__(self, result: BenchmarkResult, trace_memory: bool):
+        self.result = result
+        self.trace_memory = trace_memory
+
+    def __enter__(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.result.wall = time.perf_counter() - self.started
+        if self.trace_memory:
+            self.result.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def configure_environment(args) -> FakeBrightDataServer:
+    """
+    Starts the fake Bright Data API and points the tool at it. Must run
+    before tools.brightdataql_scraper_agent is imported.
+    """
+    server = FakeBrightDataServer(latency=args.fetch_latency, jitter=args.fetch_jitter, records=args.records,
+                                  error_rate=args.error_rate).start()
+    os.environ["BRIGHT_DATA_API_URL"] = server.url
+    os.environ.setdefault("BRIGHT_DATA_API_TOKEN", "benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("GOOGLE_GEMINI_MODEL_NAME", "gemini-benchmark")
+    return server
+
+
+def fake_model(args, **kwargs) -> FakeChatModel:
+    return FakeChatModel(response=listing_response(args.records), latency=args.llm_latency,
+                         tokens_per_second=args.llm_tokens_per_second,
+                         prefill_tokens_per_second=args.llm_prefill_tokens_per_second, **kwargs)
+
+
+def make_tool(args):
+    from tools.brightdataql_scraper_agent import BrightQLAgentScraperTool
+    tool = BrightQLAgentScraperTool(bright_token=os.environ["BRIGHT_DATA_API_TOKEN"],
+                                    gemini_token=os.environ["GEMINI_API_KEY"])
+    tool._extractor.model = fake_model(args)
+    return tool
+
+
+def url_for(i: int) -> str:
+    return f"https://shop.example.com/search?q=widgets&page={i}"
+
+
+def bench_run(args) -> BenchmarkResult:
+    tool = make_tool(args)
+    result = BenchmarkResult("run")
+    with _Measure(result, args.trace_memory), redirect_stdout(io.StringIO()):
+        for i in range(args.iterations):
+            started = time.perf_counter()
+            try:
+                tool._run(url_for(i), args.html, SCHEMA)
+            except Exception:
+                result.errors += 1
+            result.latencies.append(time.perf_counter() - started)
+    return result
+
+
+async def bench_batch(args) -> BenchmarkResult:
+    tool = make_tool(args)
+    result = BenchmarkResult("batch")
+    with _Measure(result, args.trace_memory):
+        started = time.perf_counter()
+        async for scraped in tool.scrape_many([url_for(i) for i in range(args.iterations)], SCHEMA, is_html=args.html):
+            result.latencies.append(time.perf_counter() - started)
+            result.errors += not scraped.ok
+    return result
+
+
+async def bench_agent(args) -> BenchmarkResult:
+    from mcp_use import MCPAgent, MCPClient
+    logging.getLogger("mcp_use").setLevel(logging.WARNING)
+    config = {"mcpServers": {"Bright Data": {
+        "command": sys.executable,
+        "args": [FAKE_MCP_SERVER],
+        "env": {"BENCH_MCP_LATENCY": str(args.mcp_latency), "BENCH_RECORDS": str(args.records)},
+    }}}
+    llm = fake_model(args, tool_calls=[{"name": "scrape_as_markdown", "args": {"url": url_for(0)}}])
+    result = BenchmarkResult("agent")
+    with _Measure(result, args.trace_memory):
+        started = time.perf_counter()
+        client = MCPClient.from_dict(config)
+        agent = MCPAgent(llm=llm, client=client, max_steps=5, memory_enabled=False)
+        # Initialized up front so run() keeps the sessions open between queries
+        await agent.initialize()
+        result.extra["cold_start_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        try:
+            for i in range(args.iterations):
+                started = time.perf_counter()
+                try:
+                    await agent.run(f"Extract the listings from {url_for(i)} as JSON")
+                except Exception:
+                    result.errors += 1
+                result.latencies.append(time.perf_counter() - started)
+        finally:
+            await client.close_all_sessions()
+    result.wall -= result.extra["cold_start_ms"] / 1000
+    return result
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Returns a message per scenario whose p95 latency grew, or throughput
+    shrank, by more than max_regression relative to the baseline.
+    """
+    failures = []
+    for name, summary in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and summary["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {summary['p95_ms']}ms vs baseline {before['p95_ms']}ms")
+        if summary["throughput_per_s"] < before["throughput_per_s"] * (1 - max_regression):
+            failures.append(f"{name}: throughput {summary['throughput_per_s']}/s "
+                            f"vs baseline {before['throughput_per_s']}/s")
+    return failures
+
+
+def print_table(results: dict):
+    columns = ("count", "errors", "throughput_per_s", "p50_ms", "p95_ms", "p99_ms", "peak_memory_mb")
+    print(f"{'scenario':<10}" + "".join(f"{column:>18}" for column in columns))
+    for name, summary in results.items():
+        print(f"{name:<10}" + "".join(f"{summary[column]:>18}" for column in columns))
+    for name, summary in results.items():
+        if "cold_start_ms" in summary:
+            print(f"{name} cold start: {summary['cold_start_ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline BrightDataQL benchmarks")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--html", action="store_true", help="fetch HTML instead of markdown")
+    parser.add_argument("--records", type=int, default=20, help="products per fake page")
+    parser.add_argument("--fetch-latency", type=float, default=0.05)
+    parser.add_argument("--fetch-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fetches answered with 503")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds to the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200.0, help="0 for instant output")
+    parser.add_argument("--llm-prefill-tokens-per-second", type=float, default=0.0,
+                        help="prompt processing speed; 0 ignores prompt size")
+    parser.add_argument("--mcp-latency", type=float, default=0.05)
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="skip tracemalloc, which slows allocation-heavy code")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    server = configure_environment(args)
+    results = {}
+    try:
+        for name in scenarios:
+            if name == "run":
+                result = bench_run(args)
+            elif name == "batch":
+                result = asyncio.run(bench_batch(args))
+            else:
+                result = asyncio.run(bench_agent(args))
+            results[name] = result.summary()
+    finally:
+        server.stop()
+
+    print_table(results)
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor:.1f} MB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = compare(results, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running forever in a daemon thread. Coroutines
+    submitted from any thread run as tasks on that one loop, so loop-bound
+    resources (MCP server sessions, httpx clients) outlive a single call.
+    """
+
+    def __init__(self, name: str = "agent-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread.is_alive() and self.loop.is_running()
+
+    def submit(self, coro):
+        """
+        Schedules coro on the loop and returns a concurrent.futures.Future.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: float = None):
+        """
+        Runs coro on the loop and blocks the calling thread for its result.
+        """
+        return self.submit(coro).result(timeout)
+
+    def stop(self, shutdown=None):
+        """
+        Optionally awaits the shutdown coroutine (e.g. aclose_server_pools())
+        on the loop, then stops the loop and joins the thread.
+        """
+        if shutdown is not None:
+            self.run(shutdown)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
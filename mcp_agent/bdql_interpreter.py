@@ -0,0 +1,309 @@
+"""
+Deterministic interpreter for BrightDataQL BEGIN...END scripts.
+
+Scripts like the ones in mcp_demo/amazon_scraping_browser_mcp.py already
+spell out every Scraping Browser call, so they are executed directly against
+the Bright Data MCP tools instead of asking the LLM to relay each step.
+The LLM is only consulted for comparisons that can't be decided locally and
+for functions that are neither MCP tools nor builtins.
+"""
+import re
+import ast
+import json
+
+from mcp_agent.observation_compaction import full_observations
+from tools.deadline import bounded
+
+_TOKEN = re.compile(r"""
+    (?P<ws>\s+|\#[^\n]*)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op><=|>=|==|!=|<|>|=)
+  | (?P<punct>[(){}\[\],:])
+""", re.VERBOSE)
+# A whole value that is a number, optionally with a currency symbol: "1,299.99", "$5", "-€3"
+_NUMBER = re.compile(r"(-)?[$€£¥₹]?\s*(-?\d[\d,]*(?:\.\d+)?)\s*[$€£¥₹]?")
+_COMPARATORS = {
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+
+
+class BDQLSyntaxError(ValueError):
+    pass
+
+
+class BDQLRuntimeError(RuntimeError):
+    pass
+
+
+def _tokenize(script: str) -> list:
+    tokens = []
+    pos = 0
+    while pos < len(script):
+        match = _TOKEN.match(script, pos)
+        if not match:
+            raise BDQLSyntaxError(f"Unexpected character {script[pos]!r} at position {pos}")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == "ws":
+            continue
+        text = match.group(kind)
+        if kind == "string":
+            tokens.append(("string", ast.literal_eval(text)))
+        elif kind == "number":
+            tokens.append(("number", float(text) if "." in text else int(text)))
+        else:
+            tokens.append((kind, text))
+    return tokens
+
+
+class _Parser:
+    """
+    Parses a script into a list of statements and a RETURN expression.
+
+    Statements:  [THEN] LET name = expr  |  [THEN] expr
+    Expressions: "string" | number | name | call(args, name=arg) | IF(a < b, x, y)
+                 | { "key": expr, ... } | [expr, ...]
+    """
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self, offset: int = 0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        if token[0] is None:
+            raise BDQLSyntaxError("Unexpected end of script")
+        self.pos += 1
+        return token
+
+    def _expect(self, kind: str, text=None):
+        token = self._next()
+        if token[0] != kind or (text is not None and token[1] != text):
+            raise BDQLSyntaxError(f"Expected {text or kind}, got {token[1]!r}")
+        return token
+
+    def _is(self, kind: str, text=None) -> bool:
+        token = self._peek()
+        return token[0] == kind and (text is None or token[1] == text)
+
+    def parse(self):
+        self._expect("ident", "BEGIN")
+        statements = []
+        result = None
+        while not self._is("ident", "END"):
+            if self._is("ident", "RETURN"):
+                self._next()
+                result = self._expression()
+                continue
+            if self._is("ident", "THEN"):
+                self._next()
+            if self._is("ident", "LET"):
+                self._next()
+                name = self._expect("ident")[1]
+                self._expect("op", "=")
+                statements.append(("let", name, self._expression()))
+            else:
+                statements.append(("do", None, self._expression()))
+        self._expect("ident", "END")
+        if self._peek()[0] is not None:
+            raise BDQLSyntaxError(f"Unexpected {self._peek()[1]!r} after END")
+        return statements, result
+
+    def _expression(self):
+        left = self._operand()
+        if self._is("op") and self._peek()[1] in _COMPARATORS:
+            op = self._next()[1]
+            return ("compare", op, left, self._operand())
+        return left
+
+    def _operand(self):
+        kind, text = self._next()
+        if kind in ("string", "number"):
+            return ("literal", text)
+        if kind == "punct" and text == "{":
+            items = []
+            while not self._is("punct", "}"):
+                key = self._next()
+                if key[0] not in ("string", "ident"):
+                    raise BDQLSyntaxError(f"Expected an object key, got {key[1]!r}")
+                self._expect("punct", ":")
+                items.append((key[1], self._expression()))
+                if not self._is("punct", "}"):
+                    self._expect("punct", ",")
+            self._next()
+            return ("object", items)
+        if kind == "punct" and text == "[":
+            items = []
+            while not self._is("punct", "]"):
+                items.append(self._expression())
+                if not self._is("punct", "]"):
+                    self._expect("punct", ",")
+            self._next()
+            return ("array", items)
+        if kind == "ident":
+            if self._is("punct", "("):
+                self._next()
+                args, keywords = [], []
+                while not self._is("punct", ")"):
+                    if self._is("ident") and self._peek(1) == ("op", "="):
+                        # Keyword argument, matched to the tool's input by name
+                        keyword = self._next()[1]
+                        self._next()
+                        keywords.append((keyword, self._expression()))
+                    elif keywords:
+                        raise BDQLSyntaxError(f"Positional argument after keyword arguments in {text}()")
+                    else:
+                        args.append(self._expression())
+                    if not self._is("punct", ")"):
+                        self._expect("punct", ",")
+                self._next()
+                return ("call", text, args, keywords)
+            return ("var", text)
+        raise BDQLSyntaxError(f"Unexpected {text!r}")
+
+
+def parse_script(script: str):
+    return _Parser(_tokenize(script.strip())).parse()
+
+
+def is_bdql_script(text: str) -> bool:
+    stripped = text.strip()
+    return stripped.startswith("BEGIN") and stripped.endswith("END")
+
+
+def _as_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    # Anything else, like "4.5 out of 5 stars", is left to the LLM
+    match = _NUMBER.fullmatch(str(value).strip())
+    if not match:
+        return None
+    number = float(match.group(2).replace(",", ""))
+    return -number if match.group(1) else number
+
+
+def _tool_text(result) -> str:
+    parts = [getattr(item, "text", None) for item in (result.content or [])]
+    return "\n".join(part for part in parts if part is not None)
+
+
+class BrightDataQLInterpreter:
+    """
+    Executes BrightDataQL scripts by calling MCP tools through an MCPClient.
+    LET binds a tool result (its text content) to a variable, IF is
+    evaluated locally when both sides are numbers or plain equality checks,
+    and RETURN builds the resulting object.
+    """
+
+    def __init__(self, client, llm=None):
+        self.client = client
+        self.llm = llm
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self._tools = None
+
+    async def _load_tools(self) -> dict:
+        if self._tools is None:
+            sessions = self.client.get_all_active_sessions()
+            if not sessions:
+                sessions = await self.client.create_all_sessions()
+            self._tools = {}
+            for session in sessions.values():
+                for tool in await session.connector.list_tools():
+                    self._tools[tool.name] = (tool, session.connector)
+        return self._tools
+
+    async def run(self, script: str) -> dict:
+        statements, result = parse_script(script)
+        await self._load_tools()
+        variables = {}
+        for kind, name, expression in statements:
+            value = await self._evaluate(expression, variables)
+            if kind == "let":
+                variables[name] = value
+        return await self._evaluate(result, variables) if result else variables
+
+    async def _evaluate(self, expression, variables: dict):
+        kind = expression[0]
+        if kind == "literal":
+            return expression[1]
+        if kind == "var":
+            if expression[1] not in variables:
+                raise BDQLRuntimeError(f"Undefined variable {expression[1]!r}")
+            return variables[expression[1]]
+        if kind == "object":
+            return {key: await self._evaluate(value, variables) for key, value in expression[1]}
+        if kind == "array":
+            return [await self._evaluate(value, variables) for value in expression[1]]
+        if kind == "compare":
+            _, op, left, right = expression
+            return await self._compare(op, await self._evaluate(left, variables),
+                                       await self._evaluate(right, variables))
+        _, name, args, keywords = expression
+        if name == "IF":
+            if len(args) != 3 or keywords:
+                raise BDQLRuntimeError("IF expects (condition, then, else)")
+            condition = await self._evaluate(args[0], variables)
+            # Only the chosen branch is evaluated, so it may call tools
+            return await self._evaluate(args[1] if condition else args[2], variables)
+        values = [await self._evaluate(arg, variables) for arg in args]
+        named = {keyword: await self._evaluate(arg, variables) for keyword, arg in keywords}
+        tools = await self._load_tools()
+        if name in tools:
+            return await self._call_tool(name, values, named)
+        rendered = [json.dumps(v, default=str) for v in values]
+        rendered += [f"{keyword}={json.dumps(v, default=str)}" for keyword, v in named.items()]
+        return await self._ask_llm(f"Evaluate {name}({', '.join(rendered)}). Reply with the resulting value only.")
+
+    async def _call_tool(self, name: str, values: list, named: dict = None) -> str:
+        """
+        Positional values fill the tool's input properties in schema order;
+        keyword arguments name them, which doesn't depend on that order.
+        """
+        tool, connector = self._tools[name]
+        properties = list((tool.inputSchema or {}).get("properties", {}))
+        if len(values) > len(properties):
+            raise BDQLRuntimeError(f"{name} takes at most {len(properties)} arguments, got {len(values)}")
+        arguments = dict(zip(properties, values))
+        for keyword, value in (named or {}).items():
+            if keyword not in properties:
+                raise BDQLRuntimeError(f"{name} has no argument {keyword!r}")
+            if keyword in arguments:
+                raise BDQLRuntimeError(f"{name} got {keyword!r} twice")
+            arguments[keyword] = value
+        self.tool_calls += 1
+        # Results are compared and returned as they are, never read by an
+        # agent that could ask read_observation for the rest
+        with full_observations():
+            result = await connector.call_tool(name, arguments)
+        if getattr(result, "isError", False):
+            raise BDQLRuntimeError(f"{name} failed: {_tool_text(result)}")
+        return _tool_text(result)
+
+    async def _compare(self, op: str, left, right) -> bool:
+        left_number, right_number = _as_number(left), _as_number(right)
+        if left_number is not None and right_number is not None:
+            return _COMPARATORS[op](left_number, right_number)
+        if op in ("==", "!="):
+            return _COMPARATORS[op](str(left).strip(), str(right).strip())
+        answer = await self._ask_llm(f"Is the following true? {json.dumps(left, default=str)} {op} "
+                                     f"{json.dumps(right, default=str)}. Reply with only true or false.")
+        return answer.strip().lower().startswith("true")
+
+    async def _ask_llm(self, prompt: str) -> str:
+        if self.llm is None:
+            raise BDQLRuntimeError(f"An LLM is required to evaluate: {prompt}")
+        self.llm_calls += 1
+        response = await bounded(self.llm.ainvoke(prompt), "the interpreter's model call")
+        return response.content if isinstance(response.content, str) else str(response.content)
@@ -5,10 +5,20 @@ https://www.npmjs.com/package/@brightdata/mcp
 
 """
 import os
+import json
+from contextlib import asynccontextmanager
 from langchain_google_genai import ChatGoogleGenerativeAI
 from mcp_use import MCPAgent, MCPClient
+from mcp_use.agents.observability import ObservabilityManager
 
-def get_mcp_agent(max_steps: int):
+from mcp_agent.deadlines import DeadlineCallback, deadline_middleware
+from mcp_agent.observation_compaction import OBSERVATION_COMPACTION, compactor
+from mcp_agent.plan_cache import recorder as plan_recorder
+from mcp_agent.server_pool import ServerPool, get_server_pool
+from mcp_agent.tool_cache import ToolCacheMiddleware, get_tool_cache
+from tools.json_stream import JSONRecordStream
+
+def get_mcp_client() -> MCPClient:
     # Configure MCP Server
     config = {
         "mcpServers": {
@@ -24,13 +34,103 @@ def get_mcp_agent(max_steps: int):
         }
     }
     client = MCPClient.from_dict(config)
+    # Outermost, so a call cancelled at the deadline is cancelled everywhere
+    client.add_middleware(deadline_middleware)
+    if OBSERVATION_COMPACTION:
+        # Added before the sessions start, so read_observation is listed
+        client.add_middleware(compactor)
+    # Outside the tool cache, so plan runs record calls served from it too
+    client.add_middleware(plan_recorder)
+    tool_cache = get_tool_cache()
+    if tool_cache is not None:
+        # Inside the compactor, so full results are cached
+        client.add_middleware(ToolCacheMiddleware(tool_cache))
+    return client
 
+def get_llm() -> ChatGoogleGenerativeAI:
     os.environ["GOOGLE_API_KEY"] = os.environ["GEMINI_API_KEY"]
 
     # Set up the Gemini LLM (replace model name if needed)
-    llm = ChatGoogleGenerativeAI(model=os.environ["GOOGLE_GEMINI_MODEL_NAME"], temperature=0, api_key=os.environ["GEMINI_API_KEY"])
+    return ChatGoogleGenerativeAI(model=os.environ["GOOGLE_GEMINI_MODEL_NAME"], temperature=0, api_key=os.environ["GEMINI_API_KEY"])
+
+def get_mcp_agent(max_steps: int, client: MCPClient = None):
+    """
+    MCPAgent on client; without one it starts a new Bright Data MCP server,
+    so entry points use lease_mcp_agent() to run on a pooled one instead.
+    """
+    client = client or get_mcp_client()
+    llm = get_llm()
 
     # Create MCP Agent
-    agent = MCPAgent(llm=llm, client=client, max_steps=max_steps)
+    # Passing callbacks replaces the default (Langfuse) ones, so they're kept
+    callbacks = [*ObservabilityManager().get_callbacks(), DeadlineCallback()]
+    agent = MCPAgent(llm=llm, client=client, max_steps=max_steps, callbacks=callbacks)
+
+    return agent
+
+async def _start_mcp_client() -> MCPClient:
+    client = get_mcp_client()
+    await client.create_all_sessions()
+    return client
+
+async def _mcp_client_healthy(client: MCPClient) -> bool:
+    sessions = client.get_all_active_sessions()
+    if not sessions:
+        return False
+    for session in sessions.values():
+        if not session.is_connected:
+            return False
+        # A round trip proves the server process still answers
+        await session.connector.list_tools()
+    return True
+
+def get_mcp_client_pool() -> ServerPool:
+    return get_server_pool("mcp_use", _start_mcp_client, MCPClient.close_all_sessions, check=_mcp_client_healthy)
+
+@asynccontextmanager
+async def lease_mcp_agent(max_steps: int):
+    """
+    Yields an MCPAgent running on a warm MCPClient leased from the pool, so
+    the Bright Data MCP server is started once per process rather than once
+    per query.
+    """
+    async with get_mcp_client_pool().lease() as client:
+        agent = get_mcp_agent(max_steps, client)
+        # Initialized up front so run() doesn't close the pooled sessions
+        await agent.initialize()
+        yield agent
+
+
+def _chunk_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    # Gemini may stream a list of content parts
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content or [])
+
+async def astream_records(agent: MCPAgent, query: str, max_steps: int = None):
+    """
+    Runs the agent and yields (path, record) pairs from its answer as the
+    model streams it, e.g. each listings[] entry once its closing brace
+    arrives. Only the latest model turn is parsed, so tool-calling turns
+    don't leak partial output.
+    """
+    stream = JSONRecordStream()
+    async for event in agent.stream_events(query, max_steps=max_steps):
+        kind = event.get("event")
+        if kind == "on_chat_model_start":
+            stream = JSONRecordStream()
+        elif kind == "on_chat_model_stream":
+            for record in stream.feed(_chunk_text(event["data"]["chunk"].content)):
+                yield record
+    for record in stream.finish():
+        yield record
 
-    return agent
\ No newline at end of file
+async def print_ndjson(records) -> int:
+    """
+    Prints each record from an async (path, record) iterator as one JSON line.
+    """
+    count = 0
+    async for _, record in records:
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+        count += 1
+    return count
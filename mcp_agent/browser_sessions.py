@@ -0,0 +1,152 @@
+"""
+Warm Scraping Browser sessions. The Bright Data MCP server keeps one remote
+browser (BROWSER_AUTH) per server process, and a Scraping Browser flow
+normally starts it from scratch: server start, browser connect, the site's
+first load with its consent banner and geo redirects, and only then the
+useful steps.
+
+BrowserSessionManager keeps a small pool of MCP server processes per
+warm-up url (e.g. https://www.amazon.com) whose browser has already loaded
+that page and clicked through BROWSER_WARMUP_CLICKS. Before a session is
+handed out again it navigates back to the warm-up url, which drops what the
+last run left open but keeps cookies. Each lease reports whether the
+session was reused and the seconds saved, the cold start minus the reset.
+"""
+import os
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from mcp_use import MCPClient
+
+from mcp_agent.brightdata_mcp_agent import get_mcp_client
+from mcp_agent.server_pool import get_server_pool
+from observability.pipeline_metrics import stage
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE") or 1)
+BROWSER_POOL_IDLE_TIMEOUT = float(os.getenv("BROWSER_POOL_IDLE_TIMEOUT") or 600)
+BROWSER_RESET_TIMEOUT = float(os.getenv("BROWSER_RESET_TIMEOUT") or 60)
+# Selectors clicked after the first load, e.g. "#sp-cc-accept" for Amazon's
+# cookie banner; ones not on the page are skipped
+BROWSER_WARMUP_CLICKS = tuple(s.strip() for s in os.getenv("BROWSER_WARMUP_CLICKS", "").split(",") if s.strip())
+
+
+class BrowserSessionError(RuntimeError):
+    pass
+
+
+def _failed(result) -> bool:
+    return bool(getattr(result, "isError", False))
+
+
+class BrowserSession:
+    """
+    One MCP server process and its remote browser, warmed on warm_url.
+    """
+
+    def __init__(self, client: MCPClient, warm_url: str):
+        self.client = client
+        self.warm_url = warm_url
+        self.cold_start_seconds = 0.0
+        self.reset_seconds = 0.0
+        self.leases = 0
+
+    async def call(self, tool: str, arguments: dict):
+        sessions = self.client.get_all_active_sessions() or await self.client.create_all_sessions()
+        for session in sessions.values():
+            if any(t.name == tool for t in session.connector.tools):
+                return await session.connector.call_tool(tool, arguments)
+        raise BrowserSessionError(f"No MCP server provides {tool}")
+
+    @classmethod
+    async def start(cls, warm_url: str, warmup_clicks: tuple, client_factory=None) -> "BrowserSession":
+        started = time.perf_counter()
+        client = (client_factory or get_mcp_client)()
+        session = cls(client, warm_url)
+        try:
+            await client.create_all_sessions()
+            result = await session.call("scraping_browser_navigate", {"url": warm_url})
+            if _failed(result):
+                raise BrowserSessionError(f"Warm-up navigation to {warm_url} failed")
+            for selector in warmup_clicks:
+                await session.call("scraping_browser_click", {"selector": selector})
+        except BaseException:
+            await client.close_all_sessions()
+            raise
+        session.cold_start_seconds = time.perf_counter() - started
+        return session
+
+    async def reset(self) -> bool:
+        """
+        Back to the warm-up page; cookies (consent, region) are kept.
+        """
+        started = time.perf_counter()
+        result = await self.call("scraping_browser_navigate", {"url": self.warm_url})
+        self.reset_seconds = time.perf_counter() - started
+        return not _failed(result)
+
+    async def close(self):
+        await self.client.close_all_sessions()
+
+
+class BrowserLease:
+    def __init__(self, session: BrowserSession):
+        self.session = session
+        self.client = session.client
+        self.reused = session.leases > 0
+        self.saved_seconds = max(0.0, session.cold_start_seconds - session.reset_seconds) if self.reused else 0.0
+
+    def report(self) -> str:
+        if not self.reused:
+            return f"cold Scraping Browser session ({self.session.cold_start_seconds:.1f}s start)"
+        return f"warm Scraping Browser session ({self.saved_seconds:.1f}s saved)"
+
+
+class BrowserSessionManager:
+    def __init__(self, warmup_clicks: tuple = None, max_sessions: int = None, client_factory=None):
+        self.warmup_clicks = BROWSER_WARMUP_CLICKS if warmup_clicks is None else tuple(warmup_clicks)
+        self.max_sessions = max_sessions or BROWSER_POOL_SIZE
+        self.client_factory = client_factory
+        self.stats = {"leases": 0, "reused": 0, "cold_starts": 0, "saved_seconds": 0.0}
+
+    def _pool(self, warm_url: str):
+        async def create() -> BrowserSession:
+            if self.client_factory is None and not os.getenv("BROWSER_AUTH"):
+                raise BrowserSessionError("BROWSER_AUTH is not set")
+            return await BrowserSession.start(warm_url, self.warmup_clicks, self.client_factory)
+
+        async def close(session: BrowserSession):
+            await session.close()
+
+        async def reset(session: BrowserSession) -> bool:
+            # Failing to get back to the warm-up page discards the session
+            return await session.reset()
+
+        return get_server_pool(f"scraping_browser:{warm_url}", create, close, check=reset,
+                               max_sessions=self.max_sessions, idle_timeout=BROWSER_POOL_IDLE_TIMEOUT,
+                               check_timeout=BROWSER_RESET_TIMEOUT)
+
+    @asynccontextmanager
+    async def lease(self, warm_url: str):
+        """
+        Yields a BrowserLease whose client drives a browser showing warm_url.
+        """
+        async with AsyncExitStack() as stack:
+            # The stage times getting the session (cold start or reset), not the run
+            with stage("browser_lease", domain=urlparse(warm_url).hostname) as current:
+                session = await stack.enter_async_context(self._pool(warm_url).lease())
+                lease = BrowserLease(session)
+                session.leases += 1
+                self.stats["leases"] += 1
+                self.stats["reused" if lease.reused else "cold_starts"] += 1
+                self.stats["saved_seconds"] += lease.saved_seconds
+                if lease.reused:
+                    current.add("cache_hits")
+                current.set(reused=lease.reused, saved_seconds=round(lease.saved_seconds, 3))
+            yield lease
+
+
+@lru_cache(maxsize=None)
+def get_browser_sessions() -> BrowserSessionManager:
+    return BrowserSessionManager()
@@ -0,0 +1,55 @@
+"""
+Request deadlines (tools/deadline.py) for MCP agent runs. DeadlineMiddleware
+cancels a tools/call still waiting on the Bright Data MCP server when the
+deadline expires (deadline_tool_call() does the same for pydantic_ai's
+MCPServerStdio), and DeadlineCallback stops an agent before it starts
+another model call or tool once there is no time left.
+"""
+from langchain_core.callbacks import BaseCallbackHandler
+from mcp_use.client.middleware import Middleware
+
+from tools.deadline import bounded, check
+
+
+class DeadlineMiddleware(Middleware):
+    async def on_call_tool(self, context, call_next):
+        name = f"the MCP tool {context.params.name}"
+        check(name)
+        return await bounded(call_next(context), name)
+
+
+class DeadlineCallback(BaseCallbackHandler):
+    """
+    MCPAgent turns errors in a step into a "stopped" answer rather than
+    raising them, so callers check the deadline again after the run.
+    """
+
+    raise_error = True
+    run_inline = True
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        check("the next agent step")
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        check("the next agent step")
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        check(f"the tool {(serialized or {}).get('name', '')}".rstrip())
+
+
+deadline_middleware = DeadlineMiddleware()
+
+
+def deadline_tool_call(process_tool_call=None):
+    """
+    pydantic_ai MCPServer process_tool_call hook bounding each call by the
+    deadline, around process_tool_call (e.g. the tool cache's) when given.
+    """
+    async def hook(ctx, call_tool, tool_name: str, arguments: dict):
+        name = f"the MCP tool {tool_name}"
+        check(name)
+        if process_tool_call is None:
+            return await bounded(call_tool(tool_name, arguments, None), name)
+        return await bounded(process_tool_call(ctx, call_tool, tool_name, arguments), name)
+
+    return hook
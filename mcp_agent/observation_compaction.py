@@ -0,0 +1,224 @@
+"""
+Observation compaction for MCP agent runs. A scrape tool returns the whole
+page, and MCPAgent keeps every observation in the conversation for the rest
+of the run, so each reasoning step re-sends all pages fetched so far.
+
+ObservationCompactor is an mcp_use client middleware that stores tool
+results longer than OBSERVATION_MAX_CHARS in a process-wide store and hands
+the agent an excerpt instead: the top of the page plus the passages that
+mention the schema's fields (see observation_focus()), with a handle. It
+also adds a read_observation tool to the server's tool list, answered
+locally, which returns further slices of a stored result by offset or by
+searching for text. Every observation the model sees is then bounded,
+however large the page.
+
+It is off unless OBSERVATION_COMPACTION=1: reading past an excerpt costs
+the agent extra steps, so enable it with a MAX_MCP_AGENT_STEPS that leaves
+room for read_observation calls.
+"""
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from mcp.types import CallToolResult, TextContent, Tool
+from mcp_use.client.middleware import Middleware
+
+OBSERVATION_COMPACTION = os.getenv("OBSERVATION_COMPACTION", "").lower() in ("1", "true", "yes")
+OBSERVATION_MAX_CHARS = int(os.getenv("OBSERVATION_MAX_CHARS") or 8000)
+OBSERVATION_SLICE_CHARS = int(os.getenv("OBSERVATION_SLICE_CHARS") or 4000)
+OBSERVATION_STORE_MAX_MB = float(os.getenv("OBSERVATION_STORE_MAX_MB") or 64)
+READ_OBSERVATION_TOOL = "read_observation"
+# Passages are scored in pieces of at most this many characters, so a page
+# of minified HTML on one line still gets a focused excerpt
+_BLOCK_CHARS = 500
+# Schema words that say nothing about where the data is on the page
+_TYPE_WORDS = {"string", "str", "float", "int", "integer", "number", "bool", "boolean", "list", "array",
+               "object", "null", "available", "else", "use", "yyyy", "the", "and", "for", "url"}
+
+_focus = ContextVar("observation_focus", default=())
+_bypass = ContextVar("observation_bypass", default=False)
+
+
+def focus_terms(schema: str) -> tuple:
+    terms = []
+    for word in re.findall(r"[A-Za-z][A-Za-z0-9_]+", schema or ""):
+        for term in word.lower().split("_"):
+            if len(term) >= 3 and term not in _TYPE_WORDS and term not in terms:
+                terms.append(term)
+    return tuple(terms)
+
+
+@contextmanager
+def observation_focus(schema: str):
+    """
+    Excerpts of observations made inside favour passages mentioning the
+    schema's field names.
+    """
+    token = _focus.set(focus_terms(schema))
+    try:
+        yield
+    finally:
+        _focus.reset(token)
+
+
+@contextmanager
+def full_observations():
+    """
+    Tool calls made inside get their results uncompacted, e.g. the calls
+    replayed from a cached plan, whose results go to the model in one go.
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _skip_marker(offset: int) -> str:
+    return f"\n[... @{offset}]\n"
+
+
+def excerpt(text: str, terms: tuple, budget: int) -> str:
+    """
+    The blocks of text mentioning most terms, in page order, after the top
+    of the page, which gets at least a quarter of budget and whatever the
+    blocks leave. Skipped text is marked with its offset, which
+    read_observation accepts; markers count toward budget.
+    """
+    if not terms:
+        return text[:budget]
+    reserved = budget // 4
+    scored = []
+    for match in re.finditer(r"[^\n]{1,%d}" % _BLOCK_CHARS, text[reserved:]):
+        block = match.group(0).lower()
+        score = sum(term in block for term in terms)
+        if score:
+            scored.append((-score, match.start() + reserved, match.group(0)))
+    chosen, used = [], reserved
+    for _, start, block in sorted(scored):
+        cost = len(_skip_marker(start)) + len(block)
+        if used + cost > budget:
+            continue
+        chosen.append((start, block))
+        used += cost
+    head = text[:budget - used + reserved]
+    chosen = [(start, block) for start, block in chosen if start >= len(head)]
+    parts, position = [head], len(head)
+    for start, block in sorted(chosen):
+        parts.append(("\n" if start == position or text[position:start].isspace() else _skip_marker(start)) + block)
+        position = start + len(block)
+    return "".join(parts)
+
+
+class ObservationStore:
+    """
+    Full tool results by handle, least recently used dropped first above
+    max_bytes. Handles are content hashes, so a page fetched twice is
+    stored once.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes or int(OBSERVATION_STORE_MAX_MB * 1024 * 1024)
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def put(self, text: str) -> str:
+        handle = "obs_" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            if handle in self._items:
+                self._items.move_to_end(handle)
+                return handle
+            self._items[handle] = text
+            self._size += len(text)
+            while self._size > self.max_bytes and len(self._items) > 1:
+                _, dropped = self._items.popitem(last=False)
+                self._size -= len(dropped)
+        return handle
+
+    def get(self, handle: str) -> str:
+        with self._lock:
+            text = self._items.get(handle)
+            if text is not None:
+                self._items.move_to_end(handle)
+            return text
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+observation_store = ObservationStore()
+
+
+def _text_result(text: str, is_error: bool = False) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text)], isError=is_error)
+
+
+class ObservationCompactor(Middleware):
+    def __init__(self, store: ObservationStore = None, max_chars: int = None, slice_chars: int = None):
+        self.store = store or observation_store
+        self.max_chars = max_chars or OBSERVATION_MAX_CHARS
+        self.slice_chars = slice_chars or OBSERVATION_SLICE_CHARS
+        self.stats = {"observations": 0, "compacted": 0, "chars_in": 0, "chars_out": 0, "slices": 0}
+        self._tool = Tool(
+            name=READ_OBSERVATION_TOOL,
+            description=("Read more of a tool result that was shortened to an excerpt. Pass the handle from the "
+                         "excerpt and either an offset (character position) or a query (text to find). Returns "
+                         f"up to {self.slice_chars} characters."),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "handle": {"type": "string", "description": "handle shown in the excerpt, e.g. obs_1a2b3c4d5e6f"},
+                    "offset": {"type": "integer", "description": "character position to start from", "default": 0},
+                    "query": {"type": "string", "description": "text to find, case-insensitive, from offset on"},
+                },
+                "required": ["handle"],
+            },
+        )
+
+    async def on_list_tools(self, context, call_next):
+        result = await call_next(context)
+        if result is not None and all(tool.name != READ_OBSERVATION_TOOL for tool in result.tools):
+            result.tools.append(self._tool)
+        return result
+
+    async def on_call_tool(self, context, call_next):
+        if context.params.name == READ_OBSERVATION_TOOL:
+            return self.read(**(context.params.arguments or {}))
+        result = await call_next(context)
+        if _bypass.get() or getattr(result, "isError", False):
+            return result
+        text = "\n".join(getattr(part, "text", "") for part in result.content or [])
+        self.stats["observations"] += 1
+        if len(text) <= self.max_chars:
+            return result
+        handle = self.store.put(text)
+        note = (f"\n\n[Excerpt of {len(text)} characters, handle {handle}. Call {READ_OBSERVATION_TOOL} "
+                f"with this handle and an offset or a query for more.]")
+        shown = excerpt(text, _focus.get(), max(self.max_chars - len(note), 0)) + note
+        self.stats["compacted"] += 1
+        self.stats["chars_in"] += len(text)
+        self.stats["chars_out"] += len(shown)
+        return _text_result(shown)
+
+    def read(self, handle: str = "", offset: int = 0, query: str = None, **_) -> CallToolResult:
+        text = self.store.get(handle)
+        if text is None:
+            return _text_result(f"Unknown or expired observation handle {handle!r}; call the tool again.", True)
+        start = max(0, int(offset or 0))
+        if query:
+            found = text.lower().find(query.lower(), start)
+            if found < 0:
+                return _text_result(f"{query!r} not found in {handle} after character {start}.")
+            # Some context before the match
+            start = max(0, found - self.slice_chars // 8)
+        end = min(len(text), start + self.slice_chars)
+        self.stats["slices"] += 1
+        return _text_result(f"[{handle} characters {start}-{end} of {len(text)}]\n{text[start:end]}")
+
+
+compactor = ObservationCompactor()
@@ -0,0 +1,301 @@
+"""
+Plan cache for MCP agent runs. The domain agents run one prompt template
+against different urls, and MCPAgent re-plans the same tool calls every
+time. run_with_plan() records the tool calls of a successful run per
+(template, domain), replaces the run's parameters (url, ...) in their
+arguments with placeholders and, on later runs, replays those calls
+directly and asks the model once for the answer. When a replayed call
+fails or returns much less than when it was recorded, control goes back to
+the agent and the new run is recorded instead.
+
+Only the run's parameters are replaced, so a run that follows a url the
+model picked from a tool result (a link on the page) isn't recorded:
+replayed for another url, it would fetch the recorded run's link.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from urllib.parse import urlparse
+
+from langchain_core.messages import HumanMessage
+from mcp_use import MCPAgent
+from mcp_use.client.middleware import Middleware
+
+from mcp_agent.observation_compaction import full_observations
+from tools.chunked_extraction import parse_json_result
+from tools.deadline import bounded, check as check_deadline
+
+# A replayed call returning less than this fraction of the recorded result
+# (e.g. a captcha page instead of the listing) counts as unexpected
+PLAN_MIN_RESULT_RATIO = float(os.getenv("PLAN_MIN_RESULT_RATIO") or 0.1)
+PLAN_MAX_OBSERVATION_CHARS = int(os.getenv("PLAN_MAX_OBSERVATION_CHARS") or 200000)
+
+_recording = ContextVar("plan_recording", default=None)
+_url = re.compile(r"https?://[^\s\"'<>]+")
+
+
+def result_text(result) -> str:
+    return "\n".join(getattr(part, "text", "") for part in getattr(result, "content", None) or [])
+
+
+def render(template: str, params: dict) -> str:
+    """
+    Fills {name} placeholders; other braces (JSON schemas) are left alone.
+    """
+    for name, value in params.items():
+        template = template.replace("{" + name + "}", str(value))
+    return template
+
+
+@dataclass
+class ToolCall:
+    tool: str
+    arguments: dict
+    result_chars: int
+    is_error: bool
+
+
+class ToolCallRecorder(Middleware):
+    """
+    mcp_use client middleware recording tools/call requests made inside
+    recording(). The trace lives in a context variable, so concurrent runs
+    sharing a pooled client don't see each other's calls.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        result = await call_next(context)
+        calls = _recording.get()
+        if calls is not None:
+            calls.append(ToolCall(context.params.name, dict(context.params.arguments or {}),
+                                  len(result_text(result)), bool(getattr(result, "isError", False))))
+        return result
+
+    @contextmanager
+    def recording(self):
+        calls = []
+        token = _recording.set(calls)
+        try:
+            yield calls
+        finally:
+            _recording.reset(token)
+
+
+recorder = ToolCallRecorder()
+
+
+def _parameterize(value, params: dict):
+    if isinstance(value, str):
+        # Longest first, so a url isn't partly replaced by a shorter param
+        for name, param in sorted(params.items(), key=lambda item: -len(str(item[1]))):
+            if str(param):
+                value = value.replace(str(param), "${" + name + "}")
+        return value
+    if isinstance(value, dict):
+        return {key: _parameterize(item, params) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_parameterize(item, params) for item in value]
+    return value
+
+
+def _bind(value, params: dict):
+    if isinstance(value, str):
+        for name, param in params.items():
+            value = value.replace("${" + name + "}", str(param))
+        return value
+    if isinstance(value, dict):
+        return {key: _bind(item, params) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_bind(item, params) for item in value]
+    return value
+
+
+@dataclass
+class PlanStep:
+    tool: str
+    arguments: dict
+    min_result_chars: int = 1
+
+    def bind(self, params: dict) -> dict:
+        return _bind(self.arguments, params)
+
+
+@dataclass
+class Plan:
+    steps: list
+    answer_is_json: bool
+    recorded_steps: int
+    created: float = field(default_factory=time.time)
+    replays: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Plan":
+        return cls(**{**data, "steps": [PlanStep(**step) for step in data["steps"]]})
+
+
+class PlanCache:
+    """
+    Plans per (template, domain), persisted as JSON like the extraction
+    recipes.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.recorded = 0
+        self._plans = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._plans = {key: Plan.from_dict(value) for key, value in json.load(f).items()}
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv("PLAN_CACHE", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(os.getenv("PLAN_CACHE_PATH") or ".cache/plans.json")
+
+    @staticmethod
+    def key(template: str, domain: str) -> str:
+        return f"{domain.lower()}|{hashlib.sha256(template.encode('utf-8')).hexdigest()[:16]}"
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({key: plan.to_dict() for key, plan in self._plans.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str) -> Plan:
+        with self._lock:
+            return self._plans.get(key)
+
+    def record(self, key: str, calls: list, params: dict, answer: str, template: str = "") -> Plan:
+        """
+        Stores the successful calls of a run as a plan. Runs with no
+        successful tool call, an answer that isn't JSON (e.g. "Agent stopped
+        after reaching the maximum number of steps") or a url that is neither
+        a parameter nor in the template are not recorded.
+        """
+        steps = [PlanStep(call.tool, _parameterize(call.arguments, params),
+                          max(1, int(call.result_chars * PLAN_MIN_RESULT_RATIO)))
+                 for call in calls if not call.is_error]
+        if not steps or parse_json_result(answer or "") is None:
+            return None
+        if any(url not in template for step in steps
+               for url in _url.findall(json.dumps(step.arguments, ensure_ascii=False))):
+            return None
+        plan = Plan(steps, answer_is_json=True, recorded_steps=len(calls))
+        with self._lock:
+            self._plans[key] = plan
+            self.recorded += 1
+            self._save()
+        return plan
+
+    def discard(self, key: str):
+        with self._lock:
+            if self._plans.pop(key, None) is not None:
+                self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"plans": len(self._plans), "hits": self.hits, "misses": self.misses,
+                    "fallbacks": self.fallbacks, "recorded": self.recorded}
+
+
+def _answer_prompt(query: str, observations: list) -> str:
+    results = "\n\n".join(f"### {tool}({json.dumps(arguments, ensure_ascii=False)})\n{text}"
+                          for tool, arguments, text in observations)
+    return (f"{query}\n\nThe tools have already been called for you. Their results, in order:\n\n{results}\n\n"
+            f"Answer using only these results, without calling any tool.")
+
+
+async def replay(agent: MCPAgent, plan: Plan, params: dict, query: str) -> str:
+    """
+    Runs the plan's tool calls directly on the agent's connectors, then asks
+    the model for the answer in one call. Returns None when a call fails, a
+    result is unexpectedly small or the answer isn't JSON when it was before.
+    """
+    connectors = {}
+    # A client's sessions, as agent.connectors stays empty when the agent
+    # was initialized on already running ones (lease_mcp_agent)
+    sessions = agent.client.get_all_active_sessions() if agent.client else {}
+    for connector in [session.connector for session in sessions.values()] or agent.connectors:
+        for tool in connector.tools:
+            connectors.setdefault(tool.name, connector)
+    observations = []
+    for step in plan.steps:
+        connector = connectors.get(step.tool)
+        if connector is None:
+            return None
+        arguments = step.bind(params)
+        with full_observations():
+            result = await connector.call_tool(step.tool, arguments)
+        text = result_text(result)
+        if getattr(result, "isError", False) or len(text) < step.min_result_chars:
+            return None
+        observations.append((step.tool, arguments, text[:PLAN_MAX_OBSERVATION_CHARS]))
+    response = await bounded(agent.llm.ainvoke([HumanMessage(content=_answer_prompt(query, observations))]),
+                             "the plan's answer")
+    content = response.content
+    answer = content if isinstance(content, str) else "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part) for part in content or [])
+    if not answer or (plan.answer_is_json and parse_json_result(answer) is None):
+        return None
+    return answer
+
+
+async def run_with_plan(agent: MCPAgent, template: str, params: dict, cache: PlanCache = None,
+                        max_steps: int = None, domain: str = None) -> str:
+    """
+    agent.run(render(template, params)) through the plan cache, which is off
+    unless PLAN_CACHE=1 (or a cache is passed). The domain defaults to the
+    host of params["url"]. Tool calls are recorded by the recorder that
+    get_mcp_client() registers on the agent's client.
+    """
+    query = render(template, params)
+    cache = cache if cache is not None else PlanCache.from_env()
+    if cache is None:
+        return await agent.run(query, max_steps=max_steps)
+
+    # An agent from lease_mcp_agent() already runs on the pool's sessions
+    initialized_here = agent.client is not None and not agent.client.get_all_active_sessions()
+    if initialized_here:
+        await agent.initialize()
+    key = PlanCache.key(template, domain or urlparse(str(params.get("url", ""))).hostname or "")
+    try:
+        plan = cache.get(key)
+        if plan is not None:
+            answer = await replay(agent, plan, params, query)
+            if answer is not None:
+                cache.hits += 1
+                plan.replays += 1
+                return answer
+            # Hand back to the agent; its run replaces the plan
+            cache.fallbacks += 1
+            cache.discard(key)
+        else:
+            cache.misses += 1
+        with recorder.recording() as calls:
+            answer = await agent.run(query, max_steps=max_steps)
+        # A run stopped by the deadline "answers" with the error; not a plan
+        check_deadline("recording the plan")
+        cache.record(key, calls, params, answer, template)
+        return answer
+    finally:
+        if initialized_here:
+            await agent.close()
@@ -0,0 +1,235 @@
+"""
+Warm pool of long-lived Bright Data MCP server sessions.
+
+Starting `npx @brightdata/mcp` takes seconds, so server sessions are started
+once per process and leased to one agent run at a time instead of being
+spawned for every query.
+"""
+import os
+import time
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+MCP_POOL_MAX_SESSIONS = int(os.getenv("MCP_POOL_MAX_SESSIONS", "2"))
+MCP_POOL_IDLE_TIMEOUT = float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "600"))
+MCP_POOL_HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_POOL_HEALTH_CHECK_TIMEOUT", "10"))
+
+
+class PoolClosedError(RuntimeError):
+    pass
+
+
+class _Entry:
+    def __init__(self, resource):
+        self.resource = resource
+        self.created = time.monotonic()
+        self.last_used = self.created
+
+
+class ServerPool:
+    """
+    Keeps up to max_sessions resources made by the async `create` factory.
+    lease() hands out an idle resource that passes `check`, or creates a new
+    one while below max_sessions, and otherwise waits for a return. Resources
+    idle for longer than idle_timeout are closed with `close`.
+    """
+
+    def __init__(self, create, close, check=None, max_sessions: int = None,
+                 idle_timeout: float = None, check_timeout: float = None):
+        self._create = create
+        self._close = close
+        self._check = check
+        self.max_sessions = max_sessions or MCP_POOL_MAX_SESSIONS
+        self.idle_timeout = idle_timeout if idle_timeout is not None else MCP_POOL_IDLE_TIMEOUT
+        self.check_timeout = check_timeout or MCP_POOL_HEALTH_CHECK_TIMEOUT
+        self._idle = []
+        self._size = 0
+        self._condition = asyncio.Condition()
+        self._reaper = None
+        self.closed = False
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "reaped": 0}
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def _healthy(self, resource) -> bool:
+        if self._check is None:
+            return True
+        try:
+            return bool(await asyncio.wait_for(self._check(resource), self.check_timeout))
+        except Exception:
+            return False
+
+    async def _destroy(self, entry: _Entry):
+        try:
+            await self._close(entry.resource)
+        except Exception:
+            pass
+        async with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    async def _acquire(self) -> _Entry:
+        while True:
+            async with self._condition:
+                while True:
+                    if self.closed:
+                        raise PoolClosedError("MCP server pool is closed")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_sessions:
+                        self._size += 1
+                        entry = None
+                        break
+                    await self._condition.wait()
+
+            if entry is None:
+                try:
+                    resource = await self._create()
+                except BaseException:
+                    async with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                self.stats["created"] += 1
+                return _Entry(resource)
+
+            try:
+                healthy = await self._healthy(entry.resource)
+            except BaseException:
+                # Cancelled during the check: the session goes back to the pool
+                # (the next lease checks it again) instead of leaking its slot
+                await asyncio.shield(self._release(entry))
+                raise
+            if healthy:
+                self.stats["reused"] += 1
+                return entry
+            self.stats["discarded"] += 1
+            await self._destroy(entry)
+
+    async def _release(self, entry: _Entry):
+        entry.last_used = time.monotonic()
+        async with self._condition:
+            if not self.closed:
+                self._idle.append(entry)
+                self._condition.notify()
+                return
+        await self._destroy(entry)
+
+    @asynccontextmanager
+    async def lease(self):
+        if self._reaper is None and self.idle_timeout > 0:
+            self._reaper = asyncio.create_task(self._reap_periodically())
+        entry = await self._acquire()
+        try:
+            yield entry.resource
+        finally:
+            # A failed run may have left the session broken; the health check
+            # on the next lease decides whether it is reused.
+            await self._release(entry)
+
+    async def reap_idle(self) -> int:
+        deadline = time.monotonic() - self.idle_timeout
+        async with self._condition:
+            expired = [entry for entry in self._idle if entry.last_used <= deadline]
+            self._idle = [entry for entry in self._idle if entry.last_used > deadline]
+        for entry in expired:
+            await self._destroy(entry)
+        self.stats["reaped"] += len(expired)
+        return len(expired)
+
+    async def _reap_periodically(self):
+        while not self.closed:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1.0))
+            await self.reap_idle()
+
+    async def close(self):
+        async with self._condition:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for entry in idle:
+            await self._destroy(entry)
+
+
+class BackgroundServer:
+    """
+    Runs a pydantic_ai MCPServer (e.g. MCPServerStdio) inside its own task.
+    Entering the server in the task that serves a request would tie the Node
+    process to that request; here it stays up until stop() is called.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self._stop = None
+        self._task = None
+
+    async def start(self) -> "BackgroundServer":
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+
+        async def keep_running():
+            try:
+                async with self.server:
+                    ready.set_result(None)
+                    await self._stop.wait()
+            except BaseException as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                raise
+
+        self._task = asyncio.create_task(keep_running())
+        await ready
+        return self
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done() and self.server.is_running
+
+    async def ping(self) -> bool:
+        if not self.is_running:
+            return False
+        await self.server.list_tools()
+        return True
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await self._task
+        except BaseException:
+            pass
+        self._task = None
+
+
+# Sessions and subprocess pipes are bound to the loop they were created on,
+# so pools are kept per running event loop.
+_pools: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_server_pool(name: str, create, close, check=None, **options) -> ServerPool:
+    """
+    Returns the pool registered under name for the running event loop,
+    creating it on first use; options (max_sessions, ...) go to ServerPool.
+    """
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    pool = pools.get(name)
+    if pool is None or pool.closed:
+        pool = ServerPool(create, close, check=check, **options)
+        pools[name] = pool
+    return pool
+
+
+async def aclose_server_pools():
+    for pool in _pools.pop(asyncio.get_running_loop(), {}).values():
+        await pool.close()
@@ -0,0 +1,213 @@
+"""
+Cross-run cache for read-only Bright Data MCP tool calls, keyed by the tool
+name and its canonical (sorted, compact JSON) arguments, with a TTL per
+tool. An agent scraping the same page again after a failed JSON attempt, or
+a Streamlit user re-running a template, gets the stored result instead of
+waiting on Bright Data.
+
+Only tools with a TTL are cached, and Scraping Browser tools that change
+the page (navigate, click, type, ...) never are. Browser reads (get_text,
+get_html) are only cached while the session's page is exactly what
+scraping_browser_navigate loaded, keyed by that url; after a click or type
+they go to the server.
+
+ToolCacheMiddleware plugs the cache into an mcp_use MCPClient, and
+process_tool_call() into pydantic_ai's MCPServerStdio. Every call is
+recorded as an "mcp_tool" pipeline stage (observability/pipeline_metrics.py)
+with cache_hits and bytes; stats() adds hit rates and time saved per tool,
+which the process-wide cache also exports through /metrics and /health.
+"""
+import json
+import asyncio
+import os
+import time
+import hashlib
+import threading
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from mcp.types import CallToolResult
+from mcp_use.client.middleware import Middleware
+
+from observability.pipeline_metrics import pipeline_metrics, stage
+from tools.content_cache import parse_domain_ttls
+from tools.extraction_memo import InMemoryMemoBackend, MemoBackend, SQLiteMemoBackend
+
+# Seconds; tools not listed here are never cached
+DEFAULT_TOOL_TTLS = {
+    "search_engine": 900,
+    "scrape_as_markdown": 600,
+    "scrape_as_html": 600,
+    "scraping_browser_get_text": 300,
+    "scraping_browser_get_html": 300,
+}
+BROWSER_PREFIX = "scraping_browser_"
+BROWSER_READ_TOOLS = {"scraping_browser_get_text", "scraping_browser_get_html", "scraping_browser_links"}
+BROWSER_NAVIGATE_TOOL = "scraping_browser_navigate"
+
+
+def canonical_arguments(arguments: dict) -> str:
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _host(arguments: dict) -> str:
+    url = (arguments or {}).get("url")
+    return (urlparse(url).hostname or "") if isinstance(url, str) else ""
+
+
+class ToolResultCache:
+    def __init__(self, backend: MemoBackend = None, ttls: dict = None):
+        self.backend = backend or InMemoryMemoBackend()
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        self._pages = {}
+        self._tools = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        kind = os.getenv("MCP_TOOL_CACHE", "").lower()
+        ttls = {**DEFAULT_TOOL_TTLS, **parse_domain_ttls(os.getenv("MCP_TOOL_CACHE_TTLS", ""))}
+        if kind == "memory":
+            return cls(InMemoryMemoBackend(int(os.getenv("MCP_TOOL_CACHE_MAX_ENTRIES") or 1000)), ttls)
+        if kind == "sqlite":
+            path = os.getenv("MCP_TOOL_CACHE_PATH") or ".cache/mcp_tools.sqlite3"
+            return cls(SQLiteMemoBackend(path, table="tool_results"), ttls)
+        return None
+
+    def _count(self, tool: str, name: str, value: float = 1):
+        with self._lock:
+            counts = self._tools.setdefault(tool, {"hits": 0, "misses": 0, "bypassed": 0, "saved_seconds": 0.0})
+            counts[name] += value
+
+    def key(self, session, tool: str, arguments: dict) -> str:
+        """
+        Cache key of a call, or None when it must go to the server.
+        """
+        if self.ttls.get(tool, 0) <= 0:
+            return None
+        page = ""
+        if tool.startswith(BROWSER_PREFIX):
+            if tool not in BROWSER_READ_TOOLS:
+                return None
+            with self._lock:
+                page = self._pages.get(session)
+            if not page:
+                return None
+        data = f"{tool}\n{page}\n{canonical_arguments(arguments)}"
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, tool: str):
+        """
+        Returns (result, seconds the original call took), or None.
+        """
+        value = self.backend.get(key)
+        if value is not None:
+            entry = json.loads(value)
+            if time.time() - entry["stored_at"] <= self.ttls.get(tool, 0):
+                return entry["result"], entry["seconds"]
+        return None
+
+    def set(self, key: str, result, seconds: float):
+        self.backend.set(key, json.dumps({"stored_at": time.time(), "seconds": seconds, "result": result}))
+
+    def observe(self, session, tool: str, arguments: dict, ok: bool):
+        """
+        Tracks which page each browser session shows, so its reads can be
+        cached by url.
+        """
+        if not tool.startswith(BROWSER_PREFIX) or tool in BROWSER_READ_TOOLS:
+            return
+        url = (arguments or {}).get("url") if tool == BROWSER_NAVIGATE_TOOL and ok else None
+        with self._lock:
+            self._pages[session] = url
+
+    async def call(self, session, tool: str, arguments: dict, call_next, dump, load, is_error):
+        """
+        Runs call_next() through the cache; dump/load convert the result
+        to and from JSON-serializable data (dump returns None for results
+        that can't be stored).
+        """
+        with stage("mcp_tool", domain=_host(arguments), tool=tool) as current:
+            key = self.key(session, tool, arguments)
+            if key is None:
+                self._count(tool, "bypassed")
+            else:
+                # SQLite lookups would block the event loop
+                cached = await asyncio.to_thread(self.get, key, tool)
+                if cached is not None:
+                    data, seconds = cached
+                    current.add("cache_hits")
+                    self._count(tool, "hits")
+                    self._count(tool, "saved_seconds", seconds)
+                    return load(data)
+                self._count(tool, "misses")
+            started = time.perf_counter()
+            try:
+                result = await call_next()
+            except Exception:
+                self.observe(session, tool, arguments, ok=False)
+                raise
+            failed = is_error(result)
+            self.observe(session, tool, arguments, ok=not failed)
+            if key is not None and not failed:
+                data = dump(result)
+                if data is not None:
+                    current.add("bytes", len(json.dumps(data)))
+                    await asyncio.to_thread(self.set, key, data, time.perf_counter() - started)
+            return result
+
+    async def process_tool_call(self, ctx, call_tool, tool_name: str, arguments: dict):
+        """
+        pydantic_ai MCPServer process_tool_call hook. Failed calls raise
+        ModelRetry there, so every returned result is a success.
+        """
+        session = id(getattr(call_tool, "__self__", call_tool))
+        return await self.call(session, tool_name, arguments, lambda: call_tool(tool_name, arguments, None),
+                               dump=_dump_pydantic_result, load=lambda data: data, is_error=lambda result: False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {tool: dict(counts) for tool, counts in self._tools.items()}
+        hits = sum(counts["hits"] for counts in tools.values())
+        misses = sum(counts["misses"] for counts in tools.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "saved_seconds": round(sum(counts["saved_seconds"] for counts in tools.values()), 3),
+            "tools": tools,
+        }
+
+
+def _dump_pydantic_result(result):
+    # Text and JSON results only; images and other binary content aren't stored
+    if isinstance(result, (str, int, float, bool, dict)):
+        return result
+    if isinstance(result, list) and all(isinstance(part, (str, dict)) for part in result):
+        return result
+    return None
+
+
+class ToolCacheMiddleware(Middleware):
+    def __init__(self, cache: ToolResultCache):
+        self.cache = cache
+
+    async def on_call_tool(self, context, call_next):
+        params = context.params
+        return await self.cache.call(
+            context.connection_id, params.name, dict(params.arguments or {}), lambda: call_next(context),
+            dump=lambda result: result.model_dump(mode="json", by_alias=True),
+            load=CallToolResult.model_validate,
+            is_error=lambda result: bool(getattr(result, "isError", False)),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_tool_cache() -> ToolResultCache:
+    """
+    Process-wide cache configured by MCP_TOOL_CACHE, None when it is off.
+    """
+    cache = ToolResultCache.from_env()
+    if cache is not None:
+        pipeline_metrics.register("tool_cache", "tool", lambda: cache.stats()["tools"])
+    return cache
@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import asyncio
 import logfire
 from dotenv import load_dotenv
@@ -9,14 +10,17 @@ load_dotenv()
 one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
 sys.path.insert(0, one_levels_up)
 
-from mcp_agent.brightdata_mcp_agent import get_mcp_agent
+from mcp_agent.bdql_interpreter import BDQLRuntimeError, BDQLSyntaxError, BrightDataQLInterpreter
+from mcp_agent.browser_sessions import get_browser_sessions
+from mcp_agent.brightdata_mcp_agent import get_llm, get_mcp_agent
+from mcp_agent.server_pool import aclose_server_pools
 from observability import mcplogfire
+from tools.deadline import REQUEST_DEADLINE_SECONDS, bounded, deadline
 
 async def main():
   try:
     mcplogfire.init()
     max_steps = int(os.environ["MAX_MCP_AGENT_STEPS"])
-    agent = get_mcp_agent(max_steps)
 
     query = """
     BEGIN
@@ -38,11 +42,31 @@ async def main():
     END
     """
 
-    result = await agent.run(query)
-    print("Structured Output:\n", result)
+    # Run the script directly against the MCP tools; fall back to the agent
+    # when it isn't valid BrightDataQL or one of its steps fails. The browser
+    # is leased from the warm session pool, so with --repeat N only the first
+    # run starts one.
+    runs = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 1
+    try:
+      for _ in range(runs):
+        async with get_browser_sessions().lease("https://www.amazon.com") as browser:
+          try:
+            result = json.dumps(await BrightDataQLInterpreter(browser.client, llm=get_llm()).run(query), indent=2)
+          except (BDQLSyntaxError, BDQLRuntimeError) as e:
+            print(f"Falling back to the agent: {e}")
+            agent = get_mcp_agent(max_steps, browser.client)
+            # Initialized up front so run() leaves the pooled sessions open
+            await agent.initialize()
+            result = await agent.run(query)
+        print("Structured Output:\n", result)
+        print(f"Ran on a {browser.report()}")
+    finally:
+      await aclose_server_pools()
 
   except Exception as e:
     logfire.exception("Amazon Scraping Browser Agent execution failed", error=str(e))
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # One deadline for the whole run; calls still in flight when it expires are cancelled
+    with deadline(REQUEST_DEADLINE_SECONDS):
+        asyncio.run(bounded(main(), "the run"))
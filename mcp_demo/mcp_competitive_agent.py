@@ -9,56 +9,66 @@ load_dotenv()
 one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
 sys.path.insert(0, one_levels_up)
 
-from mcp_agent.brightdata_mcp_agent import get_mcp_agent
+from mcp_agent.brightdata_mcp_agent import astream_records, lease_mcp_agent, print_ndjson
+from mcp_agent.observation_compaction import observation_focus
+from mcp_agent.plan_cache import render, run_with_plan
+from mcp_agent.server_pool import aclose_server_pools
 from observability import mcplogfire
+from tools.deadline import REQUEST_DEADLINE_SECONDS, bounded, deadline
 
 async def main():
     try:
         mcplogfire.init()
         max_steps = int(os.environ["MAX_MCP_AGENT_STEPS"])
 
-        # Create MCP Agent
-        agent = get_mcp_agent(max_steps)
+        # Create MCP Agent on a warm Bright Data MCP server from the pool
+        async with lease_mcp_agent(max_steps) as agent:
+            url = "https://www.glossier.com/products/milky-jelly-cleanser"
 
-        url = "https://www.glossier.com/products/milky-jelly-cleanser"
-
-        schema = """
-        {
-            products[] {
-                name,
-                price,
-                size,
-                ingredients[],
-                reviews { average_rating, review_count },
-                promo { discount_percentage, bundle_offer, login_required },
-                availability
+            schema = """
+            {
+                products[] {
+                    name,
+                    price,
+                    size,
+                    ingredients[],
+                    reviews { average_rating, review_count },
+                    promo { discount_percentage, bundle_offer, login_required },
+                    availability
+                }
             }
-        }
-        """
+            """
 
-        prompt = f"""
-        You are a competitive intelligence agent.
+            # The url is filled in per run, so the plan cache can reuse the tool calls
+            template = f"""
+            You are a competitive intelligence agent.
 
-        Your task is to extract structured product data from {url}.
+            Your task is to extract structured product data from {{url}}.
 
-        Use the schema below to extract key data including promo offers, availability, and user sentiment.  
-        Simulate necessary interactions (e.g., consent clicks, page scrolling) and extract from JS-rendered sections if required.
+            Use the schema below to extract key data including promo offers, availability, and user sentiment.  
+            Simulate necessary interactions (e.g., consent clicks, page scrolling) and extract from JS-rendered sections if required.
 
-        Schema:
-        {schema}
+            Schema:
+            {schema}
 
-        Output strictly in JSON. Do not include explanations.
-        """
+            Output strictly in JSON. Do not include explanations.
+            """
 
-        # Run query
-        result = await agent.run(
-            prompt,
-            max_steps=max_steps,
-        )
-        print(f"\nResult: {result}")
+            # Run query; large pages reach the model as excerpts around the schema's fields
+            with observation_focus(schema):
+                if "--ndjson" in sys.argv:
+                    # Print each record as a JSON line as soon as the model completes it
+                    await print_ndjson(astream_records(agent, render(template, {"url": url}), max_steps))
+                else:
+                    result = await run_with_plan(agent, template, {"url": url}, max_steps=max_steps)
+                    print(f"\nResult: {result}")
 
     except Exception as e:
         logfire.exception("Competitive Agent execution failed", error=str(e))
+    finally:
+        await aclose_server_pools()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # One deadline for the whole run; calls still in flight when it expires are cancelled
+    with deadline(REQUEST_DEADLINE_SECONDS):
+        asyncio.run(bounded(main(), "the run"))
@@ -9,61 +9,71 @@ load_dotenv()
 one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
 sys.path.insert(0, one_levels_up)
 
-from mcp_agent.brightdata_mcp_agent import get_mcp_agent
+from mcp_agent.brightdata_mcp_agent import astream_records, lease_mcp_agent, print_ndjson
+from mcp_agent.observation_compaction import observation_focus
+from mcp_agent.plan_cache import render, run_with_plan
+from mcp_agent.server_pool import aclose_server_pools
 from observability import mcplogfire
+from tools.deadline import REQUEST_DEADLINE_SECONDS, bounded, deadline
 
 async def main():
     try:
         mcplogfire.init()
         max_steps = int(os.environ["MAX_MCP_AGENT_STEPS"])
 
-        # Create MCP Agent
-        agent = get_mcp_agent(max_steps)
+        # Create MCP Agent on a warm Bright Data MCP server from the pool
+        async with lease_mcp_agent(max_steps) as agent:
+            url = "https://www.zocdoc.com/primary-care-doctors"
 
-        url = "https://www.zocdoc.com/primary-care-doctors"
-
-        schema = """
-        {
-            providers[] {
-                name,
-                specialty,
-                rating,
-                review_count,
-                accepted_insurance[],
-                appointments[] {
-                    date,
-                    time,
-                    mode,
-                    location,
-                    availability_status
+            schema = """
+            {
+                providers[] {
+                    name,
+                    specialty,
+                    rating,
+                    review_count,
+                    accepted_insurance[],
+                    appointments[] {
+                        date,
+                        time,
+                        mode,
+                        location,
+                        availability_status
+                    }
                 }
             }
-        }
-        """
+            """
 
-        prompt = f"""
-        You are a healthcare data extractor bot.
+            # The url is filled in per run, so the plan cache can reuse the tool calls
+            template = f"""
+            You are a healthcare data extractor bot.
 
-        Your task is to extract structured provider information and real-time appointment availability from this page:  
-        {url}
+            Your task is to extract structured provider information and real-time appointment availability from this page:  
+            {{url}}
 
-        Use the schema below to return information on primary care providers available in New York City.  
-        Simulate required interactions like location filters, next-week calendar navigation, and selecting virtual visits.
+            Use the schema below to return information on primary care providers available in New York City.  
+            Simulate required interactions like location filters, next-week calendar navigation, and selecting virtual visits.
 
-        Schema:
-        {schema}
+            Schema:
+            {schema}
 
-        Output in JSON format only.
-        """
+            Output in JSON format only.
+            """
 
-        # Run query
-        result = await agent.run(
-            prompt,
-            max_steps=max_steps,
-        )
-        print(f"\nResult: {result}")
+            # Run query; large pages reach the model as excerpts around the schema's fields
+            with observation_focus(schema):
+                if "--ndjson" in sys.argv:
+                    # Print each record as a JSON line as soon as the model completes it
+                    await print_ndjson(astream_records(agent, render(template, {"url": url}), max_steps))
+                else:
+                    result = await run_with_plan(agent, template, {"url": url}, max_steps=max_steps)
+                    print(f"\nResult: {result}")
     except Exception as e:
         logfire.exception("Healthcare Agent execution failed", error=str(e))
+    finally:
+        await aclose_server_pools()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # One deadline for the whole run; calls still in flight when it expires are cancelled
+    with deadline(REQUEST_DEADLINE_SECONDS):
+        asyncio.run(bounded(main(), "the run"))
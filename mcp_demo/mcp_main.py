@@ -9,43 +9,53 @@ load_dotenv()
 one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
 sys.path.insert(0, one_levels_up)
 
-from mcp_agent.brightdata_mcp_agent import get_mcp_agent
+from mcp_agent.brightdata_mcp_agent import astream_records, lease_mcp_agent, print_ndjson
+from mcp_agent.server_pool import aclose_server_pools
 from observability import mcplogfire
+from tools.deadline import REQUEST_DEADLINE_SECONDS, bounded, deadline
 
 async def main():
     try:
         mcplogfire.init()
         max_steps = int(os.environ["MAX_MCP_AGENT_STEPS"])
 
-        # Create MCP Agent
-        agent = get_mcp_agent(max_steps)
-
-        url = "https://www.google.com/maps/search/boba+tea/@37.4400289,-122.1653309,14z/data=!3m1!4b1?entry=ttu&g_ep=EgoyMDI1MDIxMS4wIKXMDSoASAFQAw%3D%3D"
-
-        schema = """
-        {
-            listings[] {
-                name
-                rating(in stars)
-                description(if not available, use "n/a")
-                order_link(if not available, use "n/a")
-                take_out_link(if not available, use "n/a")
-                address
-                hours
+        # Create MCP Agent on a warm Bright Data MCP server from the pool
+        async with lease_mcp_agent(max_steps) as agent:
+            url = "https://www.google.com/maps/search/boba+tea/@37.4400289,-122.1653309,14z/data=!3m1!4b1?entry=ttu&g_ep=EgoyMDI1MDIxMS4wIKXMDSoASAFQAw%3D%3D"
+
+            schema = """
+            {
+                listings[] {
+                    name
+                    rating(in stars)
+                    description(if not available, use "n/a")
+                    order_link(if not available, use "n/a")
+                    take_out_link(if not available, use "n/a")
+                    address
+                    hours
+                }
             }
-        }
-        """
-
-        to_format = 'markdown'
-
-        # Run query
-        result = await agent.run(
-            f"Scrape the provided {url} in {to_format} format and output the response in the following format {schema}. Make sure to integrate until you got a valid fully formatted JSON response.",
-            max_steps=max_steps,
-        )
-        print(f"\nResult: {result}")
+            """
+
+            to_format = 'markdown'
+
+            # Run query
+            prompt = f"Scrape the provided {url} in {to_format} format and output the response in the following format {schema}. Make sure to integrate until you got a valid fully formatted JSON response."
+            if "--ndjson" in sys.argv:
+                # Print each record as a JSON line as soon as the model completes it
+                await print_ndjson(astream_records(agent, prompt, max_steps))
+            else:
+                result = await agent.run(
+                    prompt,
+                    max_steps=max_steps,
+                )
+                print(f"\nResult: {result}")
     except Exception as e:
         logfire.exception("MCP Main Agent execution failed", error=str(e))
+    finally:
+        await aclose_server_pools()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # One deadline for the whole run; calls still in flight when it expires are cancelled
+    with deadline(REQUEST_DEADLINE_SECONDS):
+        asyncio.run(bounded(main(), "the run"))
@@ -9,86 +9,96 @@ load_dotenv()
 one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
 sys.path.insert(0, one_levels_up)
 
-from mcp_agent.brightdata_mcp_agent import get_mcp_agent
+from mcp_agent.brightdata_mcp_agent import astream_records, lease_mcp_agent, print_ndjson
+from mcp_agent.observation_compaction import observation_focus
+from mcp_agent.plan_cache import render, run_with_plan
+from mcp_agent.server_pool import aclose_server_pools
 from observability import mcplogfire
+from tools.deadline import REQUEST_DEADLINE_SECONDS, bounded, deadline
 
 async def main():
     try:
         mcplogfire.init()
         max_steps = int(os.environ["MAX_MCP_AGENT_STEPS"])
 
-        # Create MCP Agent
-        agent = get_mcp_agent(max_steps)
-
-        url = "https://www.zillow.com/homes/for_sale/San-Francisco_rb/"
-
-        schema = """
-        {
-            listings[] {
-                price,
-                address,
-                bedrooms,
-                bathrooms,
-                area_sqft,
-                status,
-                days_on_market,
-                listing_agent {
-                name,
-                phone,
-                agency
-                },
-                property_url,
-                price_history[] {
-                date,
-                event,
-                price
+        # Create MCP Agent on a warm Bright Data MCP server from the pool
+        async with lease_mcp_agent(max_steps) as agent:
+            url = "https://www.zillow.com/homes/for_sale/San-Francisco_rb/"
+
+            schema = """
+            {
+                listings[] {
+                    price,
+                    address,
+                    bedrooms,
+                    bathrooms,
+                    area_sqft,
+                    status,
+                    days_on_market,
+                    listing_agent {
+                    name,
+                    phone,
+                    agency
+                    },
+                    property_url,
+                    price_history[] {
+                    date,
+                    event,
+                    price
+                    }
                 }
             }
-        }
-        """
+            """
 
-        prompt = f"""
-        You are a real estate property data extractor.
+            # The url is filled in per run, so the plan cache can reuse the tool calls
+            template = f"""
+            You are a real estate property data extractor.
 
-        You will be given an url {url} of a real estate search results page (e.g., Zillow, Redfin, Realtor.com). These websites often use React-based rendering and do not associate labels and input fields clearly.
+            You will be given an url {{url}} of a real estate search results page (e.g., Zillow, Redfin, Realtor.com). These websites often use React-based rendering and do not associate labels and input fields clearly.
 
-        Your mission is to extract structured listing data using the schema below. Do **not rely solely on CSS selectors**. If standard element-based targeting fails, fallback to:
+            Your mission is to extract structured listing data using the schema below. Do **not rely solely on CSS selectors**. If standard element-based targeting fails, fallback to:
 
-        - XPath expressions
-        - Nearby text-based anchors
-        - Semantic matching of content blocks
+            - XPath expressions
+            - Nearby text-based anchors
+            - Semantic matching of content blocks
 
-        You should **not stop** if perfect structure is not found—try alternate methods (including inferred DOM structure or visual position). Use approximate matches and explain where assumptions were made.
+            You should **not stop** if perfect structure is not found—try alternate methods (including inferred DOM structure or visual position). Use approximate matches and explain where assumptions were made.
 
-        Do not depend on labels being directly linked to inputs.
+            Do not depend on labels being directly linked to inputs.
 
-        ### Sample HTML context:
-        - Listings are inside cards or tiles
-        - Prices, bedrooms, and area are shown visibly
-        - Agent/contact info may be in a footer or modal
+            ### Sample HTML context:
+            - Listings are inside cards or tiles
+            - Prices, bedrooms, and area are shown visibly
+            - Agent/contact info may be in a footer or modal
 
-        ---
-        ### SCHEMA:
-        {schema}
-        ---
+            ---
+            ### SCHEMA:
+            {schema}
+            ---
 
-        Your response should be ONLY the extracted data in JSON format.
+            Your response should be ONLY the extracted data in JSON format.
 
-        Ignore boilerplate HTML like header, navbar, cookie notices, etc.
+            Ignore boilerplate HTML like header, navbar, cookie notices, etc.
 
-        If some fields like price history or phone numbers are not found, use `"n/a"`.
+            If some fields like price history or phone numbers are not found, use `"n/a"`.
 
-        Output only in JSON format.
-        """
+            Output only in JSON format.
+            """
 
-        # Run query
-        result = await agent.run(
-            prompt,
-            max_steps=max_steps,
-        )
-        print(f"\nResult: {result}")
+            # Run query; large pages reach the model as excerpts around the schema's fields
+            with observation_focus(schema):
+                if "--ndjson" in sys.argv:
+                    # Print each record as a JSON line as soon as the model completes it
+                    await print_ndjson(astream_records(agent, render(template, {"url": url}), max_steps))
+                else:
+                    result = await run_with_plan(agent, template, {"url": url}, max_steps=max_steps)
+                    print(f"\nResult: {result}")
     except Exception as e:
         logfire.exception("Realestate Agent execution failed", error=str(e))
+    finally:
+        await aclose_server_pools()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # One deadline for the whole run; calls still in flight when it expires are cancelled
+    with deadline(REQUEST_DEADLINE_SECONDS):
+        asyncio.run(bounded(main(), "the run"))
@@ -1,10 +1,9 @@
-import os
-import logfire
+from observability.pipeline_metrics import PIPELINE_METRICS_PORT, start_metrics_server
+from observability.telemetry import configure_logfire
 
 def init():
-    token = os.environ["LOGFIRE_TOKEN"]
-    if token != "":
-        logfire.configure(pydantic_plugin=logfire.PydanticPlugin(record='all'),
-            token=token)
-        #logfire.instrument_pydantic()
-        logfire.instrument_httpx(capture_all=True)
\ No newline at end of file
+    # The Prometheus endpoint doesn't need Logfire, so it starts first
+    if PIPELINE_METRICS_PORT:
+        start_metrics_server()
+    # Sampling, body capture and redaction follow TELEMETRY_* (see observability/telemetry.py)
+    configure_logfire()
@@ -0,0 +1,301 @@
+"""
+Per-stage spans and metrics for the extraction pipeline: fetch,
+preprocess, prompt, llm and parse.
+
+Every stage opens an OpenTelemetry span (exported to Logfire once
+mcplogfire.init() has configured it, a no-op otherwise) and is aggregated
+in-process per stage, domain and schema, so the numbers are also available
+without a Logfire token through a Prometheus/OpenMetrics text endpoint:
+
+    PIPELINE_METRICS_PORT=9464 -> http://127.0.0.1:9464/metrics
+"""
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from opentelemetry import metrics, trace
+from opentelemetry.trace import Status, StatusCode
+
+from tools.deadline import DeadlineExceeded, remaining
+
+PIPELINE_METRICS_HOST = os.getenv("PIPELINE_METRICS_HOST", "127.0.0.1")
+PIPELINE_METRICS_PORT = int(os.getenv("PIPELINE_METRICS_PORT") or 0)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Counters a stage can add to, with their help text
+COUNTERS = {
+    "bytes": "Bytes fetched from Bright Data or produced by a stage",
+    "prompt_tokens": "Prompt tokens sent to the model",
+    "completion_tokens": "Completion tokens returned by the model",
+    "cache_hits": "Results served from a cache, memo or recipe instead of upstream",
+    "retries": "Retried upstream attempts",
+    "errors": "Stages that raised",
+    "deadline_exceeded": "Stages stopped by their request's deadline",
+}
+LABELS = ("stage", "domain", "schema")
+
+_tracer = trace.get_tracer("brightdataql.pipeline")
+_meter = metrics.get_meter("brightdataql.pipeline")
+_otel_duration = _meter.create_histogram("brightdataql.stage.duration", unit="s",
+                                         description="Extraction pipeline stage duration")
+_otel_counters = {name: _meter.create_counter(f"brightdataql.{name}", description=text)
+                  for name, text in COUNTERS.items()}
+_labels = ContextVar("pipeline_labels", default={})
+
+
+@lru_cache(maxsize=1024)
+def schema_label(schema: str) -> str:
+    """
+    Short stable label for a schema, ignoring whitespace differences.
+    """
+    return hashlib.sha1(" ".join(schema.split()).encode("utf-8")).hexdigest()[:8]
+
+
+@contextmanager
+def pipeline_labels(domain: str = None, schema: str = None):
+    """
+    Sets the domain and schema labels for every stage opened inside, e.g.
+    the LLM calls made for one url.
+    """
+    labels = dict(_labels.get())
+    if domain:
+        labels["domain"] = domain
+    if schema:
+        labels["schema"] = schema_label(schema)
+    token = _labels.set(labels)
+    try:
+        yield
+    finally:
+        try:
+            _labels.reset(token)
+        except ValueError:
+            # An async generator finalized from another task, e.g. on loop shutdown
+            pass
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.sum += value
+
+
+class PipelineMetrics:
+    """
+    In-process aggregation of stage durations and counters keyed by
+    (stage, domain, schema).
+    """
+
+    def __init__(self):
+        self._durations = {}
+        self._counters = {name: {} for name in COUNTERS}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, label: str, collect):
+        """
+        Adds counters kept elsewhere, e.g. by a cache: collect() returns
+        {label value: {counter: value}} and is exported as
+        brightdataql_<name>_<counter>_total{<label>="..."}. Registering a
+        name again replaces it.
+        """
+        with self._lock:
+            self._collectors[name] = (label, collect)
+
+    def collected(self) -> dict:
+        with self._lock:
+            collectors = dict(self._collectors)
+        return {name: collect() for name, (_, collect) in collectors.items()}
+
+    def record(self, key: tuple, duration: float, counts: dict):
+        with self._lock:
+            histogram = self._durations.get(key)
+            if histogram is None:
+                histogram = self._durations[key] = _Histogram()
+            histogram.observe(duration)
+            for name, value in counts.items():
+                series = self._counters[name]
+                series[key] = series.get(key, 0) + value
+
+    def snapshot(self) -> dict:
+        """
+        Count, total and mean seconds plus counters per stage, summed over
+        domains and schemas.
+        """
+        with self._lock:
+            stages = {}
+            for (stage, _, _), histogram in self._durations.items():
+                summary = stages.setdefault(stage, {"count": 0, "seconds": 0.0})
+                summary["count"] += histogram.count
+                summary["seconds"] += histogram.sum
+            for name, series in self._counters.items():
+                for (stage, _, _), value in series.items():
+                    summary = stages.setdefault(stage, {"count": 0, "seconds": 0.0})
+                    summary[name] = summary.get(name, 0) + value
+        for summary in stages.values():
+            summary["mean_seconds"] = summary["seconds"] / summary["count"] if summary["count"] else 0.0
+        return stages
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            durations = {key: (list(h.buckets), h.count, h.sum) for key, h in self._durations.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+        lines = ["# HELP brightdataql_stage_duration_seconds Extraction pipeline stage duration",
+                 "# TYPE brightdataql_stage_duration_seconds histogram"]
+        for key, (buckets, count, total) in sorted(durations.items()):
+            labels = _format_labels(key)
+            cumulative = 0
+            for bound, value in zip(DURATION_BUCKETS + ("+Inf",), buckets):
+                cumulative += value
+                lines.append(f'brightdataql_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"brightdataql_stage_duration_seconds_count{{{labels}}} {count}")
+            lines.append(f"brightdataql_stage_duration_seconds_sum{{{labels}}} {total}")
+        for name, series in counters.items():
+            metric = f"brightdataql_{name}_total"
+            lines.append(f"# HELP {metric} {COUNTERS[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric}{{{_format_labels(key)}}} {value}")
+        with self._lock:
+            collectors = dict(self._collectors)
+        for name, (label, collect) in sorted(collectors.items()):
+            series = {}
+            for value, counts in collect().items():
+                for counter, count in counts.items():
+                    series.setdefault(counter, []).append((value, count))
+            for counter, values in sorted(series.items()):
+                metric = f"brightdataql_{name}_{counter}_total"
+                lines.append(f"# HELP {metric} {name.replace('_', ' ').capitalize()} {counter.replace('_', ' ')} per {label}")
+                lines.append(f"# TYPE {metric} counter")
+                for value, count in sorted(values):
+                    lines.append(f'{metric}{{{label}="{_escape(value)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            for series in self._counters.values():
+                series.clear()
+
+
+def _format_labels(key: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(LABELS, key))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+pipeline_metrics = PipelineMetrics()
+
+
+class Stage:
+    def __init__(self, name: str, key: tuple, span):
+        self.name = name
+        self.key = key
+        self.span = span
+        self.counts = {}
+
+    def add(self, counter: str, value: int = 1):
+        self.counts[counter] = self.counts.get(counter, 0) + value
+
+    def set(self, **attributes):
+        for name, value in attributes.items():
+            if value is not None:
+                self.span.set_attribute(f"brightdataql.{name}", value)
+
+    def on_retry(self, attempt: int, error: Exception):
+        self.add("retries")
+        self.span.add_event("retry", {"attempt": attempt, "error": type(error).__name__})
+
+
+@contextmanager
+def stage(name: str, domain: str = None, schema: str = None, attach: bool = True, **attributes):
+    """
+    Times one pipeline stage and yields a Stage to add counters (bytes,
+    prompt_tokens, ...) and span attributes to. Labels not given come from
+    the enclosing pipeline_labels(). Pass attach=False around yields in a
+    generator, so the span doesn't become the parent of the caller's spans.
+    """
+    labels = _labels.get()
+    key = (name, domain or labels.get("domain", ""),
+           schema_label(schema) if schema else labels.get("schema", ""))
+    span = _tracer.start_span(f"brightdataql.{name}", attributes={
+        "brightdataql.stage": name, "brightdataql.domain": key[1], "brightdataql.schema": key[2]})
+    current = Stage(name, key, span)
+    current.set(**attributes)
+    left = remaining()
+    if left is not None:
+        current.set(deadline_remaining_seconds=round(left, 3))
+    started = time.perf_counter()
+    try:
+        if attach:
+            with trace.use_span(span, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+                yield current
+        else:
+            yield current
+    except Exception as e:
+        current.add("errors")
+        if isinstance(e, DeadlineExceeded):
+            current.add("deadline_exceeded")
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        otel_labels = dict(zip(LABELS, key))
+        _otel_duration.record(duration, otel_labels)
+        for counter, value in current.counts.items():
+            _otel_counters[counter].add(value, otel_labels)
+            span.set_attribute(f"brightdataql.{counter}", value)
+        pipeline_metrics.record(key, duration, current.counts)
+        span.end()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = pipeline_metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None, host: str = None) -> ThreadingHTTPServer:
+    """
+    Serves /metrics in the Prometheus text format from a daemon thread.
+    Idempotent; port defaults to PIPELINE_METRICS_PORT.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host or PIPELINE_METRICS_HOST, port or PIPELINE_METRICS_PORT),
+                                          _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="pipeline-metrics", daemon=True).start()
+        return _server
@@ -0,0 +1,222 @@
+"""
+Telemetry settings shared by mcplogfire.init() and the Streamlit app.
+
+TELEMETRY_MODE picks how much is recorded:
+
+    off      nothing is instrumented
+    sampled  (default) httpx spans without headers or bodies, pydantic
+             validation failures only and no prompt/completion content.
+             Traces with an error or slower than TELEMETRY_SLOW_TRACE_SECONDS
+             are always kept, with truncated bodies for failed requests; of
+             the rest only TELEMETRY_BACKGROUND_RATE is kept.
+    full     every trace with headers, bodies, prompts and pydantic
+             validations, as before, but bodies truncated to
+             TELEMETRY_MAX_BODY_BYTES
+
+TELEMETRY_HEAD_SAMPLE_RATE drops a fraction of traces up front in both
+modes. Known secrets (API tokens from the environment, bearer tokens) and
+TELEMETRY_REDACT_PATTERNS are redacted from captured bodies, headers and
+request urls.
+"""
+import os
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import logfire
+
+MODES = ("off", "sampled", "full")
+# Environment variables whose values never appear in captured telemetry
+SECRET_ENV_VARS = ("BRIGHT_DATA_API_TOKEN", "GEMINI_API_KEY", "GOOGLE_API_KEY", "BROWSER_AUTH", "LOGFIRE_TOKEN")
+# Matched case-insensitively, like TELEMETRY_REDACT_PATTERNS
+_BUILTIN_PATTERNS = (r"bearer\s+[\w.\-~+/=]+", r"(api[_-]?key|token|password)(\"?\s*[:=]\s*\"?)[^\s\"&,}]+")
+_REDACTED_HEADERS = {"authorization", "proxy-authorization", "cookie", "set-cookie", "x-goog-api-key"}
+# Query parameters whose values are credentials, e.g. Gemini's ?key=
+_SECRET_PARAMS = re.compile(r"^(?:key|api[_-]?key|.*token|password|secret|signature|sig|auth)$", re.IGNORECASE)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name, "")
+    return float(value) if value.strip() else default
+
+
+@dataclass(frozen=True)
+class TelemetryConfig:
+    mode: str = "sampled"
+    head_sample_rate: float = 1.0
+    slow_trace_seconds: float = 5.0
+    background_rate: float = 0.1
+    max_body_bytes: int = 2048
+    max_attribute_length: int = 8192
+    redact_patterns: tuple = ()
+
+    @classmethod
+    def from_env(cls) -> "TelemetryConfig":
+        mode = os.getenv("TELEMETRY_MODE", "sampled").lower()
+        if mode not in MODES:
+            raise ValueError(f"TELEMETRY_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+        defaults = cls()
+        patterns = os.getenv("TELEMETRY_REDACT_PATTERNS", "")
+        return cls(
+            mode=mode,
+            head_sample_rate=_env_float("TELEMETRY_HEAD_SAMPLE_RATE", defaults.head_sample_rate),
+            slow_trace_seconds=_env_float("TELEMETRY_SLOW_TRACE_SECONDS", defaults.slow_trace_seconds),
+            background_rate=_env_float("TELEMETRY_BACKGROUND_RATE", defaults.background_rate),
+            max_body_bytes=int(_env_float("TELEMETRY_MAX_BODY_BYTES", defaults.max_body_bytes)),
+            max_attribute_length=int(_env_float("TELEMETRY_MAX_ATTRIBUTE_LENGTH", defaults.max_attribute_length)),
+            redact_patterns=tuple(pattern.strip() for pattern in patterns.split(",") if pattern.strip()),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def full(self) -> bool:
+        return self.mode == "full"
+
+    def sampling(self) -> logfire.SamplingOptions:
+        if self.full:
+            return logfire.SamplingOptions(head=self.head_sample_rate)
+        return logfire.SamplingOptions.level_or_duration(
+            head=self.head_sample_rate,
+            duration_threshold=self.slow_trace_seconds,
+            background_rate=self.background_rate,
+        )
+
+    def instrumentation_settings(self):
+        """
+        pydantic_ai Agent instrumentation; prompts and completions are only
+        recorded in full mode.
+        """
+        from pydantic_ai.models.instrumented import InstrumentationSettings
+        return InstrumentationSettings(include_content=self.full, include_binary_content=False)
+
+
+class Redactor:
+    def __init__(self, config: TelemetryConfig):
+        secrets = [os.getenv(name, "") for name in SECRET_ENV_VARS]
+        patterns = [re.escape(secret) for secret in secrets if len(secret) >= 6]
+        patterns += list(_BUILTIN_PATTERNS) + list(config.redact_patterns)
+        self._pattern = re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+        self.max_body_bytes = config.max_body_bytes
+
+    def redact(self, text: str) -> str:
+        return self._pattern.sub("[REDACTED]", text)
+
+    def body(self, content: bytes, encoding: str = None) -> str:
+        """
+        Decodes at most max_body_bytes of content, so a large page costs the
+        same as a small one.
+        """
+        text = content[:self.max_body_bytes].decode(encoding or "utf-8", errors="replace")
+        if len(content) > self.max_body_bytes:
+            text += f"... [truncated {len(content) - self.max_body_bytes} bytes]"
+        return self.redact(text)
+
+    def url(self, url: str) -> str:
+        """
+        The url with credential query parameters and known secrets redacted.
+        """
+        parts = urlsplit(url)
+        query = [(name, "[REDACTED]" if _SECRET_PARAMS.match(name) else self.redact(value))
+                 for name, value in parse_qsl(parts.query, keep_blank_values=True)]
+        return urlunsplit(parts._replace(netloc=self.redact(parts.netloc), path=self.redact(parts.path),
+                                         query=urlencode(query, safe="[]")))
+
+    def headers(self, headers) -> dict:
+        return {name: "[REDACTED]" if name.lower() in _REDACTED_HEADERS else self.redact(value)
+                for name, value in headers.items()}
+
+
+def _httpx_hooks(config: TelemetryConfig, redactor: Redactor):
+    """
+    Request/response hooks capturing truncated, redacted headers and bodies
+    for every request in full mode and only for failed ones (status >= 400)
+    in sampled mode. The span's url is redacted in both modes; Logfire's
+    scrubbing leaves http.url alone.
+    """
+
+    def capture_request(span, request):
+        span.set_attributes({f"http.request.header.{name}": value
+                             for name, value in redactor.headers(request.headers).items()})
+        # Streaming bodies can only be read once, so they are skipped
+        if isinstance(request.stream, httpx.ByteStream):
+            content = b"".join(request.stream)
+            if content:
+                span.set_attribute("http.request.body.text", redactor.body(content))
+
+    def capture_response(span, response):
+        span.set_attributes({f"http.response.header.{name}": value
+                             for name, value in redactor.headers(response.headers).items()})
+
+        def read(body_span):
+            body = response.response.content
+            body_span.set_attribute("http.response.body.text", redactor.body(body, response.response.encoding))
+
+        response.on_response_read(read)
+
+    def request_hook(span, request):
+        span.set_attribute("http.url", redactor.url(str(request.url)))
+        if config.full:
+            capture_request(span, request)
+
+    def response_hook(span, request, response):
+        failed = response.status_code >= 400
+        if failed and not config.full:
+            capture_request(span, request)
+        if failed or config.full:
+            capture_response(span, response)
+
+    async def async_request_hook(span, request):
+        request_hook(span, request)
+
+    async def async_response_hook(span, request, response):
+        response_hook(span, request, response)
+
+    return request_hook, response_hook, async_request_hook, async_response_hook
+
+
+def configure_logfire(token: str = None, config: TelemetryConfig = None, **kwargs) -> bool:
+    """
+    Configures Logfire according to config (TELEMETRY_* env vars by
+    default) and instruments httpx and pydantic. Returns False without
+    configuring anything when the mode is off or there is no token.
+    """
+    config = config or TelemetryConfig.from_env()
+    token = token if token is not None else os.getenv("LOGFIRE_TOKEN", "")
+    if not config.enabled or not (token or kwargs.get("send_to_logfire") is False):
+        return False
+    # Caps every span attribute (prompts, large tool results) in the SDK
+    # tracer provider Logfire creates
+    os.environ.setdefault("OTEL_ATTRIBUTE_VALUE_LENGTH_LIMIT", str(config.max_attribute_length))
+    redactor = Redactor(config)
+    if not config.full:
+        # Baggage attributes are set when tail-sampled spans are replayed,
+        # after they ended, which only produces warnings
+        kwargs.setdefault("add_baggage_to_attributes", False)
+    logfire.configure(
+        token=token or None,
+        sampling=config.sampling(),
+        scrubbing=logfire.ScrubbingOptions(extra_patterns=list(config.redact_patterns) or None),
+        **kwargs,
+    )
+    logfire.instrument_pydantic(record="all" if config.full else "failure")
+    request_hook, response_hook, async_request_hook, async_response_hook = _httpx_hooks(config, redactor)
+    logfire.instrument_httpx(request_hook=request_hook, response_hook=response_hook,
+                             async_request_hook=async_request_hook, async_response_hook=async_response_hook)
+    return True
+
+
+def tracer_provider(config: TelemetryConfig = None):
+    """
+    An OpenTelemetry SDK tracer provider with the configured head sampling
+    and attribute length limit, for exporters set up outside Logfire.
+    """
+    from opentelemetry.sdk.trace import SpanLimits, TracerProvider
+    from opentelemetry.sdk.trace.sampling import ParentBasedTraceIdRatio
+
+    config = config or TelemetryConfig.from_env()
+    return TracerProvider(sampler=ParentBasedTraceIdRatio(config.head_sample_rate),
+                          span_limits=SpanLimits(max_attribute_length=config.max_attribute_length))
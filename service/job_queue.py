@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+EXPIRED = "expired"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, EXPIRED)
+
+# Seconds a claimed job stays owned by its process without a heartbeat
+SERVICE_JOB_LEASE_SECONDS = float(os.getenv("SERVICE_JOB_LEASE_SECONDS") or 60)
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: dict
+    status: str = QUEUED
+    created: float = 0.0
+    deadline: float = None
+    started: float = None
+    finished: float = None
+    error: str = None
+    record_count: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class JobQueue(ABC):
+    """
+    Bounded FIFO of extraction jobs and the records they produce. submit()
+    raises QueueFullError once max_queued jobs are waiting, which the server
+    reports as 429 so clients back off instead of piling up work.
+    """
+
+    # Seconds between heartbeat() calls for queues shared between processes
+    heartbeat_interval = None
+
+    def __init__(self, max_queued: int = 100):
+        self.max_queued = max_queued
+
+    @staticmethod
+    def _new_job(kind: str, payload: dict, timeout: float = None) -> Job:
+        now = time.time()
+        return Job(id=uuid.uuid4().hex, kind=kind, payload=payload, created=now,
+                   deadline=now + timeout if timeout else None)
+
+    @abstractmethod
+    def submit(self, kind: str, payload: dict, timeout: float = None) -> Job:
+        ...
+
+    @abstractmethod
+    def claim(self):
+        """
+        Marks the oldest queued job as running and returns it, or None.
+        """
+
+    @abstractmethod
+    def add_record(self, job_id: str, path: str, record):
+        ...
+
+    @abstractmethod
+    def finish(self, job_id: str, status: str, error: str = None):
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str):
+        ...
+
+    @abstractmethod
+    def records(self, job_id: str, start: int = 0) -> list:
+        """
+        Returns the (path, record) pairs of a job from index start on.
+        """
+
+    @abstractmethod
+    def depth(self) -> int:
+        ...
+
+    def heartbeat(self):
+        """
+        Extends the leases of the jobs this queue has claimed.
+        """
+
+
+class InMemoryJobQueue(JobQueue):
+    def __init__(self, max_queued: int = 100, max_finished: int = 1000):
+        super().__init__(max_queued)
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._queued = OrderedDict()
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, payload: dict, timeout: float = None) -> Job:
+        with self._lock:
+            if len(self._queued) >= self.max_queued:
+                raise QueueFullError(f"{len(self._queued)} jobs already queued")
+            job = self._new_job(kind, payload, timeout)
+            self._jobs[job.id] = job
+            self._queued[job.id] = job
+            self._records[job.id] = []
+            return job
+
+    def claim(self):
+        with self._lock:
+            if not self._queued:
+                return None
+            _, job = self._queued.popitem(last=False)
+            job.status = RUNNING
+            job.started = time.time()
+            return job
+
+    def add_record(self, job_id: str, path: str, record):
+        with self._lock:
+            self._records[job_id].append((path, record))
+            self._jobs[job_id].record_count += 1
+
+    def finish(self, job_id: str, status: str, error: str = None):
+        with self._lock:
+            job = self._jobs[job_id]
+            self._queued.pop(job_id, None)
+            job.status = status
+            job.error = error
+            job.finished = time.time()
+            finished = [key for key, value in self._jobs.items() if value.done]
+            for key in finished[:max(len(finished) - self.max_finished, 0)]:
+                del self._jobs[key]
+                del self._records[key]
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def records(self, job_id: str, start: int = 0) -> list:
+        with self._lock:
+            return list(self._records.get(job_id, [])[start:])
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._queued)
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Job queue persisted in a local SQLite file, which several processes may
+    share. A claimed job is leased to its process for lease_seconds and kept
+    by heartbeat(); a job whose lease ran out (its process died) is put back
+    in the queue by the next claim().
+    """
+
+    def __init__(self, path: str, max_queued: int = 100, lease_seconds: float = None):
+        super().__init__(max_queued)
+        self.path = path
+        self.owner = uuid.uuid4().hex
+        self.lease_seconds = lease_seconds or SERVICE_JOB_LEASE_SECONDS
+        self.heartbeat_interval = self.lease_seconds / 3
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+                "status TEXT NOT NULL, created REAL NOT NULL, deadline REAL, started REAL, finished REAL, "
+                "error TEXT, record_count INTEGER NOT NULL DEFAULT 0, owner TEXT, lease_expires REAL)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("owner TEXT", "lease_expires REAL"):
+                if column.split()[0] not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_records (job_id TEXT NOT NULL, seq INTEGER NOT NULL, "
+                "path TEXT NOT NULL, record TEXT NOT NULL, PRIMARY KEY (job_id, seq))"
+            )
+
+    @staticmethod
+    def _job(row) -> Job:
+        return Job(id=row[0], kind=row[1], payload=json.loads(row[2]), status=row[3], created=row[4],
+                   deadline=row[5], started=row[6], finished=row[7], error=row[8], record_count=row[9])
+
+    def submit(self, kind: str, payload: dict, timeout: float = None) -> Job:
+        with self._lock, self._conn:
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFullError(f"{queued} jobs already queued")
+            job = self._new_job(kind, payload, timeout)
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created, deadline) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.kind, json.dumps(job.payload), job.status, job.created, job.deadline),
+            )
+            return job
+
+    def claim(self):
+        with self._lock, self._conn:
+            now = time.time()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started = NULL, owner = NULL, lease_expires = NULL "
+                "WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?)", (QUEUED, RUNNING, now)
+            )
+            while True:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                # Another process may claim the same row between the two statements
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = ?, started = ?, owner = ?, lease_expires = ? WHERE id = ? AND status = ?",
+                    (RUNNING, now, self.owner, now + self.lease_seconds, row[0], QUEUED),
+                ).rowcount
+                if claimed:
+                    job = self._job(row)
+                    job.status = RUNNING
+                    job.started = now
+                    return job
+
+    def heartbeat(self):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET lease_expires = ? WHERE status = ? AND owner = ?",
+                               (time.time() + self.lease_seconds, RUNNING, self.owner))
+
+    def add_record(self, job_id: str, path: str, record):
+        with self._lock, self._conn:
+            seq = self._conn.execute("SELECT record_count FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            self._conn.execute("INSERT INTO job_records (job_id, seq, path, record) VALUES (?, ?, ?, ?)",
+                               (job_id, seq, path, json.dumps(record, ensure_ascii=False)))
+            self._conn.execute("UPDATE jobs SET record_count = ? WHERE id = ?", (seq + 1, job_id))
+
+    def finish(self, job_id: str, status: str, error: str = None):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET status = ?, error = ?, finished = ?, lease_expires = NULL WHERE id = ?",
+                               (status, error, time.time(), job_id))
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def records(self, job_id: str, start: int = 0) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, record FROM job_records WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, start)
+            ).fetchall()
+        return [(path, json.loads(record)) for path, record in rows]
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+
+def job_queue_from_env() -> JobQueue:
+    max_queued = int(os.getenv("SERVICE_QUEUE_SIZE") or 100)
+    if os.getenv("SERVICE_QUEUE", "memory").lower() == "sqlite":
+        return SQLiteJobQueue(os.getenv("SERVICE_QUEUE_PATH", ".cache/jobs.sqlite3"), max_queued=max_queued)
+    return InMemoryJobQueue(max_queued=max_queued)
@@ -0,0 +1,202 @@
+"""
+Extraction service: wraps BrightQLAgentScraperTool and the Bright Data MCP
+agent behind a small HTTP API backed by a bounded job queue.
+
+    POST /jobs               {"kind": "scrape", "url": ..., "schema": ..., "is_html": false}
+                             {"kind": "agent", "query": ...}
+                             optional "timeout" (seconds); 202 with the job,
+                             429 when the queue is full
+    GET  /jobs/<id>          job status and the records extracted so far
+    GET  /jobs/<id>/stream   NDJSON: one line per record as it is extracted,
+                             then a final {"job": ...} status line
+    GET  /health             queue depth, busy workers, rate limits, circuit
+                             breaker states, per-stage pipeline timings and
+                             MCP tool cache hits per tool
+    GET  /metrics            pipeline stage metrics in the Prometheus text format
+
+Run with: python -m service.server --port 8080
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+one_levels_up = os.path.abspath(os.path.join(__file__, "../../"))
+sys.path.insert(0, one_levels_up)
+
+from dotenv import load_dotenv
+
+from mcp_agent.background_loop import BackgroundLoop
+from observability.pipeline_metrics import pipeline_metrics
+from service.job_queue import JobQueue, QueueFullError, job_queue_from_env
+from service.worker_pool import WorkerPool
+from tools.rate_limiter import limiter_metrics
+from tools.resilience import resilience_metrics
+
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS") or 4)
+SERVICE_JOB_TIMEOUT = float(os.getenv("SERVICE_JOB_TIMEOUT") or 300)
+STREAM_POLL_INTERVAL = 0.2
+
+
+def scrape_handler():
+    tool = None
+
+    async def handle(payload: dict):
+        nonlocal tool
+        if tool is None:
+            from tools.brightdataql_scraper_agent import BrightQLAgentScraperTool
+            tool = BrightQLAgentScraperTool(bright_token=os.getenv("BRIGHT_DATA_API_TOKEN"),
+                                            gemini_token=os.getenv("GEMINI_API_KEY"))
+        async for record in tool.astream_records(payload["url"], bool(payload.get("is_html")), payload["schema"]):
+            yield record
+
+    return handle
+
+
+async def agent_handler(payload: dict):
+    from mcp_agent.brightdata_mcp_agent import astream_records, lease_mcp_agent
+    max_steps = int(payload.get("max_steps") or os.getenv("MAX_MCP_AGENT_STEPS") or 5)
+    async with lease_mcp_agent(max_steps) as agent:
+        async for record in astream_records(agent, payload["query"], max_steps):
+            yield record
+
+
+REQUIRED_FIELDS = {"scrape": ("url", "schema"), "agent": ("query",)}
+
+
+class ExtractionService:
+    def __init__(self, queue: JobQueue, handlers: dict = None, workers: int = None):
+        self.queue = queue
+        self.handlers = handlers or {"scrape": scrape_handler(), "agent": agent_handler}
+        self.loop = BackgroundLoop(name="extraction-service")
+        self.pool = WorkerPool(queue, self.handlers, workers=workers or SERVICE_WORKERS)
+
+        async def start():
+            self.pool.start()
+
+        self.loop.run(start())
+
+    def submit(self, body: dict):
+        kind = body.get("kind", "scrape")
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        missing = [field for field in REQUIRED_FIELDS.get(kind, ()) if not body.get(field)]
+        if missing:
+            raise ValueError(f"Missing field(s): {', '.join(missing)}")
+        payload = {key: value for key, value in body.items() if key not in ("kind", "timeout")}
+        job = self.queue.submit(kind, payload, timeout=float(body.get("timeout") or SERVICE_JOB_TIMEOUT))
+        self.pool.notify()
+        return job
+
+    def close(self):
+        self.loop.stop(self.pool.stop())
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    service: ExtractionService = None
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "Not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            job = self.service.submit(body)
+        except QueueFullError as e:
+            return self._send_json(429, {"error": str(e)}, {"Retry-After": "5"})
+        except (ValueError, TypeError, AttributeError) as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(202, {"job": job.to_dict()}, {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["health"]:
+            return self._send_json(200, {"queued": self.service.queue.depth(), "running": self.service.pool.running,
+                                         "workers": self.service.pool.workers, "limits": limiter_metrics(),
+                                         **resilience_metrics(), "stages": pipeline_metrics.snapshot(),
+                                         **pipeline_metrics.collected()})
+        if parts == ["metrics"]:
+            return self._send(200, pipeline_metrics.render_prometheus().encode("utf-8"),
+                              "text/plain; version=0.0.4; charset=utf-8")
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._send_json(404, {"error": "Not found"})
+        job = self.service.queue.get(parts[1])
+        if job is None:
+            return self._send_json(404, {"error": "Unknown job"})
+        if len(parts) == 2:
+            records = [{"path": path, "record": record} for path, record in self.service.queue.records(job.id)]
+            return self._send_json(200, {"job": job.to_dict(), "records": records})
+        if parts[2:] == ["stream"]:
+            return self._stream(job)
+        self._send_json(404, {"error": "Not found"})
+
+    def _stream(self, job):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sent = 0
+        while True:
+            current = self.service.queue.get(job.id)
+            for _, record in self.service.queue.records(job.id, sent):
+                self.wfile.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                sent += 1
+            self.wfile.flush()
+            if current is None:
+                # Evicted from the in-memory queue after it finished; its
+                # records went with it
+                break
+            job = current
+            if job.done and sent >= job.record_count:
+                break
+            time.sleep(STREAM_POLL_INTERVAL)
+        self.wfile.write(json.dumps({"job": job.to_dict()}).encode("utf-8") + b"\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host: str, port: int, service: ExtractionService) -> ThreadingHTTPServer:
+    handler = type("BoundServiceRequestHandler", (ServiceRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="BrightDataQL extraction service")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT") or 8080))
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    args = parser.parse_args()
+
+    service = ExtractionService(job_queue_from_env(), workers=args.workers)
+    server = make_server(args.host, args.port, service)
+    print(f"Extraction service listening on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from service.job_queue import EXPIRED, FAILED, SUCCEEDED, JobQueue
+from tools.deadline import DeadlineExceeded, deadline
+
+
+class WorkerPool:
+    """
+    Runs queued jobs on the current event loop with a fixed number of worker
+    tasks. handlers maps a job kind to an async generator function taking
+    the job payload and yielding (path, record) pairs; every record is stored
+    on the queue as it arrives so clients can stream it. A job still queued
+    or running at its deadline is marked expired.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: dict, workers: int = 4, poll_interval: float = 0.5):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.running = 0
+        self._wakeup = None
+        self._loop = None
+        self._tasks = []
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if self.queue.heartbeat_interval:
+            self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    def notify(self):
+        """
+        Wakes idle workers after a submit; safe to call from any thread.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _work(self):
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    # Polling also picks up jobs submitted by other processes
+                    # sharing a SQLite queue
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+
+    async def _heartbeat(self):
+        # Keeps the leases of running jobs, so other processes sharing the
+        # queue don't take them back
+        while True:
+            await asyncio.sleep(self.queue.heartbeat_interval)
+            self.queue.heartbeat()
+
+    async def _run(self, job):
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            self.queue.finish(job.id, FAILED, f"Unknown job kind {job.kind!r}")
+            return
+        remaining = job.deadline - time.time() if job.deadline else None
+        if remaining is not None and remaining <= 0:
+            self.queue.finish(job.id, EXPIRED, "Deadline passed while queued")
+            return
+
+        async def consume():
+            async for path, record in handler(job.payload):
+                self.queue.add_record(job.id, path, record)
+
+        try:
+            # Every fetch, model and tool call of the job sees what is left
+            with deadline(remaining):
+                await asyncio.wait_for(consume(), remaining)
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            self.queue.finish(job.id, EXPIRED, "Deadline passed while running")
+        except Exception as e:
+            self.queue.finish(job.id, FAILED, f"{type(e).__name__}: {e}")
+        else:
+            self.queue.finish(job.id, SUCCEEDED)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
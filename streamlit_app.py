@@ -1,5 +1,6 @@
 import os
 import sys
+import queue
 import asyncio
 import logfire
 
@@ -11,56 +12,128 @@ from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExport
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+import pandas as pd
 import streamlit as st
-import nest_asyncio
 from dotenv import load_dotenv
 from pydantic_ai import Agent
 from pydantic_ai.mcp import MCPServerStdio
+from pydantic_ai.models import infer_model
 from pydantic_ai.settings import ModelSettings
 
-nest_asyncio.apply()
-load_dotenv()
-
-logfire.configure(
-    pydantic_plugin=logfire.PydanticPlugin(record="all"),
-    token=os.environ["LOGFIRE_TOKEN"],
-)
-logfire.instrument_pydantic()
-logfire.instrument_httpx(capture_all=True)
-
-exporter = OTLPSpanExporter()
-span_processor = BatchSpanProcessor(exporter)
-tracer_provider = TracerProvider()
-tracer_provider.add_span_processor(span_processor)
+from mcp_agent.background_loop import BackgroundLoop
+from mcp_agent.deadlines import deadline_tool_call
+from mcp_agent.server_pool import BackgroundServer, get_server_pool
+from mcp_agent.tool_cache import get_tool_cache
+from observability.telemetry import TelemetryConfig, configure_logfire, tracer_provider as telemetry_tracer_provider
+from tools.deadline import REQUEST_DEADLINE_SECONDS, bounded, deadline, timeout as deadline_timeout
+from tools.json_stream import JSONRecordStream
 
-set_tracer_provider(tracer_provider)
-Agent.instrument_all()
+load_dotenv()
 
 REQUEST_TIMEOUT = 10000
+# Overall budget per query; read here rather than in tools.deadline, after load_dotenv()
+QUERY_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS") or REQUEST_DEADLINE_SECONDS)
+
+# Streamlit re-executes this script on every rerun; everything below that
+# should exist once per process is created through st.cache_resource.
+
+@st.cache_resource
+def configure_telemetry() -> TracerProvider:
+    # Sampling, body capture and redaction follow TELEMETRY_* (see observability/telemetry.py)
+    config = TelemetryConfig.from_env()
+    if not config.enabled:
+        return None
+    # Without a Logfire token only the Logfire part is skipped; spans still
+    # go to the OTLP exporter
+    configure_logfire(config=config)
+
+    exporter = OTLPSpanExporter()
+    span_processor = BatchSpanProcessor(exporter)
+    tracer_provider = telemetry_tracer_provider(config)
+    tracer_provider.add_span_processor(span_processor)
+
+    set_tracer_provider(tracer_provider)
+    Agent.instrument_all(config.instrumentation_settings())
+    return tracer_provider
+
+@st.cache_resource
+def get_background_loop() -> BackgroundLoop:
+    # One loop shared by every session; each query runs as a task on it
+    return BackgroundLoop(name="brightdata-agent-loop")
+
+@st.cache_resource
+def get_model():
+    return infer_model(os.getenv("GOOGLE_GEMINI_MODEL_NAME"))
+
+configure_telemetry()
+
+async def start_brightdata_agent() -> tuple:
+    tool_cache = get_tool_cache()
+    brightdata_server = MCPServerStdio(
+        command="npx",
+        args=["@brightdata/mcp"],
+        env={
+            "API_TOKEN": os.getenv("BRIGHT_DATA_API_TOKEN"),
+            "WEB_UNLOCKER_ZONE": os.getenv("WEB_UNLOCKER_ZONE"),
+            "BROWSER_AUTH": os.getenv("BROWSER_AUTH", ""),
+        },
+        process_tool_call=deadline_tool_call(tool_cache.process_tool_call if tool_cache is not None else None),
+    )
+    running = await BackgroundServer(brightdata_server).start()
+    agent = Agent(
+        model=get_model(),
+        mcp_servers=[running.server],
+        retries=3,
+    )
+    return running, agent
+
+def model_settings() -> ModelSettings:
+    # Per run, so the model's timeout is capped at what is left of the query's deadline
+    return ModelSettings(timeout=deadline_timeout(REQUEST_TIMEOUT, "the model call"))
+
+async def stop_brightdata_agent(resource: tuple):
+    await resource[0].stop()
+
+async def brightdata_agent_healthy(resource: tuple) -> bool:
+    return await resource[0].ping()
 
 async def run_agent(query: str) -> str:
-    with logfire.span("Within run_agent"):
-        brightdata_server = MCPServerStdio(
-            command="npx",
-            args=["@brightdata/mcp"],
-            env={
-                "API_TOKEN": os.getenv("BRIGHT_DATA_API_TOKEN"),
-                "WEB_UNLOCKER_ZONE": os.getenv("WEB_UNLOCKER_ZONE"),
-                "BROWSER_AUTH": os.getenv("BROWSER_AUTH", ""),
-            },
-        )
+    with logfire.span("Within run_agent"), deadline(QUERY_DEADLINE_SECONDS):
+        # Warm Bright Data MCP servers, each with its agent, are leased from
+        # a pool on the background loop instead of being built per query
+        pool = get_server_pool("streamlit", start_brightdata_agent, stop_brightdata_agent,
+                               check=brightdata_agent_healthy)
+        try:
+            async with pool.lease() as (running, agent):
+                result = await bounded(agent.run(query, model_settings=model_settings()), "the agent run")
+                return result.output
+        except Exception as e:
+            logfire.exception("Agent execution failed", error=str(e))
+            return f"Error occurred: {str(e)}"
+
 
-        agent = Agent(
-            model=os.getenv("GOOGLE_GEMINI_MODEL_NAME"),
-            mcp_servers=[brightdata_server],
-            retries=3,
-            model_settings=ModelSettings(request_timeout=REQUEST_TIMEOUT),
-        )
+async def stream_agent(query: str, on_record) -> str:
+    """
+    Like run_agent, but streams the model output and calls on_record with
+    each (path, record) pair as soon as it is complete.
+    """
+    with logfire.span("Within stream_agent"), deadline(QUERY_DEADLINE_SECONDS):
+        pool = get_server_pool("streamlit", start_brightdata_agent, stop_brightdata_agent,
+                               check=brightdata_agent_healthy)
+
+        async def consume(agent) -> str:
+            async with agent.run_stream(query, model_settings=model_settings()) as result:
+                stream = JSONRecordStream()
+                async for delta in result.stream_text(delta=True):
+                    for record in stream.feed(delta):
+                        on_record(record)
+                for record in stream.finish():
+                    on_record(record)
+                return stream.text
 
         try:
-            async with agent.run_mcp_servers():
-                result = await agent.run(query)
-                return result.output
+            async with pool.lease() as (running, agent):
+                return await bounded(consume(agent), "the agent run")
         except Exception as e:
             logfire.exception("Agent execution failed", error=str(e))
             return f"Error occurred: {str(e)}"
@@ -215,13 +288,30 @@ query = st.text_area(
 )
 
 # Run button
+stream_records = st.checkbox("Stream records as they are extracted", value=True)
 run = st.button("Run")
 
 if run and query:
     logfire.info("User triggered Run", query_preview=query)
     with st.spinner("Running MCP agent..."):
         try:
-            content = asyncio.run(run_agent(query))
+            if stream_records:
+                # The agent runs on the background loop and hands records to
+                # this script thread, which redraws the table for each one
+                records = queue.Queue()
+                future = get_background_loop().submit(stream_agent(query, records.put))
+                table = st.empty()
+                rows = []
+                while not future.done() or not records.empty():
+                    try:
+                        _, record = records.get(timeout=0.2)
+                    except queue.Empty:
+                        continue
+                    rows.append(record if isinstance(record, dict) else {"value": record})
+                    table.dataframe(pd.json_normalize(rows))
+                content = future.result()
+            else:
+                content = get_background_loop().run(run_agent(query))
             st.subheader("Answer")
             st.write(content)
         except Exception as e:
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from mcp.types import CallToolResult, TextContent, Tool
+
+from mcp_agent.bdql_interpreter import (BDQLRuntimeError, BDQLSyntaxError, BrightDataQLInterpreter,
+                                        parse_script)
+
+
+class FakeConnector:
+    def __init__(self, tools: dict):
+        self.tools = [Tool(name=name, inputSchema={"type": "object", "properties": {p: {"type": "string"} for p in props}})
+                      for name, props in tools.items()]
+        self.calls = []
+
+    async def list_tools(self):
+        return self.tools
+
+    async def call_tool(self, name, arguments):
+        self.calls.append((name, arguments))
+        failed = name == "scraping_browser_click"
+        return CallToolResult(content=[TextContent(type="text", text=f"{name} {sorted(arguments.items())}")],
+                              isError=failed)
+
+
+class FakeSession:
+    def __init__(self, connector):
+        self.connector = connector
+
+
+class FakeClient:
+    def __init__(self, connector):
+        self.sessions = {"Bright Data": FakeSession(connector)}
+
+    def get_all_active_sessions(self):
+        return self.sessions
+
+
+def run(script: str, connector: FakeConnector):
+    return asyncio.run(BrightDataQLInterpreter(FakeClient(connector)).run(script))
+
+
+TOOLS = {
+    "scraping_browser_type": ("selector", "text", "submit"),
+    "scraping_browser_get_text": ("selector",),
+    "scraping_browser_click": ("selector",),
+}
+
+
+def test_positional_and_keyword_arguments():
+    connector = FakeConnector(TOOLS)
+    result = run("""
+        BEGIN
+          scraping_browser_type("#search", submit="true", text="boba tea")
+          LET title = scraping_browser_get_text(selector="#title")
+          RETURN {"title": title}
+        END
+    """, connector)
+    assert connector.calls[0] == ("scraping_browser_type",
+                                  {"selector": "#search", "submit": "true", "text": "boba tea"})
+    assert result == {"title": "scraping_browser_get_text [('selector', '#title')]"}
+
+
+def test_equality_inside_arguments_is_not_a_keyword():
+    statements, _ = parse_script('BEGIN LET same = IF(a == b, "y", "n") END')
+    assert statements[0][2][:2] == ("call", "IF")
+
+
+def test_positional_after_keyword_is_a_syntax_error():
+    with pytest.raises(BDQLSyntaxError):
+        parse_script('BEGIN scraping_browser_type(selector="#a", "text") END')
+
+
+@pytest.mark.parametrize("script", [
+    'BEGIN scraping_browser_get_text(css="#a") END',
+    'BEGIN scraping_browser_get_text("#a", selector="#b") END',
+    'BEGIN scraping_browser_get_text("#a", "#b") END',
+    'BEGIN scraping_browser_click("#a") END',
+    'BEGIN LET x = summarize("text") END',
+])
+def test_runtime_errors(script):
+    with pytest.raises(BDQLRuntimeError):
+        run(script, FakeConnector(TOOLS))
+
+
+def test_tool_results_are_not_compacted():
+    from mcp_agent.observation_compaction import ObservationCompactor, ObservationStore
+
+    compactor = ObservationCompactor(store=ObservationStore(), max_chars=50)
+    page = "price 10 " * 100
+
+    class CompactingConnector(FakeConnector):
+        async def call_tool(self, name, arguments):
+            # As the client's middleware would, around the server's answer
+            async def call_next(_):
+                return CallToolResult(content=[TextContent(type="text", text=page)])
+
+            context = type("Context", (), {"params": type("Params", (), {"name": name, "arguments": arguments})})
+            return await compactor.on_call_tool(context, call_next)
+
+    result = run("""
+        BEGIN
+          LET text = scraping_browser_get_text("#price")
+          RETURN {"text": text}
+        END
+    """, CompactingConnector(TOOLS))
+    assert result == {"text": page}
+    assert compactor.stats["compacted"] == 0
+
+
+class FakeLLM:
+    def __init__(self, answer: str):
+        self.answer = answer
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"content": self.answer})()
+
+
+@pytest.mark.parametrize("left,right,expected", [
+    ('"$1,299.99"', "1000", "big"),
+    ('" 12 "', '"€15"', "small"),
+    ('"-$5"', "0", "small"),
+])
+def test_whole_numbers_are_compared_locally(left, right, expected):
+    interpreter = BrightDataQLInterpreter(FakeClient(FakeConnector({})))
+    result = asyncio.run(interpreter.run(f'BEGIN RETURN {{ size: IF({left} > {right}, "big", "small") }} END'))
+    assert result == {"size": expected}
+    assert interpreter.llm_calls == 0
+
+
+@pytest.mark.parametrize("value", ['"4.5 out of 5 stars"', '"2 for $30"', '"Save 20% on 3 items"'])
+def test_numbers_inside_text_are_compared_by_the_llm(value):
+    llm = FakeLLM("true")
+    interpreter = BrightDataQLInterpreter(FakeClient(FakeConnector({})), llm=llm)
+    result = asyncio.run(interpreter.run(f'BEGIN RETURN {{ good: IF({value} > 4, "yes", "no") }} END'))
+    assert result == {"good": "yes"}
+    assert interpreter.llm_calls == 1
+    assert value.strip('"') in llm.prompts[0]
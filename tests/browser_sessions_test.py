@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from mcp_agent import browser_sessions
+from mcp_agent.browser_sessions import BrowserSessionManager
+from mcp_agent.server_pool import aclose_server_pools
+
+WARM_URL = "https://www.amazon.com"
+TOOLS = ("scraping_browser_navigate", "scraping_browser_click", "scraping_browser_get_text")
+
+
+class _Client:
+    def __init__(self, clients: list, fail_navigation: bool = False):
+        self.calls = []
+        self.closed = False
+        self.fail_navigation = fail_navigation
+        self._sessions = {}
+        clients.append(self)
+
+    async def create_all_sessions(self):
+        connector = SimpleNamespace(tools=[SimpleNamespace(name=name) for name in TOOLS], call_tool=self._call_tool)
+        self._sessions = {"Bright Data": SimpleNamespace(connector=connector)}
+        return self._sessions
+
+    def get_all_active_sessions(self):
+        return self._sessions
+
+    async def _call_tool(self, tool, arguments):
+        self.calls.append((tool, arguments))
+        return SimpleNamespace(isError=tool == "scraping_browser_navigate" and self.fail_navigation)
+
+    async def close_all_sessions(self):
+        self.closed = True
+        self._sessions = {}
+
+
+def _manager(clients: list, **kwargs) -> BrowserSessionManager:
+    return BrowserSessionManager(warmup_clicks=("#sp-cc-accept",), max_sessions=1,
+                                 client_factory=lambda: _Client(clients), **kwargs)
+
+
+def test_a_returned_session_is_reset_and_reused():
+    clients = []
+
+    async def run():
+        manager = _manager(clients)
+        async with manager.lease(WARM_URL) as first:
+            await first.session.call("scraping_browser_get_text", {})
+        async with manager.lease(WARM_URL) as second:
+            pass
+        await aclose_server_pools()
+        return manager, first, second
+
+    manager, first, second = asyncio.run(run())
+    assert len(clients) == 1
+    assert not first.reused and second.reused
+    assert second.client is first.client
+    assert clients[0].calls == [
+        ("scraping_browser_navigate", {"url": WARM_URL}),
+        ("scraping_browser_click", {"selector": "#sp-cc-accept"}),
+        ("scraping_browser_get_text", {}),
+        # The reset before the second lease
+        ("scraping_browser_navigate", {"url": WARM_URL}),
+    ]
+    assert manager.stats["leases"] == 2 and manager.stats["reused"] == 1 and manager.stats["cold_starts"] == 1
+
+
+def test_a_session_is_released_when_the_run_raises():
+    clients = []
+
+    async def run():
+        manager = _manager(clients)
+        with pytest.raises(ValueError):
+            async with manager.lease(WARM_URL):
+                raise ValueError("the run failed")
+        pool = manager._pool(WARM_URL)
+        idle = pool.idle
+        # With one session allowed, this would wait forever on a leaked lease
+        async with manager.lease(WARM_URL) as lease:
+            reused = lease.reused
+        await aclose_server_pools()
+        return idle, reused
+
+    assert asyncio.run(asyncio.wait_for(run(), 5)) == (1, True)
+    assert len(clients) == 1
+
+
+def test_a_session_that_cannot_reset_is_replaced():
+    clients = []
+
+    async def run():
+        manager = _manager(clients)
+        async with manager.lease(WARM_URL):
+            clients[0].fail_navigation = True
+        async with manager.lease(WARM_URL) as lease:
+            reused = lease.reused
+        await aclose_server_pools()
+        return reused
+
+    assert asyncio.run(run()) is False
+    assert len(clients) == 2 and clients[0].closed
+
+
+def test_idle_sessions_are_reaped(monkeypatch):
+    monkeypatch.setattr(browser_sessions, "BROWSER_POOL_IDLE_TIMEOUT", 0.05)
+    clients = []
+
+    async def run():
+        manager = _manager(clients)
+        async with manager.lease(WARM_URL):
+            pass
+        await asyncio.sleep(0.1)
+        reaped = await manager._pool(WARM_URL).reap_idle()
+        async with manager.lease(WARM_URL) as lease:
+            reused = lease.reused
+        await aclose_server_pools()
+        return reaped, reused
+
+    assert asyncio.run(run()) == (1, False)
+    assert clients[0].closed
+    assert len(clients) == 2
@@ -0,0 +1,69 @@
+from tools.chunked_extraction import merge_results, parse_json_result, split_document
+
+
+def _cards(n: int) -> str:
+    return "".join(f"<div class='card'><h2>Product {i}</h2><span>${i}.99</span></div>" for i in range(n))
+
+
+def test_short_documents_are_not_split():
+    assert split_document("<p>short</p>", 100, 20, is_html=True) == ["<p>short</p>"]
+
+
+def test_html_chunks_end_on_closing_tags_within_max_chars():
+    html = _cards(40)
+    chunks = split_document(html, 500, is_html=True)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert all(chunk.endswith("</div>") for chunk in chunks)
+    assert "".join(chunks) == html
+
+
+def test_overlap_repeats_whole_segments_up_to_overlap_chars():
+    html = _cards(40)
+    overlap = len("<div class='card'><h2>Product 10</h2><span>$10.99</span></div>") + 10
+    chunks = split_document(html, 500, overlap_chars=overlap, is_html=True)
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        repeated = max(size for size in range(overlap + 1) if chunk.startswith(previous[len(previous) - size:]))
+        assert 0 < repeated <= overlap
+        assert previous[len(previous) - repeated:].startswith("<div class='card'>")
+
+
+def test_markdown_splits_on_headings_and_blank_lines():
+    markdown = "\n".join(f"## Item {i}\n\nprice {i}" for i in range(20))
+    chunks = split_document(markdown, 60)
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    assert all(chunk.endswith("\n") for chunk in chunks[:-1])
+    assert "".join(chunks) == markdown
+
+
+def test_oversized_segments_are_cut_at_max_chars():
+    assert split_document("x" * 250, 100) == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_merge_dedupes_list_records_by_key_field():
+    first = {"listings": [{"url": "https://a.test/1", "price": "n/a"}, {"url": "https://a.test/2", "price": "$2"}]}
+    second = {"listings": [{"url": "HTTPS://A.TEST/1 ", "price": "$1"}, {"url": "https://a.test/3", "price": "$3"}]}
+    assert merge_results([first, second]) == {"listings": [
+        {"url": "https://a.test/1", "price": "$1"},
+        {"url": "https://a.test/2", "price": "$2"},
+        {"url": "https://a.test/3", "price": "$3"},
+    ]}
+
+
+def test_merge_prefers_present_scalars_and_keeps_the_first_one():
+    results = [{"title": "n/a", "rating": 4.5, "seller": None},
+               {"title": "Widget", "rating": 3.0, "seller": "n/a"},
+               None]
+    assert merge_results(results) == {"title": "Widget", "rating": 4.5, "seller": "n/a"}
+
+
+def test_merge_dedupes_records_without_key_fields_by_content():
+    results = [{"tags": [{"label": "new"}]}, {"tags": [{"label": "new"}, {"label": "sale"}]}]
+    assert merge_results(results) == {"tags": [{"label": "new"}, {"label": "sale"}]}
+
+
+def test_parse_json_result_strips_code_fences():
+    assert parse_json_result('```json\n{"a": 1}\n```') == {"a": 1}
+    assert parse_json_result("not json") is None
+    assert parse_json_result(["parts"]) is None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Same as the scripts: import the repo's packages without installing them
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../")))
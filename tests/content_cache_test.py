@@ -0,0 +1,55 @@
+import os
+import time
+
+import pytest
+
+from tools.content_cache import CacheMissError, ContentCache
+
+URL = "https://www.zillow.com/homes/1"
+
+
+def _age(cache, url, seconds):
+    path = os.path.join(cache.cache_dir, cache._key(url, "zone", "html"))
+    fetched_at = time.time() - seconds
+    os.utime(path, (fetched_at, fetched_at))
+
+
+def test_entries_expire_after_their_domain_ttl(tmp_path):
+    cache = ContentCache(str(tmp_path), default_ttl=3600, domain_ttls={"zillow.com": 60})
+    cache.put(URL, "zone", "html", "<html>home</html>")
+    cache.put("https://example.com/", "zone", "html", "<html>example</html>")
+    assert cache.get(URL, "zone", "html") == "<html>home</html>"
+    _age(cache, URL, 61)
+    _age(cache, "https://example.com/", 61)
+    assert cache.get(URL, "zone", "html") is None
+    assert cache.get("https://example.com/", "zone", "html") == "<html>example</html>"
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path):
+    cache = ContentCache(str(tmp_path), max_bytes=25)
+    for name in "abc":
+        cache.put(f"https://example.com/{name}", "zone", "html", name * 10)
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("https://example.com/a", "zone", "html") is None
+    # Reading b makes c the least recently used
+    assert cache.get("https://example.com/b", "zone", "html") == "b" * 10
+    cache.put("https://example.com/d", "zone", "html", "d" * 10)
+    assert cache.get("https://example.com/c", "zone", "html") is None
+    assert cache.get("https://example.com/b", "zone", "html") == "b" * 10
+    assert cache.stats()["bytes"] == 20
+
+
+def test_entries_larger_than_the_budget_are_not_stored(tmp_path):
+    cache = ContentCache(str(tmp_path), max_bytes=5)
+    cache.put(URL, "zone", "html", "x" * 6)
+    assert cache.stats()["entries"] == 0
+
+
+def test_offline_cache_serves_stale_entries_and_raises_on_a_miss(tmp_path):
+    ContentCache(str(tmp_path)).put(URL, "zone", "html", "<html>home</html>")
+    cache = ContentCache(str(tmp_path), default_ttl=1, offline=True)
+    _age(cache, URL, 10)
+    assert cache.get(URL, "zone", "html") == "<html>home</html>"
+    with pytest.raises(CacheMissError):
+        cache.get(URL, "zone", "markdown")
@@ -0,0 +1,95 @@
+import time
+import asyncio
+
+import pytest
+
+from tools.deadline import DeadlineExceeded, allows, bounded, check, deadline, remaining, timeout
+
+
+def test_no_deadline_by_default():
+    assert remaining() is None
+    assert allows(1000)
+    assert timeout(30) == 30
+    check()
+
+
+def test_nested_deadlines_only_shorten():
+    with deadline(1):
+        with deadline(10):
+            assert remaining() <= 1
+        with deadline(0.5):
+            assert remaining() <= 0.5
+        with deadline(None):
+            assert 0.5 < remaining() <= 1
+    assert remaining() is None
+
+
+def test_timeout_and_allows_cap_at_what_is_left():
+    with deadline(2):
+        assert timeout(30) <= 2
+        assert timeout(0.5) == 0.5
+        assert allows(1)
+        assert not allows(5)
+
+
+def test_expired_deadline_raises():
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            check("the next step")
+        with pytest.raises(DeadlineExceeded):
+            timeout(30)
+        assert not allows(0)
+
+
+def test_bounded_cancels_the_awaitable_at_the_deadline():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        with deadline(0.05):
+            await bounded(slow(), "the slow call")
+
+    with pytest.raises(DeadlineExceeded, match="the slow call"):
+        asyncio.run(run())
+    assert cancelled == [True]
+
+
+def test_bounded_without_time_left_does_not_start_the_call():
+    started = []
+
+    async def call():
+        started.append(True)
+
+    async def run():
+        with deadline(0.01):
+            await asyncio.sleep(0.02)
+            await bounded(call())
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert started == []
+
+
+def test_bounded_passes_results_and_own_timeouts_through():
+    async def value():
+        return 42
+
+    async def own_timeout():
+        await asyncio.wait_for(asyncio.sleep(1), 0.01)
+
+    async def run():
+        with deadline(5):
+            assert await bounded(value()) == 42
+            with pytest.raises(asyncio.TimeoutError) as raised:
+                await bounded(own_timeout())
+            assert not isinstance(raised.value, DeadlineExceeded)
+        assert await bounded(value()) == 42
+
+    asyncio.run(run())
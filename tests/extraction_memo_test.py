@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+from tools.extraction_memo import ExtractionMemo, InMemoryMemoBackend, SQLiteMemoBackend, memo_key
+
+
+def test_key_ignores_whitespace_only_changes():
+    assert memo_key("<p>Widget  $10</p>\n", "{ name\n price }", "gemini-2.0-flash", "v1") == \
+        memo_key(" <p>Widget $10</p>", "{ name price }", "gemini-2.0-flash", "v1")
+
+
+@pytest.mark.parametrize("changed", [
+    ("<p>Widget $11</p>", "{ name price }", "gemini-2.0-flash", "v1"),
+    ("<p>Widget $10</p>", "{ name price rating }", "gemini-2.0-flash", "v1"),
+    ("<p>Widget $10</p>", "{ name price }", "gemini-2.5-pro", "v1"),
+    ("<p>Widget $10</p>", "{ name price }", "gemini-2.0-flash", "v2"),
+])
+def test_key_changes_with_page_schema_model_or_prompt(changed):
+    assert memo_key(*changed) != memo_key("<p>Widget $10</p>", "{ name price }", "gemini-2.0-flash", "v1")
+
+
+def test_key_parts_do_not_run_together():
+    assert memo_key("ab", "c", "m", "v1") != memo_key("a", "bc", "m", "v1")
+
+
+def test_from_env_picks_the_backend(monkeypatch, tmp_path):
+    monkeypatch.delenv("EXTRACTION_MEMO", raising=False)
+    assert ExtractionMemo.from_env() is None
+    monkeypatch.setenv("EXTRACTION_MEMO", "memory")
+    monkeypatch.setenv("EXTRACTION_MEMO_MAX_ENTRIES", "2")
+    memo = ExtractionMemo.from_env()
+    assert isinstance(memo.backend, InMemoryMemoBackend) and memo.backend.max_entries == 2
+    monkeypatch.setenv("EXTRACTION_MEMO", "SQLite")
+    monkeypatch.setenv("EXTRACTION_MEMO_PATH", str(tmp_path / "memo" / "extractions.sqlite3"))
+    memo = ExtractionMemo.from_env()
+    assert isinstance(memo.backend, SQLiteMemoBackend) and memo.backend.table == "extractions"
+    assert (tmp_path / "memo" / "extractions.sqlite3").exists()
+
+
+def test_sqlite_tables_share_a_file_without_sharing_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    extractions = SQLiteMemoBackend(path)
+    tools = SQLiteMemoBackend(path, table="tool_results")
+    extractions.set("key", '{"a": 1}')
+    tools.set("key", '{"b": 2}')
+    assert SQLiteMemoBackend(path).get("key") == '{"a": 1}'
+    assert SQLiteMemoBackend(path, table="tool_results").get("key") == '{"b": 2}'
+    tables = {row[0] for row in sqlite3.connect(path).execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == {"extractions", "tool_results"}
+
+
+def test_memo_counts_lookups_and_only_stores_text():
+    memo = ExtractionMemo(InMemoryMemoBackend(max_entries=1))
+    assert memo.get("a") is None
+    memo.set("a", [{"type": "text", "text": "parts"}])
+    assert memo.get("a") is None
+    memo.set("a", '{"a": 1}')
+    memo.set("b", '{"b": 2}')
+    assert memo.get("a") is None
+    assert memo.get("b") == '{"b": 2}'
+    assert memo.stats() == {"hits": 1, "misses": 3, "hit_rate": 0.25}
@@ -0,0 +1,82 @@
+import json
+
+from tools.extraction_recipes import RecipeStore, _find_value, parse_dom
+
+SCHEMA = "{ listings[] { name price link } }"
+
+
+def page(products) -> str:
+    cards = "".join(
+        f'<div class="card"><h2 class="title">{name}</h2><span class="price">{price}</span>'
+        f'<a class="more" href="/item/{i}">View</a></div>'
+        for i, (name, price) in enumerate(products)
+    )
+    return f'<html><body><nav><a href="/">Home</a></nav><main class="results">{cards}</main></body></html>'
+
+
+def llm_result(products) -> str:
+    return json.dumps({"listings": [
+        {"name": name, "price": price, "link": f"https://shop.example.com/item/{i}"}
+        for i, (name, price) in enumerate(products)
+    ]})
+
+
+def test_learns_and_replays_a_recipe(tmp_path):
+    store = RecipeStore(str(tmp_path / "recipes.json"))
+    products = [("Widget", "$10"), ("Gadget", "$12")]
+    assert store.learn("https://shop.example.com/a", SCHEMA, page(products), llm_result(products))
+
+    later = [("Sprocket", "$3"), ("Flange", "$4"), ("Bolt", "$1")]
+    result = json.loads(store.apply("https://shop.example.com/b", SCHEMA, page(later)))
+    assert [item["name"] for item in result["listings"]] == ["Sprocket", "Flange", "Bolt"]
+    assert result["listings"][2]["link"] == "/item/2"
+    # Persisted and reloaded
+    assert RecipeStore(str(tmp_path / "recipes.json")).apply("https://shop.example.com/c", SCHEMA, page(later))
+
+
+def test_fields_the_model_reported_missing_are_optional():
+    store = RecipeStore()
+    products = [("Widget", "$10"), ("Gadget", "$12")]
+    data = json.loads(llm_result(products))
+    for item in data["listings"]:
+        item["price"] = "n/a"
+    assert store.learn("https://shop.example.com/a", SCHEMA, page(products), json.dumps(data))
+    later = [("Sprocket", "$3"), ("Flange", "$4")]
+    result = json.loads(store.apply("https://shop.example.com/b", SCHEMA, page(later)))
+    assert [(item["name"], item["price"]) for item in result["listings"]] == [("Sprocket", "n/a"), ("Flange", "n/a")]
+    # A later LLM result that has the field learns it
+    assert store.learn("https://shop.example.com/c", SCHEMA, page(later), llm_result(later))
+    result = json.loads(store.apply("https://shop.example.com/d", SCHEMA, page(products)))
+    assert result["listings"][1]["price"] == "$12"
+
+
+def test_does_not_learn_a_recipe_without_any_selector():
+    store = RecipeStore()
+    schema = "{ title rating reviews[] { text } }"
+    html = "<html><body><h1>Widget</h1></body></html>"
+    assert not store.learn("https://shop.example.com/a", schema, html,
+                           json.dumps({"title": "n/a", "rating": None, "reviews": []}))
+    assert store.learn("https://shop.example.com/a", schema, html,
+                       json.dumps({"title": "Widget", "rating": None, "reviews": []}))
+    result = json.loads(store.apply("https://shop.example.com/b", schema, "<html><body><h1>Gadget</h1></body></html>"))
+    assert result == {"title": "Gadget", "rating": "n/a", "reviews": []}
+
+
+def test_skips_recipes_with_missing_selectors_saved_earlier(tmp_path):
+    path = tmp_path / "recipes.json"
+    path.write_text(json.dumps({"shop.example.com|0": {"fields": {"name": {"selector": None}}, "fill_ratio": 1.0}}))
+    assert RecipeStore(str(path))._recipes == {}
+
+
+def test_url_attributes_match_exactly_or_by_path():
+    root = parse_dom('<div><a id="home" href="/">Home</a><a id="item" href="/item/7?ref=x">Item</a></div>')
+    element, attr = _find_value(root, "https://shop.example.com/item/7?ref=x")
+    assert (element.attrs["id"], attr) == ("item", "href")
+    # "/" is a suffix of any url ending in a slash, but not the same link
+    element, attr = _find_value(root, "https://shop.example.com/other/")
+    assert element is None and attr is None
+    root = parse_dom('<div><a href="https://partner.example.org/item/7">Item</a></div>')
+    element, _ = _find_value(root, "https://shop.example.com/item/7")
+    assert element is None
+    element, _ = _find_value(root, "https://www.partner.example.org/item/7/")
+    assert element is not None
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from observability.pipeline_metrics import pipeline_metrics
+from tools.brightdataql_scraper_agent import GeminiExtractor, _finish_stream
+from tools.json_stream import JSONRecordStream
+
+
+@pytest.fixture
+def extractor():
+    pipeline_metrics.reset()
+    extractor = GeminiExtractor("gemini-test", "key")
+    extractor.memo = None
+    extractor.model = FakeListChatModel(responses=['```json\n{"name": "a"}\n```'])
+    return extractor
+
+
+def test_single_prompt_extraction_records_the_parse_stage(extractor):
+    assert extractor.extract_chunked("page", "{ name }") == '```json\n{"name": "a"}\n```'
+    parse = pipeline_metrics.snapshot()["parse"]
+    assert parse["count"] == 1 and parse["bytes"] == len('```json\n{"name": "a"}\n```')
+
+
+def test_async_single_prompt_extraction_records_the_parse_stage(extractor):
+    asyncio.run(extractor.aextract_chunked("page", "{ name }"))
+    assert pipeline_metrics.snapshot()["parse"]["count"] == 1
+
+
+def test_chunked_extraction_records_one_parse_stage(extractor):
+    extractor.model = FakeListChatModel(responses=['{"items": [{"n": 1}]}', '{"items": [{"n": 2}]}'])
+    result = extractor.extract_chunked("a" * 30 + "\n\n" + "b" * 30, "{ items[] { n } }", max_chars=40,
+                                       overlap_chars=0, max_workers=1)
+    assert '"n": 1' in result and '"n": 2' in result
+    assert pipeline_metrics.snapshot()["parse"]["count"] == 1
+
+
+def test_streamed_answer_records_the_parse_stage(extractor):
+    stream = JSONRecordStream()
+    stream.feed('{"product": {"name": "a"}}')
+    assert _finish_stream(stream) == [("", {"product": {"name": "a"}})]
+    parse = pipeline_metrics.snapshot()["parse"]
+    assert parse["count"] == 1 and parse["bytes"] == len('{"product": {"name": "a"}}')
+
+
+class _QuotaClient:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, *args, **kwargs):
+        from google.api_core.exceptions import ResourceExhausted
+
+        self.calls += 1
+        raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+
+
+def test_a_429_costs_one_model_call_per_retry_attempt():
+    from tools.resilience import RetryBudget, RetryPolicy, is_retryable_llm_error
+
+    pipeline_metrics.reset()
+    extractor = GeminiExtractor("gemini-retry-test", "key")
+    extractor.memo = None
+    extractor.retry_policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0, retryable=is_retryable_llm_error)
+    extractor.retry_budget = RetryBudget(ratio=1.0)
+    client = _QuotaClient()
+    extractor.model.client = client
+    with pytest.raises(Exception, match="429"):
+        extractor.extract_with_schema("page", "{ name }")
+    assert client.calls == 3
+    assert extractor.retry_budget.retries == 2
+
+
+def test_each_429_reaches_the_model_limiter():
+    from tools.rate_limiter import RateLimiter
+    from tools.resilience import RetryBudget, RetryPolicy, is_retryable_llm_error
+
+    extractor = GeminiExtractor("gemini-limiter-test", "key", limiter=RateLimiter("model:test", initial_concurrency=8))
+    extractor.memo = None
+    extractor.retry_policy = RetryPolicy(max_attempts=2, base_delay=0, max_delay=0, retryable=is_retryable_llm_error)
+    extractor.retry_budget = RetryBudget(ratio=1.0)
+    extractor.model.client = _QuotaClient()
+    with pytest.raises(Exception, match="429"):
+        extractor.extract_with_schema("page", "{ name }")
+    metrics = extractor.limiter.metrics()
+    assert metrics["calls"] == 2 and metrics["overloads"] == 2
+    assert metrics["concurrency_limit"] < 8 and metrics["in_flight"] == 0
+
+
+def test_sync_model_call_gets_the_deadline_as_its_timeout():
+    from google.ai.generativelanguage_v1beta.types import Candidate, Content, GenerateContentResponse, Part
+
+    from tools.deadline import deadline
+
+    seen = {}
+
+    class Client:
+        def generate_content(self, request=None, timeout=None, **kwargs):
+            seen["timeout"] = timeout
+            return GenerateContentResponse(candidates=[Candidate(content=Content(parts=[Part(text='{"a": 1}')]),
+                                                                 finish_reason=1)])
+
+    extractor = GeminiExtractor("gemini-deadline-test", "key")
+    extractor.memo = None
+    extractor.model.client = Client()
+    with deadline(5):
+        assert extractor.extract_with_schema("page", "{ a }") == '{"a": 1}'
+    assert 0 < seen["timeout"] <= 5
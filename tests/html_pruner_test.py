@@ -0,0 +1,45 @@
+from tools.html_pruner import HTMLPruner, PruneConfig
+
+
+def prune(html: str) -> str:
+    return HTMLPruner(PruneConfig()).prune(html)[0]
+
+
+def test_drops_scripts_styles_and_attributes():
+    html = ('<html><head><style>p{}</style><script>var x = 1;</script></head>'
+            '<body><div class="card" data-id="1"><a href="/p/1" onclick="go()">Item</a></div></body></html>')
+    assert prune(html) == '<html><head></head><body><div><a href="/p/1">Item</a></div></body></html>'
+
+
+def test_keeps_content_wrapped_in_a_form():
+    html = ('<html><body><form id="aspnetForm" action="/default.aspx"><div class="price">$10.99</div>'
+            '<button>Add to cart</button></form></body></html>')
+    assert prune(html) == "<html><body><form><div>$10.99</div></form></body></html>"
+
+
+def test_unclosed_dropped_element_ends_with_its_parent():
+    html = '<body><div><nav><a href="/">Home</a></div><p>Product <b>X</b></p></body>'
+    assert prune(html) == "<body><div></div><p>Product <b>X</b></p></body>"
+
+
+def test_nested_dropped_elements():
+    assert prune("<div><nav><nav>a</nav>b</nav>c</div>") == "<div>c</div>"
+
+
+def test_keeps_microdata_and_open_graph_meta():
+    html = ('<head><meta charset="utf-8"><meta itemprop="price" content="9.99">'
+            '<meta property="og:title" content="Widget"/><meta name="viewport" content="width=device-width"></head>')
+    assert prune(html) == ('<head><meta itemprop="price" content="9.99">'
+                           '<meta property="og:title" content="Widget"></head>')
+
+
+def test_keeps_json_ld():
+    html = '<div><script type="application/ld+json">{"price": "1 < 2"}</script></div>'
+    assert prune(html) == '<div><script type="application/ld+json">{"price": "1 < 2"}</script></div>'
+
+
+def test_records_stats_per_domain():
+    pruner = HTMLPruner(PruneConfig())
+    _, stats = pruner.prune("<div><script>" + "x" * 1000 + "</script>text</div>", "https://shop.example.com/a")
+    assert stats.bytes_after < stats.bytes_before
+    assert pruner.domain_stats["shop.example.com"].pages == 1
@@ -0,0 +1,100 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from service.job_queue import RUNNING, SUCCEEDED, InMemoryJobQueue, JobQueue, QueueFullError, SQLiteJobQueue
+from service.server import ServiceRequestHandler
+
+
+def test_job_queue_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
+
+
+def test_in_memory_queue_is_bounded_fifo():
+    queue = InMemoryJobQueue(max_queued=2)
+    first = queue.submit("scrape", {"url": "a"})
+    queue.submit("scrape", {"url": "b"})
+    with pytest.raises(QueueFullError):
+        queue.submit("scrape", {"url": "c"})
+    assert queue.claim().id == first.id
+    assert queue.depth() == 1
+
+
+def test_sqlite_claim_is_taken_once_across_processes(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first, second = SQLiteJobQueue(path), SQLiteJobQueue(path)
+    job = first.submit("scrape", {"url": "a"})
+    claimed = [first.claim(), second.claim()]
+    assert [item.id if item else None for item in claimed] == [job.id, None]
+
+
+def test_sqlite_reopen_keeps_jobs_leased_to_a_live_process(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    worker = SQLiteJobQueue(path)
+    job = worker.submit("scrape", {"url": "a"})
+    worker.claim()
+    other = SQLiteJobQueue(path)
+    assert other.claim() is None
+    assert other.get(job.id).status == RUNNING
+
+
+def test_sqlite_expired_lease_is_requeued(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    dead = SQLiteJobQueue(path, lease_seconds=0.01)
+    job = dead.submit("scrape", {"url": "a"})
+    dead.claim()
+    dead._conn.execute("UPDATE jobs SET lease_expires = 0 WHERE id = ?", (job.id,))
+    dead._conn.commit()
+    other = SQLiteJobQueue(path)
+    claimed = other.claim()
+    assert claimed.id == job.id
+    other.add_record(job.id, "listings", {"name": "x"})
+    other.finish(job.id, SUCCEEDED)
+    assert other.get(job.id).status == SUCCEEDED
+    assert other.records(job.id) == [("listings", {"name": "x"})]
+
+
+def test_sqlite_heartbeat_extends_the_lease(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"), lease_seconds=30)
+    job = queue.submit("scrape", {"url": "a"})
+    queue.claim()
+    before = queue._conn.execute("SELECT lease_expires FROM jobs WHERE id = ?", (job.id,)).fetchone()[0]
+    queue.heartbeat()
+    after = queue._conn.execute("SELECT lease_expires FROM jobs WHERE id = ?", (job.id,)).fetchone()[0]
+    assert after >= before
+
+
+def test_stream_ends_when_the_job_is_evicted():
+    from http.server import ThreadingHTTPServer
+
+    queue = InMemoryJobQueue(max_finished=1)
+    job = queue.submit("scrape", {"url": "a"})
+    queue.claim()
+    queue.add_record(job.id, "listings", {"name": "x"})
+
+    class Service:
+        pass
+
+    service = Service()
+    service.queue = queue
+    handler = type("Handler", (ServiceRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        def evict():
+            # As if enough newer jobs had finished to evict it while it is streamed
+            with queue._lock:
+                del queue._jobs[job.id]
+                del queue._records[job.id]
+
+        threading.Timer(0.3, evict).start()
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/jobs/{job.id}/stream", timeout=5) as response:
+            lines = [json.loads(line) for line in response.read().splitlines()]
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert lines[0] == {"name": "x"}
+    assert lines[-1]["job"]["id"] == job.id
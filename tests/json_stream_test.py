@@ -0,0 +1,59 @@
+import json
+
+from tools.json_stream import JSONRecordStream, records_from_document
+
+FINANCIAL = {
+    "company": {"name": "Apple Inc.", "ticker": "AAPL", "exchange": "NASDAQ"},
+    "stock_quote": {"price": 227.5, "change": -1.2, "change_percent": "-0.52%", "last_updated": "2024-10-01T15:30:00Z"},
+    "key_metrics": {"market_cap": "3.45T", "pe_ratio": 34.6, "eps": 6.57, "dividend_yield": "0.44%",
+                    "52_week_range": "164.08 - 237.23"},
+    "analyst_rating": {"consensus": "Buy", "price_target_high": 300.0, "price_target_low": 184.0,
+                       "price_target_avg": 240.5},
+    "recent_earnings": [
+        {"quarter": "Q3 2024", "date": "2024-08-01", "actual_eps": 1.4, "expected_eps": 1.35, "revenue": "85.8B"},
+        {"quarter": "Q2 2024", "date": "2024-05-02", "actual_eps": 1.53, "expected_eps": 1.5, "revenue": "90.8B"},
+    ],
+}
+
+
+def stream(text: str, size: int = 7):
+    parser = JSONRecordStream()
+    fed = []
+    for start in range(0, len(text), size):
+        fed.extend(parser.feed(text[start:start + size]))
+    return fed, parser.finish()
+
+
+def test_array_records_stream_as_they_close():
+    text = '```json\n{"listings": [{"name": "a, b"}, {"name": "c}"}]}\n```'
+    parser = JSONRecordStream()
+    assert parser.feed(text[:text.index("},") + 1]) == [("listings", {"name": "a, b"})]
+    assert parser.feed(text[text.index("},") + 1:]) == [("listings", {"name": "c}"})]
+    assert parser.finish() == []
+
+
+def test_single_object_document_is_returned_whole():
+    document = {"product": {"name": "x", "price": 1}}
+    fed, finished = stream(json.dumps(document))
+    assert fed == []
+    assert finished == [("", document)]
+
+
+def test_mixed_document_keeps_top_level_members():
+    fed, finished = stream(json.dumps(FINANCIAL, indent=2))
+    assert fed == [("recent_earnings", item) for item in FINANCIAL["recent_earnings"]]
+    assert finished == [(key, FINANCIAL[key]) for key in ("company", "stock_quote", "key_metrics", "analyst_rating")]
+
+
+def test_mixed_document_scalars_form_one_record():
+    document = {"query": "boba tea", "listings": [{"name": "a"}], "total": 1, "tags": ["x"]}
+    fed, finished = stream(json.dumps(document), size=3)
+    assert fed == [("listings", {"name": "a"})]
+    assert finished == [("", {"query": "boba tea", "total": 1, "tags": ["x"]})]
+
+
+def test_records_from_document_matches_stream():
+    fed, finished = stream(json.dumps(FINANCIAL))
+    assert list(records_from_document(FINANCIAL)) == fed + finished
+    assert list(records_from_document({"a": 1})) == [("", {"a": 1})]
+    assert list(records_from_document([{"a": 1}, {"a": 2}])) == [("", {"a": 1}), ("", {"a": 2})]
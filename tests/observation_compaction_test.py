@@ -0,0 +1,73 @@
+import re
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+from mcp.types import CallToolResult, TextContent
+
+from mcp_agent import observation_compaction
+from mcp_agent.observation_compaction import (ObservationCompactor, ObservationStore, excerpt, focus_terms,
+                                              full_observations, observation_focus)
+
+
+def page() -> str:
+    rows = [f"row {i} filler text about nothing in particular" for i in range(3000)]
+    for i in range(0, 3000, 40):
+        rows[i] = f"price {i} rating {i} name Item {i}"
+    return "\n".join(rows)
+
+
+def call(compactor, text: str, name: str = "scrape_as_markdown"):
+    context = SimpleNamespace(params=SimpleNamespace(name=name, arguments={"url": "https://example.com"}))
+
+    async def call_next(_):
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+
+    return asyncio.run(compactor.on_call_tool(context, call_next))
+
+
+def test_compaction_is_opt_in(monkeypatch):
+    monkeypatch.delenv("OBSERVATION_COMPACTION", raising=False)
+    assert importlib.reload(observation_compaction).OBSERVATION_COMPACTION is False
+    monkeypatch.setenv("OBSERVATION_COMPACTION", "1")
+    assert importlib.reload(observation_compaction).OBSERVATION_COMPACTION is True
+    monkeypatch.delenv("OBSERVATION_COMPACTION")
+    importlib.reload(observation_compaction)
+
+
+def test_focus_terms_skip_type_words():
+    assert focus_terms("{ listings[] { price(float) rating_count name } }") == ("listings", "price", "rating",
+                                                                               "count", "name")
+
+
+def test_excerpt_stays_within_budget():
+    text = page()
+    for budget in (500, 2000, 8000):
+        shown = excerpt(text, ("price", "rating"), budget)
+        assert len(shown) <= budget
+        assert shown.startswith(text[:budget // 4])
+        assert "[... @" in shown
+
+
+def test_excerpt_without_terms_is_the_top():
+    assert excerpt("abcdef", (), 3) == "abc"
+
+
+def test_compacted_observation_fits_max_chars_and_can_be_read():
+    compactor = ObservationCompactor(store=ObservationStore(), max_chars=2000, slice_chars=100)
+    text = page()
+    with observation_focus("{ price rating }"):
+        shown = call(compactor, text).content[0].text
+    assert len(shown) <= 2000
+    handle = re.search(r"handle (obs_\w+)", shown).group(1)
+    found = compactor.read(handle=handle, query="row 2999").content[0].text
+    assert "row 2999" in found
+    assert compactor.read(handle=handle, offset=10).content[0].text.endswith(text[10:110])
+
+
+def test_small_and_bypassed_observations_pass_through():
+    compactor = ObservationCompactor(store=ObservationStore(), max_chars=2000)
+    assert call(compactor, "short").content[0].text == "short"
+    with full_observations():
+        assert call(compactor, page()).content[0].text == page()
+    assert compactor.stats["compacted"] == 0
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from mcp_agent.plan_cache import Plan, PlanCache, PlanStep, ToolCall, render, replay
+
+TEMPLATE = "Scrape {url} and output the response as JSON."
+PARAMS = {"url": "https://finance.yahoo.com/quote/AAPL"}
+
+
+def scrape(url: str, chars: int = 5000) -> ToolCall:
+    return ToolCall("scrape_as_markdown", {"url": url}, chars, False)
+
+
+def test_render_leaves_schema_braces():
+    assert render("{url} -> { name }", PARAMS) == "https://finance.yahoo.com/quote/AAPL -> { name }"
+
+
+def test_records_parameterized_steps(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.json"))
+    calls = [scrape(PARAMS["url"]), ToolCall("scrape_as_markdown", {"url": "x"}, 10, True)]
+    plan = cache.record("key", calls, PARAMS, '{"price": 1}', TEMPLATE)
+    assert plan.steps == [PlanStep("scrape_as_markdown", {"url": "${url}"}, 500)]
+    assert plan.recorded_steps == 2
+    assert PlanCache(cache.path).get("key").steps == plan.steps
+
+
+def test_non_json_answers_are_not_recorded():
+    cache = PlanCache()
+    answer = "Agent stopped after reaching the maximum number of steps (5)."
+    assert cache.record("key", [scrape(PARAMS["url"])], PARAMS, answer, TEMPLATE) is None
+    assert cache.get("key") is None
+
+
+def test_runs_following_model_chosen_links_are_not_recorded():
+    cache = PlanCache()
+    calls = [scrape(PARAMS["url"]), scrape("https://finance.yahoo.com/news/apple-earnings-123.html")]
+    assert cache.record("key", calls, PARAMS, '{"price": 1}', TEMPLATE) is None
+    # Derived from the parameter, so it follows the url on replay
+    calls = [scrape(PARAMS["url"]), scrape(PARAMS["url"] + "/history")]
+    assert cache.record("key", calls, PARAMS, '{"price": 1}', TEMPLATE) is not None
+    # Written in the template, so the same for every run
+    template = TEMPLATE + " Also check https://www.nasdaq.com/market-activity."
+    calls = [scrape(PARAMS["url"]), scrape("https://www.nasdaq.com/market-activity")]
+    assert cache.record("key", calls, PARAMS, '{"price": 1}', template) is not None
+
+
+class _Connector:
+    def __init__(self):
+        self.tools = [SimpleNamespace(name="scrape_as_markdown")]
+        self.calls = []
+
+    async def call_tool(self, name, arguments):
+        self.calls.append((name, arguments))
+        return SimpleNamespace(content=[SimpleNamespace(text="x" * 1000)], isError=False)
+
+
+class _LLM:
+    async def ainvoke(self, messages):
+        return SimpleNamespace(content=json.dumps({"price": 2}))
+
+
+def test_replay_uses_the_clients_sessions():
+    connector = _Connector()
+    client = SimpleNamespace(get_all_active_sessions=lambda: {"Bright Data": SimpleNamespace(connector=connector)})
+    # Initialized on running sessions, agent.connectors stays empty
+    agent = SimpleNamespace(client=client, connectors=[], llm=_LLM())
+    plan = Plan([PlanStep("scrape_as_markdown", {"url": "${url}"}, 100)], answer_is_json=True, recorded_steps=1)
+    params = {"url": "https://finance.yahoo.com/quote/MSFT"}
+    answer = asyncio.run(replay(agent, plan, params, render(TEMPLATE, params)))
+    assert json.loads(answer) == {"price": 2}
+    assert connector.calls == [("scrape_as_markdown", params)]
+
+
+def test_recorder_sees_calls_served_from_the_tool_cache(monkeypatch):
+    from mcp.types import CallToolResult, TextContent
+
+    from mcp_agent import brightdata_mcp_agent
+    from mcp_agent.plan_cache import recorder
+    from mcp_agent.tool_cache import ToolCacheMiddleware, get_tool_cache
+
+    for name in ("BRIGHT_DATA_API_TOKEN", "WEB_UNLOCKER_ZONE", "BROWSER_AUTH"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("MCP_TOOL_CACHE", "memory")
+    get_tool_cache.cache_clear()
+    try:
+        middleware = brightdata_mcp_agent.get_mcp_client().middleware
+    finally:
+        get_tool_cache.cache_clear()
+    cache = next(item for item in middleware if isinstance(item, ToolCacheMiddleware))
+    assert middleware.index(recorder) < middleware.index(cache)
+
+    upstream = []
+
+    async def call_next(context):
+        upstream.append(context.params.name)
+        return CallToolResult(content=[TextContent(type="text", text="page")])
+
+    async def call(context):
+        return await recorder.on_call_tool(context, lambda inner: cache.on_call_tool(inner, call_next))
+
+    context = SimpleNamespace(connection_id="Bright Data",
+                              params=SimpleNamespace(name="scrape_as_markdown", arguments={"url": PARAMS["url"]}))
+
+    async def run():
+        await call(context)
+        with recorder.recording() as calls:
+            await call(context)
+        return calls
+
+    calls = asyncio.run(run())
+    assert upstream == ["scrape_as_markdown"]
+    assert [(item.tool, item.result_chars) for item in calls] == [("scrape_as_markdown", 4)]
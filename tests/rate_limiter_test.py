@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from tools.deadline import DeadlineExceeded
+from tools.rate_limiter import AIMDLimiter, RateLimiter, TokenBucket, is_overload
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code)
+
+
+def test_is_overload():
+    assert is_overload(_HTTPError(429))
+    assert is_overload(_HTTPError(503))
+    assert not is_overload(_HTTPError(404))
+    assert is_overload(Exception("429 Resource has been exhausted (e.g. check quota)."))
+    assert is_overload(Exception("Server returned status code: 503"))
+    assert is_overload(Exception("RESOURCE_EXHAUSTED"))
+    assert not is_overload(ValueError("bad json"))
+    assert not is_overload(ValueError("No price for product 4295031 ($429.00)"))
+    assert not is_overload(ValueError("Item currently unavailable"))
+
+
+def test_token_bucket_delays_past_the_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket._reserve() == 0.0
+    assert bucket._reserve() == 0.0
+    assert 0.05 < bucket._reserve() <= 0.1
+
+
+def test_aimd_grows_on_success_and_backs_off_on_overload():
+    limiter = AIMDLimiter(4, max_limit=8)
+    limiter.acquire()
+    limiter.release(0.1, overloaded=False)
+    assert limiter.limit == 4.25
+    limiter.acquire()
+    limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 2.125
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_woken_waiter_passes_the_slot_on():
+    async def run():
+        limiter = AIMDLimiter(1, max_limit=1)
+        await limiter.aacquire()
+        first = asyncio.create_task(limiter.aacquire())
+        second = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        limiter.release(0.01, overloaded=False)
+        # Cancelled after being woken, before it could take the slot
+        first.cancel()
+        await asyncio.wait_for(second, 1)
+        return first.cancelled(), limiter.in_flight
+
+    assert asyncio.run(run()) == (True, 1)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        limiter = AIMDLimiter(1, max_limit=1)
+        await limiter.aacquire()
+        waiter = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return len(limiter._async_waiters)
+
+    assert asyncio.run(run()) == 0
+
+
+def test_alimit_counts_overloads():
+    async def run():
+        limiter = RateLimiter("zone:test", initial_concurrency=2)
+        async with limiter.alimit() as call:
+            call.status = 503
+        try:
+            async with limiter.alimit():
+                raise _HTTPError(429)
+        except _HTTPError:
+            pass
+        return limiter.metrics()
+
+    metrics = asyncio.run(run())
+    assert metrics["calls"] == 2 and metrics["overloads"] == 2 and metrics["in_flight"] == 0
+
+
+def test_cancelled_and_deadline_calls_free_the_slot_without_adjusting():
+    async def run():
+        limiter = RateLimiter("zone:test", initial_concurrency=4)
+        started = asyncio.Event()
+
+        async def slow():
+            async with limiter.alimit():
+                started.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(slow())
+        await started.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        with pytest.raises(DeadlineExceeded):
+            async with limiter.alimit():
+                raise DeadlineExceeded("Deadline exceeded during the call")
+        return limiter
+
+    limiter = asyncio.run(run())
+    with pytest.raises(DeadlineExceeded):
+        with limiter.limit():
+            raise DeadlineExceeded("Deadline exceeded during the call")
+    assert limiter.concurrency.limit == 4
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.calls == 0 and limiter.concurrency.latency is None
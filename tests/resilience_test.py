@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from tools.deadline import DeadlineExceeded, deadline
+from tools.resilience import (CircuitBreaker, CircuitOpenError, RetryBudget, RetryPolicy, acall_with_retry,
+                              call_with_retry)
+
+POLICY = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0, retryable=lambda e: isinstance(e, ConnectionError))
+
+
+def failing(times: int, result="ok", error=ConnectionError):
+    calls = []
+
+    def fn():
+        calls.append(len(calls))
+        if len(calls) <= times:
+            raise error("down")
+        return result
+
+    return fn, calls
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_retries_retryable_errors():
+    fn, calls = failing(2)
+    assert call_with_retry(fn, POLICY) == "ok"
+    assert len(calls) == 3
+
+
+def test_final_errors_are_not_retried():
+    fn, calls = failing(1, error=ValueError)
+    with pytest.raises(ValueError):
+        call_with_retry(fn, POLICY)
+    assert len(calls) == 1
+
+
+def test_budget_caps_retries():
+    budget = RetryBudget(ratio=0, min_tokens=1)
+    budget.tokens = 0
+    fn, calls = failing(2)
+    with pytest.raises(ConnectionError):
+        call_with_retry(fn, POLICY, budget=budget)
+    assert len(calls) == 1 and budget.exhausted == 1
+
+
+def test_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    fn, calls = failing(10)
+    with pytest.raises(ConnectionError):
+        call_with_retry(fn, RetryPolicy(max_attempts=2, base_delay=0, retryable=POLICY.retryable), breaker)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(fn, POLICY, breaker)
+    assert len(calls) == 2
+
+
+def test_half_open_probe_closes_the_breaker():
+    breaker = open_breaker()
+    assert breaker.state == "half_open"
+    assert call_with_retry(lambda: "ok", POLICY, breaker) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_deadline_does_not_count_as_a_failure():
+    breaker = open_breaker()
+
+    def fn():
+        raise DeadlineExceeded("out of time")
+
+    with pytest.raises(DeadlineExceeded):
+        call_with_retry(fn, POLICY, breaker)
+    assert breaker.failures == 1 and not breaker._probing
+
+
+def test_cancelled_probe_releases_the_half_open_slot():
+    breaker = open_breaker()
+
+    async def run():
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        probe = asyncio.create_task(acall_with_retry(slow, POLICY, breaker))
+        await started.wait()
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+        async def ok():
+            return "ok"
+
+        return await acall_with_retry(ok, POLICY, breaker)
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_interrupted_sync_probe_releases_the_half_open_slot():
+    breaker = open_breaker()
+
+    def fn():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        call_with_retry(fn, POLICY, breaker)
+    assert not breaker._probing
+    assert call_with_retry(lambda: "ok", POLICY, breaker) == "ok"
+
+
+class _RetryLater(ConnectionError):
+    response = type("Response", (), {"headers": {"Retry-After": "120"}})()
+
+
+def test_retry_skipped_when_backoff_outlasts_the_deadline():
+    fn, calls = failing(1, error=_RetryLater)
+    policy = RetryPolicy(max_attempts=3, max_delay=120, retryable=POLICY.retryable)
+    with deadline(60), pytest.raises(_RetryLater):
+        call_with_retry(fn, policy)
+    assert len(calls) == 1
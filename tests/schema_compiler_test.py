@@ -0,0 +1,60 @@
+import pytest
+from langchain_google_genai._function_utils import _dict_to_gapic_schema
+
+from tools.schema_compiler import SchemaSyntaxError, compile_schema, try_compile_schema
+
+LISTINGS = """
+{
+    listings[] {
+        name
+        rating(in stars)
+        listing_agent { name, phone }
+    }
+}
+"""
+FINANCIAL = '{"company": {"name": "string"}, "stock_quote": {"price": "float", "exchange": "string (e.g., NASDAQ)"}}'
+
+
+def test_parses_agentql_schema():
+    listings = compile_schema(LISTINGS).root.children[0]
+    assert listings.name == "listings" and listings.is_list
+    assert [child.name for child in listings.children] == ["name", "rating", "listing_agent"]
+    assert listings.children[1].hint == "in stars"
+    assert [child.name for child in listings.children[2].children] == ["name", "phone"]
+
+
+def test_parses_json_schema_sketch():
+    price = compile_schema(FINANCIAL).root.children[1].children[0]
+    assert (price.name, price.type) == ("price", "number")
+
+
+@pytest.mark.parametrize("prose", ["Extract the product name and price", "name, price", ""])
+def test_prose_is_not_compiled(prose):
+    assert try_compile_schema(prose) is None
+    with pytest.raises(SchemaSyntaxError):
+        compile_schema(prose)
+
+
+def test_unbalanced_schema_is_an_error():
+    assert try_compile_schema("{ listings[] { name }") is None
+
+
+def test_validate_accepts_missing_values():
+    compiled = compile_schema(FINANCIAL)
+    assert compiled.validate({"company": {"name": "ACME"}, "stock_quote": {"price": None, "exchange": "n/a"}}) == []
+    assert compiled.validate({"company": {"name": "ACME"}, "stock_quote": {"price": "high"}}) == [
+        "$.stock_quote.price: expected a number", "$.stock_quote.exchange: missing"]
+
+
+def test_leaves_stay_nullable_through_the_gemini_converter():
+    gapic = _dict_to_gapic_schema(compile_schema(FINANCIAL).json_schema())
+    price = gapic.properties["stock_quote"].properties["price"]
+    assert price.nullable
+    assert price.type_.name == "NUMBER"
+    exchange = gapic.properties["stock_quote"].properties["exchange"]
+    assert exchange.nullable and exchange.description == "e.g., NASDAQ"
+
+    gapic = _dict_to_gapic_schema(compile_schema(LISTINGS).json_schema())
+    item = gapic.properties["listings"].items
+    assert item.properties["rating"].nullable
+    assert item.properties["listing_agent"].properties["phone"].nullable
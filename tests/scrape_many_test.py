@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.fake_brightdata import FakeBrightDataServer
+from benchmarks.fake_llm import FakeChatModel, listing_response
+from tools import brightdataql_scraper_agent
+from tools.brightdataql_scraper_agent import BrightQLAgentScraperTool
+from tools.http_pool import aclose_async_clients
+
+SCHEMA = "{ listings[] { title price } }"
+
+
+class _CountingModel(FakeChatModel):
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    cancelled: int = 0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+def _url(i: int) -> str:
+    return f"https://shop.example.com/search?q=scrape-many&page={i}"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeBrightDataServer(latency=0.05, records=3).start()
+    monkeypatch.setattr(brightdataql_scraper_agent, "BRIGHT_DATA_REQUEST_URL", server.url)
+    for name in ("CONTENT_CACHE_DIR", "EXTRACTION_MEMO", "EXTRACTION_RECIPES"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("BRIGHT_DATA_API_TOKEN", "test")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setenv("GOOGLE_GEMINI_MODEL_NAME", "gemini-scrape-many-test")
+    yield server
+    server.stop()
+
+
+def _tool(latency: float = 0.05) -> BrightQLAgentScraperTool:
+    tool = BrightQLAgentScraperTool(bright_token="test", gemini_token="test")
+    tool._extractor.model = _CountingModel(response=listing_response(3), latency=latency)
+    fetch = tool._bright.afetch_markdown
+
+    async def distinct_page(url):
+        # The fake serves the same page for every url, and identical
+        # concurrent extractions would be coalesced into one model call
+        return f"{await fetch(url)}\n{url}"
+
+    tool._bright.afetch_markdown = distinct_page
+    return tool
+
+
+async def _collect(tool, urls, **kwargs) -> list:
+    try:
+        return [scraped async for scraped in tool.scrape_many(urls, SCHEMA, **kwargs)]
+    finally:
+        await aclose_async_clients()
+
+
+def test_fetches_and_extractions_stay_within_their_limits(server):
+    tool = _tool()
+    urls = [_url(i) for i in range(12)]
+    results = asyncio.run(_collect(tool, urls, fetch_concurrency=3, extract_concurrency=2))
+    assert sorted(result.url for result in results) == sorted(urls)
+    assert all(result.ok and len(json.loads(result.result)["listings"]) == 3 for result in results)
+    assert server.requests == 12
+    assert 1 < server.peak_in_flight <= 3
+    assert tool._extractor.model.calls == 12
+    assert tool._extractor.model.peak_in_flight == 2
+
+
+def test_results_are_yielded_as_they_complete(server):
+    server.latencies = {_url(0): 0.4}
+    tool = _tool(latency=0.01)
+    results = asyncio.run(_collect(tool, [_url(i) for i in range(4)], fetch_concurrency=4, extract_concurrency=4))
+    assert [result.url for result in results][-1] == _url(0)
+    assert {result.url for result in results[:3]} == {_url(1), _url(2), _url(3)}
+
+
+def test_closing_the_batch_cancels_pending_work(server):
+    tool = _tool(latency=0.5)
+
+    async def run():
+        batch = tool.scrape_many([_url(i) for i in range(20)], SCHEMA, fetch_concurrency=2, extract_concurrency=2)
+        first = await batch.__anext__()
+        await batch.aclose()
+        await asyncio.sleep(0.3)
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await aclose_async_clients()
+        return first, others
+
+    first, others = asyncio.run(run())
+    assert first.ok
+    assert others == []
+    assert tool._extractor.model.cancelled >= 1
+    # Nothing was fetched after the batch was closed
+    assert server.requests <= 4
@@ -0,0 +1,94 @@
+import asyncio
+
+from mcp_agent.server_pool import ServerPool
+
+
+def make_pool(check=None, **options):
+    created, closed = [], []
+
+    async def create():
+        created.append(len(created))
+        return created[-1]
+
+    async def close(resource):
+        closed.append(resource)
+
+    return ServerPool(create, close, check=check, idle_timeout=0, **options), created, closed
+
+
+def test_lease_reuses_returned_resource():
+    async def run():
+        pool, created, _ = make_pool(max_sessions=1)
+        async with pool.lease() as first:
+            pass
+        async with pool.lease() as second:
+            pass
+        return first, second, pool.stats
+
+    first, second, stats = asyncio.run(run())
+    assert first == second == 0
+    assert stats["created"] == 1 and stats["reused"] == 1
+
+
+def test_unhealthy_resource_is_replaced():
+    async def check(resource):
+        return False
+
+    async def run():
+        pool, created, closed = make_pool(check=check, max_sessions=1)
+        async with pool.lease():
+            pass
+        async with pool.lease() as resource:
+            pass
+        return resource, closed, pool.size
+
+    resource, closed, size = asyncio.run(run())
+    assert resource == 1
+    assert closed == [0]
+    assert size == 1
+
+
+def test_lease_cancelled_during_health_check_keeps_the_slot():
+    checking = asyncio.Event()
+
+    async def check(resource):
+        checking.set()
+        await asyncio.sleep(10)
+        return True
+
+    async def run():
+        pool, _, _ = make_pool(check=check, max_sessions=1, check_timeout=0.2)
+        async with pool.lease():
+            pass
+        waiter = asyncio.create_task(pool.lease().__aenter__())
+        await checking.wait()
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        assert pool.size == 1 and pool.idle == 1
+        # The check times out this time, so the session is replaced rather than hanging
+        async with asyncio.timeout(2):
+            async with pool.lease() as resource:
+                return resource
+
+    assert asyncio.run(run()) == 1
+
+
+def test_waiter_gets_returned_resource():
+    async def run():
+        pool, _, _ = make_pool(max_sessions=1)
+        order = []
+
+        async def use(name, hold):
+            async with pool.lease() as resource:
+                order.append((name, resource))
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(use("a", 0.05), use("b", 0))
+        return order, pool.stats
+
+    order, stats = asyncio.run(run())
+    assert order == [("a", 0), ("b", 0)]
+    assert stats["created"] == 1
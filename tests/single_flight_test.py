@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tools.deadline import DeadlineExceeded, bounded, deadline
+from tools.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "page"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("url", fetch)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do("url", fetch))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+    assert results == ["page"] * 4
+    assert len(calls) == 1
+    assert flights.stats() == {"calls": 4, "shared": 3}
+
+
+def test_errors_are_shared_and_nothing_is_cached():
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        flights.do("url", fail)
+    assert flights.do("url", lambda: "ok") == "ok"
+
+
+def test_async_calls_share_one_task():
+    flights = SingleFlight()
+    calls = []
+
+    async def extract():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"a": 1}
+
+    async def run():
+        return await asyncio.gather(*(flights.ado(("hash", "schema"), extract) for _ in range(5)))
+
+    assert asyncio.run(run()) == [{"a": 1}] * 5
+    assert len(calls) == 1
+
+
+def test_cancelling_the_first_caller_keeps_the_call_for_others():
+    flights = SingleFlight()
+
+    async def extract():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flights.ado("key", extract))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.ado("key", extract))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(run()) == ("done", True)
+
+
+def test_follower_with_time_left_reruns_after_the_leaders_deadline():
+    flights = SingleFlight()
+    calls = []
+
+    async def extract():
+        calls.append(1)
+        await bounded(asyncio.sleep(0.2), "the extraction")
+        return "done"
+
+    async def leader():
+        with deadline(0.05):
+            return await flights.ado("key", extract)
+
+    async def run():
+        first = asyncio.create_task(leader())
+        await asyncio.sleep(0)
+        # No deadline of its own, so the leader's must not apply to it
+        second = asyncio.create_task(flights.ado("key", extract))
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        return [type(result).__name__ if isinstance(result, BaseException) else result for result in results]
+
+    assert asyncio.run(run()) == ["DeadlineExceeded", "done"]
+    assert len(calls) == 2
+
+
+def test_follower_stops_waiting_at_its_own_deadline():
+    flights = SingleFlight()
+
+    async def extract():
+        await asyncio.sleep(0.3)
+        return "done"
+
+    async def follower():
+        with deadline(0.05):
+            return await flights.ado("key", extract)
+
+    async def run():
+        first = asyncio.create_task(flights.ado("key", extract))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await follower()
+        return await first
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_sync_follower_reruns_after_the_leaders_deadline():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        if len(calls) == 1:
+            raise DeadlineExceeded("Deadline exceeded during the fetch")
+        return "page"
+
+    results = []
+
+    def leader():
+        try:
+            with deadline(0.05):
+                flights.do("url", fetch)
+        except DeadlineExceeded as e:
+            results.append(type(e).__name__)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait()
+    results.append(flights.do("url", fetch))
+    thread.join()
+    assert sorted(results) == ["DeadlineExceeded", "page"]
+    assert len(calls) == 2
+
+
+def test_cancelling_every_caller_cancels_the_call():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def extract():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        caller = asyncio.create_task(flights.ado("key", extract))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0)
+        return dict(flights._tasks), list(cancelled)
+
+    assert asyncio.run(run()) == ({}, [True])
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from logfire.sampling import SpanLevel
+
+from observability.telemetry import Redactor, TelemetryConfig, _httpx_hooks
+
+TOKEN = "bd-secret-token-123"
+
+
+class _Span:
+    def __init__(self):
+        self.attributes = {}
+
+    def set_attribute(self, name, value):
+        self.attributes[name] = value
+
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+
+
+class _Response:
+    def __init__(self, status_code: int, content: bytes):
+        self.response = httpx.Response(status_code, content=content, headers={"set-cookie": "session=abc"})
+        self.status_code = status_code
+        self.headers = self.response.headers
+
+    def on_response_read(self, read):
+        read(self.span)
+
+
+def _call(config, status_code=503):
+    request = httpx.Request("POST", f"https://api.brightdata.com/request?api_key={TOKEN}&zone=unlocker",
+                            headers={"Authorization": f"Bearer {TOKEN}"}, json={"url": "https://a.test", "token": TOKEN})
+    response = _Response(status_code, f"bad token {TOKEN}".encode())
+    request_hook, response_hook, _, _ = _httpx_hooks(config, Redactor(config))
+    span = response.span = _Span()
+    request_hook(span, request)
+    response_hook(span, request, response)
+    return span.attributes
+
+
+@pytest.fixture(autouse=True)
+def token(monkeypatch):
+    monkeypatch.setenv("BRIGHT_DATA_API_TOKEN", TOKEN)
+
+
+@pytest.mark.parametrize("mode", ["sampled", "full"])
+def test_span_attributes_never_contain_the_token(mode):
+    attributes = _call(TelemetryConfig(mode=mode))
+    assert attributes["http.url"] == "https://api.brightdata.com/request?api_key=[REDACTED]&zone=unlocker"
+    assert attributes["http.request.header.authorization"] == "[REDACTED]"
+    assert attributes["http.response.header.set-cookie"] == "[REDACTED]"
+    assert "https://a.test" in attributes["http.request.body.text"]
+    assert attributes["http.response.body.text"] == "bad token [REDACTED]"
+    assert not any(TOKEN in str(value) for value in attributes.values())
+
+
+def test_sampled_mode_captures_bodies_of_failed_requests_only():
+    attributes = _call(TelemetryConfig(mode="sampled"), status_code=200)
+    assert set(attributes) == {"http.url"}
+    assert "http.request.body.text" in _call(TelemetryConfig(mode="full"), status_code=200)
+
+
+def test_redactor_truncates_bodies_and_applies_extra_patterns():
+    redactor = Redactor(TelemetryConfig(max_body_bytes=16, redact_patterns=(r"acct-\d+",)))
+    assert redactor.body(b"acct-42 " + b"x" * 100) == "[REDACTED] xxxxxxxx... [truncated 92 bytes]"
+    assert redactor.url("https://generativelanguage.googleapis.com/v1?key=AIza123") == \
+        "https://generativelanguage.googleapis.com/v1?key=[REDACTED]"
+
+
+def test_sampled_mode_keeps_slow_and_failed_traces_and_samples_the_rest():
+    config = TelemetryConfig(mode="sampled", head_sample_rate=0.5, slow_trace_seconds=2, background_rate=0.1)
+    sampling = config.sampling()
+    assert sampling.head == 0.5
+    rate = sampling.tail
+    assert rate(SimpleNamespace(duration=0.1, level=SpanLevel(9))) == 0.1
+    assert rate(SimpleNamespace(duration=3.0, level=SpanLevel(9))) == 1.0
+    assert rate(SimpleNamespace(duration=0.1, level=SpanLevel(17))) == 1.0
+
+
+def test_full_mode_keeps_every_trace_after_head_sampling():
+    sampling = TelemetryConfig(mode="full", head_sample_rate=0.25).sampling()
+    assert sampling.head == 0.25
+    assert sampling.tail is None
+
+
+def test_mode_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("TELEMETRY_MODE", "off")
+    assert not TelemetryConfig.from_env().enabled
+    monkeypatch.setenv("TELEMETRY_MODE", "verbose")
+    with pytest.raises(ValueError):
+        TelemetryConfig.from_env()
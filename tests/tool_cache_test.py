@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from mcp_agent import tool_cache
+from mcp_agent.tool_cache import ToolResultCache, get_tool_cache
+from observability.pipeline_metrics import pipeline_metrics
+
+
+class _Server:
+    def __init__(self):
+        self.calls = []
+
+    def call(self, cache, tool, arguments, session="session"):
+        async def call_next():
+            self.calls.append(tool)
+            return {"tool": tool, "call": len(self.calls)}
+
+        return asyncio.run(cache.call(session, tool, arguments, call_next, dump=lambda result: result,
+                                      load=lambda data: data, is_error=lambda result: False))
+
+
+def test_results_are_reused_until_their_ttl_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tool_cache.time, "time", lambda: now[0])
+    cache = ToolResultCache(ttls={"scrape_as_markdown": 60})
+    server = _Server()
+    assert server.call(cache, "scrape_as_markdown", {"url": "https://a.test"})["call"] == 1
+    now[0] += 59
+    assert server.call(cache, "scrape_as_markdown", {"url": "https://a.test"})["call"] == 1
+    now[0] += 2
+    assert server.call(cache, "scrape_as_markdown", {"url": "https://a.test"})["call"] == 2
+    assert cache.stats()["tools"]["scrape_as_markdown"]["hits"] == 1
+    assert cache.stats()["tools"]["scrape_as_markdown"]["misses"] == 2
+
+
+@pytest.mark.parametrize("tool,arguments", [
+    ("scraping_browser_click", {"selector": "#next"}),
+    ("scraping_browser_type", {"selector": "#q", "text": "flights"}),
+])
+def test_page_changing_browser_tools_are_never_cached(tool, arguments):
+    cache = ToolResultCache(ttls={**tool_cache.DEFAULT_TOOL_TTLS, tool: 600})
+    server = _Server()
+    server.call(cache, "scraping_browser_navigate", {"url": "https://a.test"})
+    server.call(cache, tool, arguments)
+    server.call(cache, tool, arguments)
+    assert server.calls.count(tool) == 2
+    assert cache.stats()["tools"][tool]["bypassed"] == 2
+
+
+def test_browser_reads_go_to_the_server_after_a_click():
+    cache = ToolResultCache()
+    server = _Server()
+    server.call(cache, "scraping_browser_navigate", {"url": "https://a.test"})
+    server.call(cache, "scraping_browser_get_text", {})
+    server.call(cache, "scraping_browser_get_text", {})
+    server.call(cache, "scraping_browser_click", {"selector": "#next"})
+    server.call(cache, "scraping_browser_get_text", {})
+    assert server.calls.count("scraping_browser_get_text") == 2
+
+
+def test_process_wide_cache_stats_are_exported(monkeypatch):
+    monkeypatch.setenv("MCP_TOOL_CACHE", "memory")
+    get_tool_cache.cache_clear()
+    try:
+        server = _Server()
+        server.call(get_tool_cache(), "search_engine", {"query": "flights"})
+        server.call(get_tool_cache(), "search_engine", {"query": "flights"})
+        assert pipeline_metrics.collected()["tool_cache"]["search_engine"]["hits"] == 1
+        assert 'brightdataql_tool_cache_hits_total{tool="search_engine"} 1' in pipeline_metrics.render_prometheus()
+    finally:
+        get_tool_cache.cache_clear()
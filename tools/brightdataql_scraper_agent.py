@@ -1,5 +1,12 @@
 import os
-import requests
+import json
+import time
+import asyncio
+import contextvars
+import httpx
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, Iterator
 from pydantic import PrivateAttr, Field
 from dataclasses import dataclass
 from langchain.agents import Tool, initialize_agent
@@ -7,12 +14,81 @@ from langchain.agents.agent import AgentType
 from langchain.tools import BaseTool
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from observability.pipeline_metrics import pipeline_labels, stage
+from tools.chunked_extraction import merge_results, parse_json_result, split_document
+from tools.content_cache import ContentCache
+from tools.deadline import bounded, check as check_deadline, timeout as deadline_timeout
+from tools.extraction_memo import ExtractionMemo, memo_key
+from tools.extraction_recipes import RecipeStore
+from tools.html_pruner import HTMLPruner
+from tools.json_stream import JSONRecordStream, records_from_document
+from tools.http_pool import PoolConfig, get_async_client, get_session
+from tools.rate_limiter import RateLimiter, get_limiter
+from tools.resilience import (RetryPolicy, acall_with_retry, call_with_retry, get_breaker, get_retry_budget,
+                              is_retryable_llm_error, is_retryable_unlocker_error)
+from tools.schema_compiler import try_compile_schema
+from tools.single_flight import SingleFlight
+
+BRIGHT_DATA_REQUEST_URL = os.getenv("BRIGHT_DATA_API_URL", "https://api.brightdata.com/request")
+BATCH_FETCH_CONCURRENCY = int(os.getenv("BATCH_FETCH_CONCURRENCY") or 16)
+BATCH_EXTRACT_CONCURRENCY = int(os.getenv("BATCH_EXTRACT_CONCURRENCY") or 4)
+EXTRACTION_CHUNK_CHARS = int(os.getenv("EXTRACTION_CHUNK_CHARS") or 100000)
+EXTRACTION_CHUNK_OVERLAP = int(os.getenv("EXTRACTION_CHUNK_OVERLAP") or 2000)
+EXTRACTION_CHUNK_WORKERS = int(os.getenv("EXTRACTION_CHUNK_WORKERS") or 4)
+EXTRACTION_STRUCTURED_OUTPUT = os.getenv("EXTRACTION_STRUCTURED_OUTPUT", "1").lower() not in ("0", "false", "no")
+
+# Concurrent identical fetches (zone, url, format) and extractions (content
+# and schema digest) share one upstream call across every tool in the process
+fetch_flights = SingleFlight()
+extract_flights = SingleFlight()
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or url
+
+
+def _record_usage(llm, usage: dict):
+    if usage:
+        llm.add("prompt_tokens", usage.get("input_tokens", 0))
+        llm.add("completion_tokens", usage.get("output_tokens", 0))
+
+
+def _parse_result(content: str):
+    """
+    The model's JSON answer parsed (None when it isn't JSON), timed as the
+    parse stage.
+    """
+    with stage("parse", chunks=1) as parse:
+        parsed = parse_json_result(content)
+        parse.add("bytes", len(content or ""))
+        parse.set(valid=parsed is not None)
+        return parsed
+
+
+def _finish_stream(stream: JSONRecordStream) -> list:
+    # Records are parsed as the model streams them; the stage times what is
+    # left at the end and counts the bytes of the whole answer
+    with stage("parse", chunks=1, streaming=True) as parse:
+        records = stream.finish()
+        parse.add("bytes", len(stream.text))
+        parse.set(valid=bool(stream.emitted or records))
+        return records
+
+
 class BrightDataWebUnlocker:
-    def __init__(self, api_token, zone="web_unlocker1"):
+    def __init__(self, api_token, zone="web_unlocker1", pool_config: PoolConfig = None,
+                 cache: ContentCache = None, limiter: RateLimiter = None):
         self.api_token = api_token
         self.zone = zone
+        # Shared by every unlocker on the zone so concurrent callers throttle together
+        self.limiter = limiter or get_limiter("zone", zone)
+        self.retry_policy = RetryPolicy.from_env("UNLOCKER", is_retryable_unlocker_error)
+        self.retry_budget = get_retry_budget(f"zone:{zone}")
+        self.pool_config = pool_config or PoolConfig.from_env()
+        # Shared per process, so the keep-alive connections outlive this instance
+        self._session = get_session(self.pool_config)
+        self.cache = cache if cache is not None else ContentCache.from_env()
 
-    def fetch_html(self, target_url: str) -> str:
+    def _build_request(self, target_url: str, data_format: str):
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_token}"
@@ -21,34 +97,117 @@ class BrightDataWebUnlocker:
             "zone": self.zone,
             "url": target_url,
             "format": "raw",
-            "data_format": "html"
+            "data_format": data_format
         }
-        res = requests.post("https://api.brightdata.com/request", headers=headers, json=payload)
+        return headers, payload
+
+    def _timeout(self) -> tuple:
+        """
+        The pool's (connect, read) timeouts, capped at the request's deadline.
+        """
+        return (deadline_timeout(self.pool_config.connect_timeout, "the Web Unlocker request"),
+                deadline_timeout(self.pool_config.read_timeout, "the Web Unlocker request"))
+
+    def _post(self, headers: dict, payload: dict) -> str:
+        with self.limiter.limit() as call:
+            # requests has no total timeout; the read timeout bounds each wait for data
+            res = self._session.post(BRIGHT_DATA_REQUEST_URL, headers=headers, json=payload,
+                                     timeout=self._timeout())
+            call.status = res.status_code
         res.raise_for_status()
         return res.text
 
-    def fetch_markdown(self, target_url: str) -> str:
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_token}"
-        }
-        payload = {
-            "zone": self.zone,
-            "url": target_url,
-            "format": "raw",
-            "data_format": "markdown"
-        }
-        res = requests.post("https://api.brightdata.com/request", headers=headers, json=payload)
+    async def _apost(self, headers: dict, payload: dict) -> str:
+        client = get_async_client(self.pool_config)
+        async with self.limiter.alimit() as call:
+            connect, read = self._timeout()
+            res = await client.post(BRIGHT_DATA_REQUEST_URL, headers=headers, json=payload,
+                                    timeout=httpx.Timeout(read, connect=connect))
+            call.status = res.status_code
         res.raise_for_status()
         return res.text
 
+    def _fetch(self, target_url: str, data_format: str, on_retry=None) -> str:
+        headers, payload = self._build_request(target_url, data_format)
+        # Transient failures are retried with backoff; a target that keeps
+        # failing trips its host's breaker so later calls fail fast
+        text = call_with_retry(lambda: self._post(headers, payload), self.retry_policy,
+                               breaker=get_breaker(_host(target_url)), budget=self.retry_budget,
+                               on_retry=on_retry)
+        if self.cache:
+            self.cache.put(target_url, self.zone, data_format, text)
+        return text
+
+    async def _afetch(self, target_url: str, data_format: str, on_retry=None) -> str:
+        headers, payload = self._build_request(target_url, data_format)
+        # bounded() cancels an attempt still running when the deadline expires
+        text = await acall_with_retry(lambda: bounded(self._apost(headers, payload), "the Web Unlocker request"),
+                                      self.retry_policy, breaker=get_breaker(_host(target_url)),
+                                      budget=self.retry_budget, on_retry=on_retry)
+        if self.cache:
+            # Disk I/O, so off the event loop
+            await asyncio.to_thread(self.cache.put, target_url, self.zone, data_format, text)
+        return text
+
+    def _request(self, target_url: str, data_format: str) -> str:
+        with stage("fetch", domain=_host(target_url), format=data_format, zone=self.zone) as fetch:
+            text = self.cache.get(target_url, self.zone, data_format) if self.cache else None
+            if text is not None:
+                fetch.add("cache_hits")
+            else:
+                text = fetch_flights.do((self.zone, target_url, data_format),
+                                        lambda: self._fetch(target_url, data_format, fetch.on_retry))
+            fetch.add("bytes", len(text.encode("utf-8")))
+            return text
+
+    async def _arequest(self, target_url: str, data_format: str) -> str:
+        with stage("fetch", domain=_host(target_url), format=data_format, zone=self.zone) as fetch:
+            text = (await asyncio.to_thread(self.cache.get, target_url, self.zone, data_format)
+                    if self.cache else None)
+            if text is not None:
+                fetch.add("cache_hits")
+            else:
+                text = await fetch_flights.ado((self.zone, target_url, data_format),
+                                               lambda: self._afetch(target_url, data_format, fetch.on_retry))
+            fetch.add("bytes", len(text.encode("utf-8")))
+            return text
+
+    def fetch_html(self, target_url: str) -> str:
+        return self._request(target_url, "html")
+
+    def fetch_markdown(self, target_url: str) -> str:
+        return self._request(target_url, "markdown")
+
+    async def afetch_html(self, target_url: str) -> str:
+        return await self._arequest(target_url, "html")
+
+    async def afetch_markdown(self, target_url: str) -> str:
+        return await self._arequest(target_url, "markdown")
+
 class GeminiExtractor:
-    def __init__(self, model_name: str, gemini_api_key: str):
+    # Bump whenever build_prompt changes so memoized results are not reused
+    PROMPT_VERSION = "2"
+
+    def __init__(self, model_name: str, gemini_api_key: str, memo: ExtractionMemo = None,
+                 limiter: RateLimiter = None):
         # Use the provided gemini_api_key here for the model init
-        self.model = ChatGoogleGenerativeAI(model=model_name, temperature=0, api_key=gemini_api_key)
+        self.model_name = model_name
+        # One attempt per call: retries go through retry_policy, which counts
+        # them against the breaker and budget and respects the deadline
+        self.model = ChatGoogleGenerativeAI(model=model_name, temperature=0, api_key=gemini_api_key, max_retries=1)
+        self.memo = memo if memo is not None else ExtractionMemo.from_env()
+        self.limiter = limiter or get_limiter("model", model_name)
+        self.retry_policy = RetryPolicy.from_env("LLM", is_retryable_llm_error, base_delay=1.0, max_delay=20.0)
+        self.breaker = get_breaker(f"model:{model_name}")
+        self.retry_budget = get_retry_budget(f"model:{model_name}")
 
-    def extract_with_schema(self, text: str, schema: str) -> str:
-        prompt = f"""
+    def build_prompt(self, text: str, schema: str) -> str:
+        # Compiled schemas are rendered canonically so the model sees the
+        # same compact text for equivalent schemas
+        compiled = try_compile_schema(schema)
+        if compiled:
+            schema = compiled.render_prompt()
+        return f"""
         You are a structured data extractor.
 
         Extract structured content from the Context below using the schema:
@@ -59,9 +218,196 @@ class GeminiExtractor:
 
         {text}
         """
-        response = self.model.invoke(prompt)
+
+    def _memo_lookup(self, text: str, schema: str):
+        if not self.memo:
+            return None, None
+        key = memo_key(text, schema, self.model_name, self.PROMPT_VERSION)
+        cached = self.memo.get(key)
+        if cached is not None:
+            with stage("llm", schema=schema, model=self.model_name) as llm:
+                llm.add("cache_hits")
+        return key, cached
+
+    @staticmethod
+    def _structured_output_kwargs(schema: str) -> dict:
+        compiled = try_compile_schema(schema) if EXTRACTION_STRUCTURED_OUTPUT else None
+        if not compiled:
+            return {}
+        return {"response_mime_type": "application/json", "response_schema": compiled.json_schema()}
+
+    @staticmethod
+    def _deadline_kwargs() -> dict:
+        # Gemini's own request timeout, so a call gives up at the deadline
+        seconds = deadline_timeout(what="the Gemini call")
+        return {} if seconds is None else {"timeout": seconds}
+
+    def _build(self, text: str, schema: str):
+        with stage("prompt", schema=schema) as prompt_stage:
+            prompt = self.build_prompt(text, schema)
+            kwargs = self._structured_output_kwargs(schema)
+            prompt_stage.add("bytes", len(prompt))
+        return prompt, kwargs
+
+    def _extract(self, text: str, schema: str, key: str) -> str:
+        prompt, kwargs = self._build(text, schema)
+
+        def invoke():
+            with self.limiter.limit():
+                return self.model.invoke(prompt, **kwargs, **self._deadline_kwargs())
+
+        with stage("llm", schema=schema, model=self.model_name) as llm:
+            response = call_with_retry(invoke, self.retry_policy, breaker=self.breaker, budget=self.retry_budget,
+                                       on_retry=llm.on_retry)
+            _record_usage(llm, response.usage_metadata)
+        if self.memo:
+            self.memo.set(key, response.content)
         return response.content
 
+    async def _aextract(self, text: str, schema: str, key: str) -> str:
+        prompt, kwargs = self._build(text, schema)
+
+        async def ainvoke():
+            async with self.limiter.alimit():
+                return await bounded(self.model.ainvoke(prompt, **kwargs, **self._deadline_kwargs()),
+                                     "the Gemini call")
+
+        with stage("llm", schema=schema, model=self.model_name) as llm:
+            response = await acall_with_retry(ainvoke, self.retry_policy, breaker=self.breaker,
+                                              budget=self.retry_budget, on_retry=llm.on_retry)
+            _record_usage(llm, response.usage_metadata)
+        if self.memo:
+            self.memo.set(key, response.content)
+        return response.content
+
+    def extract_with_schema(self, text: str, schema: str) -> str:
+        key, cached = self._memo_lookup(text, schema)
+        if cached is not None:
+            return cached
+        flight_key = key or memo_key(text, schema, self.model_name, self.PROMPT_VERSION)
+        return extract_flights.do(flight_key, lambda: self._extract(text, schema, key))
+
+    async def aextract_with_schema(self, text: str, schema: str) -> str:
+        key, cached = self._memo_lookup(text, schema)
+        if cached is not None:
+            return cached
+        flight_key = key or memo_key(text, schema, self.model_name, self.PROMPT_VERSION)
+        return await extract_flights.ado(flight_key, lambda: self._aextract(text, schema, key))
+
+    def stream_with_schema(self, text: str, schema: str) -> Iterator[str]:
+        """
+        Streaming variant of extract_with_schema: yields the response text as
+        the model produces it. A memoized result is yielded in one piece.
+        """
+        key, cached = self._memo_lookup(text, schema)
+        if cached is not None:
+            yield cached
+            return
+        pieces = []
+        prompt, kwargs = self._build(text, schema)
+        with stage("llm", schema=schema, attach=False, model=self.model_name, streaming=True) as llm, \
+                self.limiter.limit():
+            started = time.perf_counter()
+            for chunk in self.model.stream(prompt, **kwargs, **self._deadline_kwargs()):
+                check_deadline("the rest of the Gemini stream")
+                _record_usage(llm, chunk.usage_metadata)
+                if isinstance(chunk.content, str) and chunk.content:
+                    if not pieces:
+                        llm.set(first_token_seconds=time.perf_counter() - started)
+                    pieces.append(chunk.content)
+                    yield chunk.content
+        if self.memo:
+            self.memo.set(key, "".join(pieces))
+
+    async def astream_with_schema(self, text: str, schema: str) -> AsyncIterator[str]:
+        key, cached = self._memo_lookup(text, schema)
+        if cached is not None:
+            yield cached
+            return
+        pieces = []
+        prompt, kwargs = self._build(text, schema)
+        with stage("llm", schema=schema, attach=False, model=self.model_name, streaming=True) as llm:
+            async with self.limiter.alimit():
+                started = time.perf_counter()
+                async for chunk in self.model.astream(prompt, **kwargs, **self._deadline_kwargs()):
+                    check_deadline("the rest of the Gemini stream")
+                    _record_usage(llm, chunk.usage_metadata)
+                    if isinstance(chunk.content, str) and chunk.content:
+                        if not pieces:
+                            llm.set(first_token_seconds=time.perf_counter() - started)
+                        pieces.append(chunk.content)
+                        yield chunk.content
+        if self.memo:
+            self.memo.set(key, "".join(pieces))
+
+    def _chunk_texts(self, text: str, is_html: bool, max_chars: int, overlap_chars: int) -> list:
+        chunks = split_document(text, max_chars, overlap_chars, is_html)
+        return [
+            f"(Part {i} of {len(chunks)} of the page. Extract only the records present in this part "
+            f"and return them as JSON matching the schema.)\n\n{chunk}"
+            for i, chunk in enumerate(chunks, start=1)
+        ]
+
+    @staticmethod
+    def _reduce_chunks(contents: list) -> str:
+        with stage("parse", chunks=len(contents)) as parse:
+            parsed = [parse_json_result(content) for content in contents]
+            merged = merge_results([result for result in parsed if result is not None])
+            result = json.dumps(merged, indent=2, ensure_ascii=False)
+            parse.add("bytes", len(result))
+            return result
+
+    def extract_chunked(self, text: str, schema: str, is_html: bool = False, max_chars: int = None,
+                        overlap_chars: int = None, max_workers: int = None) -> str:
+        """
+        Map-reduce extraction for documents larger than max_chars: the text is
+        split on structural boundaries, every chunk is extracted concurrently
+        and the per-chunk JSON results are merged and de-duplicated.
+        """
+        max_chars = max_chars or EXTRACTION_CHUNK_CHARS
+        if len(text) <= max_chars:
+            result = self.extract_with_schema(text, schema)
+            _parse_result(result)
+            return result
+        chunks = self._chunk_texts(text, is_html, max_chars,
+                                   EXTRACTION_CHUNK_OVERLAP if overlap_chars is None else overlap_chars)
+        # Each chunk runs in a copy of the caller's context so its stages
+        # keep the caller's domain label
+        contexts = [contextvars.copy_context() for _ in chunks]
+        with ThreadPoolExecutor(max_workers=max_workers or EXTRACTION_CHUNK_WORKERS) as pool:
+            contents = list(pool.map(lambda context, chunk: context.run(self.extract_with_schema, chunk, schema),
+                                     contexts, chunks))
+        return self._reduce_chunks(contents)
+
+    async def aextract_chunked(self, text: str, schema: str, is_html: bool = False, max_chars: int = None,
+                               overlap_chars: int = None, max_workers: int = None) -> str:
+        max_chars = max_chars or EXTRACTION_CHUNK_CHARS
+        if len(text) <= max_chars:
+            result = await self.aextract_with_schema(text, schema)
+            _parse_result(result)
+            return result
+        chunks = self._chunk_texts(text, is_html, max_chars,
+                                   EXTRACTION_CHUNK_OVERLAP if overlap_chars is None else overlap_chars)
+        limit = asyncio.Semaphore(max_workers or EXTRACTION_CHUNK_WORKERS)
+
+        async def extract_chunk(chunk):
+            async with limit:
+                return await self.aextract_with_schema(chunk, schema)
+
+        contents = await asyncio.gather(*(extract_chunk(chunk) for chunk in chunks))
+        return self._reduce_chunks(contents)
+
+
+@dataclass
+class ScrapeResult:
+    url: str
+    result: str = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class BrightQLAgentScraperTool(BaseTool):
     name: str = Field(default="brightdata_agentql_scraper", description="Tool name")
@@ -74,6 +420,8 @@ class BrightQLAgentScraperTool(BaseTool):
 
     _bright: BrightDataWebUnlocker = PrivateAttr()
     _extractor: GeminiExtractor = PrivateAttr()
+    _pruner: HTMLPruner = PrivateAttr(default=None)
+    _recipes: RecipeStore = PrivateAttr(default=None)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -83,17 +431,183 @@ class BrightQLAgentScraperTool(BaseTool):
 
         self._bright = BrightDataWebUnlocker(api_token=bright_token)
         self._extractor = GeminiExtractor(gemini_model, gemini_token)
+        if os.getenv("HTML_PRUNE", "1").lower() not in ("0", "false", "no"):
+            self._pruner = HTMLPruner()
+        self._recipes = RecipeStore.from_env()
+
+    def _prune_html(self, html: str, url: str, verbose: bool = True) -> str:
+        if not self._pruner:
+            return html
+        with stage("preprocess", bytes_before=len(html)) as preprocess:
+            pruned, stats = self._pruner.prune(html, url)
+            preprocess.add("bytes", stats.bytes_after)
+        if verbose:
+            print(f"Pruned HTML from {stats.bytes_before} to {stats.bytes_after} bytes "
+                  f"(~{stats.tokens_before} -> ~{stats.tokens_after} tokens)")
+        return pruned
+
+    def _apply_recipe(self, url: str, agentql_schema: str, raw_html: str):
+        with stage("recipe") as recipe:
+            local = self._recipes.apply(url, agentql_schema, raw_html)
+            if local is not None:
+                recipe.add("cache_hits")
+            return local
 
     def _run(self, url: str, is_html: bool, agentql_schema: str) -> str:
-        print("Fetching page with Bright Data...")
-        if is_html:
-            html = self._bright.fetch_html(url)
-            print("Parsing with Gemini...")
-            return self._extractor.extract_with_schema(html, agentql_schema)
-        else:
-            markdown = self._bright.fetch_markdown(url)
+        with pipeline_labels(domain=_host(url), schema=agentql_schema):
+            print("Fetching page with Bright Data...")
+            if is_html:
+                raw_html = self._bright.fetch_html(url)
+                if self._recipes:
+                    local = self._apply_recipe(url, agentql_schema, raw_html)
+                    if local is not None:
+                        print("Extracted with a learned recipe")
+                        return local
+                html = self._prune_html(raw_html, url)
+                print("Parsing with Gemini...")
+                result = self._extractor.extract_chunked(html, agentql_schema, is_html=True)
+                if self._recipes:
+                    self._recipes.learn(url, agentql_schema, raw_html, result)
+                return result
+            else:
+                markdown = self._bright.fetch_markdown(url)
+                print("Parsing with Gemini...")
+                return self._extractor.extract_chunked(markdown, agentql_schema)
+
+    async def _arun(self, url: str, is_html: bool, agentql_schema: str) -> str:
+        with pipeline_labels(domain=_host(url), schema=agentql_schema):
+            print("Fetching page with Bright Data...")
+            if is_html:
+                raw_html = await self._bright.afetch_html(url)
+                if self._recipes:
+                    local = await asyncio.to_thread(self._apply_recipe, url, agentql_schema, raw_html)
+                    if local is not None:
+                        print("Extracted with a learned recipe")
+                        return local
+                # CPU-bound; off the event loop like the recipe work
+                content = await asyncio.to_thread(self._prune_html, raw_html, url)
+            else:
+                content = await self._bright.afetch_markdown(url)
             print("Parsing with Gemini...")
-            return self._extractor.extract_with_schema(markdown, agentql_schema)
+            result = await self._extractor.aextract_chunked(content, agentql_schema, is_html=is_html)
+            if is_html and self._recipes:
+                await asyncio.to_thread(self._recipes.learn, url, agentql_schema, raw_html, result)
+            return result
+
+    def stream_records(self, url: str, is_html: bool, agentql_schema: str) -> Iterator[tuple]:
+        """
+        Streaming variant of _run: yields (path, record) pairs, e.g.
+        ("listings", {...}), as soon as each record of the extraction result
+        is complete. Pages too large for one prompt are extracted chunked and
+        their records yielded once merged.
+        """
+        with pipeline_labels(domain=_host(url), schema=agentql_schema):
+            if is_html:
+                raw_html = self._bright.fetch_html(url)
+                if self._recipes:
+                    local = self._apply_recipe(url, agentql_schema, raw_html)
+                    if local is not None:
+                        yield from records_from_document(_parse_result(local))
+                        return
+                content = self._prune_html(raw_html, url, verbose=False)
+            else:
+                content = self._bright.fetch_markdown(url)
+            if len(content) > EXTRACTION_CHUNK_CHARS:
+                result = self._extractor.extract_chunked(content, agentql_schema, is_html=is_html)
+                yield from records_from_document(parse_json_result(result))
+            else:
+                stream = JSONRecordStream()
+                for piece in self._extractor.stream_with_schema(content, agentql_schema):
+                    yield from stream.feed(piece)
+                yield from _finish_stream(stream)
+                result = stream.text
+            if is_html and self._recipes:
+                self._recipes.learn(url, agentql_schema, raw_html, result)
+
+    async def astream_records(self, url: str, is_html: bool, agentql_schema: str) -> AsyncIterator[tuple]:
+        with pipeline_labels(domain=_host(url), schema=agentql_schema):
+            if is_html:
+                raw_html = await self._bright.afetch_html(url)
+                if self._recipes:
+                    local = await asyncio.to_thread(self._apply_recipe, url, agentql_schema, raw_html)
+                    if local is not None:
+                        for record in records_from_document(_parse_result(local)):
+                            yield record
+                        return
+                content = await asyncio.to_thread(self._prune_html, raw_html, url, False)
+            else:
+                content = await self._bright.afetch_markdown(url)
+            if len(content) > EXTRACTION_CHUNK_CHARS:
+                result = await self._extractor.aextract_chunked(content, agentql_schema, is_html=is_html)
+                for record in records_from_document(parse_json_result(result)):
+                    yield record
+            else:
+                stream = JSONRecordStream()
+                async for piece in self._extractor.astream_with_schema(content, agentql_schema):
+                    for record in stream.feed(piece):
+                        yield record
+                for record in _finish_stream(stream):
+                    yield record
+                result = stream.text
+            if is_html and self._recipes:
+                await asyncio.to_thread(self._recipes.learn, url, agentql_schema, raw_html, result)
+
+    async def _scrape_one(self, url: str, is_html: bool, agentql_schema: str,
+                          fetch_limit: asyncio.Semaphore, extract_limit: asyncio.Semaphore) -> ScrapeResult:
+        with pipeline_labels(domain=_host(url), schema=agentql_schema):
+            try:
+                async with fetch_limit:
+                    if is_html:
+                        content = await self._bright.afetch_html(url)
+                    else:
+                        content = await self._bright.afetch_markdown(url)
+                raw_html = content if is_html else None
+                if is_html and self._recipes:
+                    local = await asyncio.to_thread(self._apply_recipe, url, agentql_schema, raw_html)
+                    if local is not None:
+                        return ScrapeResult(url=url, result=local)
+                if is_html:
+                    content = await asyncio.to_thread(self._prune_html, content, url, False)
+                async with extract_limit:
+                    result = await self._extractor.aextract_chunked(content, agentql_schema, is_html=is_html)
+                if is_html and self._recipes:
+                    await asyncio.to_thread(self._recipes.learn, url, agentql_schema, raw_html, result)
+                return ScrapeResult(url=url, result=result)
+            except Exception as e:
+                return ScrapeResult(url=url, error=e)
+
+    async def scrape_many(self, urls: Iterable[str], agentql_schema: str, is_html: bool = False,
+                          fetch_concurrency: int = None,
+                          extract_concurrency: int = None) -> AsyncIterator[ScrapeResult]:
+        """
+        Scrapes every url against the same schema and yields a ScrapeResult
+        per url in completion order. Bright Data fetches and Gemini
+        extractions are bounded by separate limits; a failing url is reported
+        on its ScrapeResult and does not stop the batch.
+        """
+        fetch_concurrency = fetch_concurrency or BATCH_FETCH_CONCURRENCY
+        extract_concurrency = extract_concurrency or BATCH_EXTRACT_CONCURRENCY
+        fetch_limit = asyncio.Semaphore(fetch_concurrency)
+        extract_limit = asyncio.Semaphore(extract_concurrency)
+        # Only keep enough urls in flight to saturate both stages, so fetched
+        # pages don't pile up in memory waiting for an extraction slot.
+        max_in_flight = fetch_concurrency + extract_concurrency
 
-    async def _arun(self, *args, **kwargs):
-        raise NotImplementedError("Async not implemented")
+        pending = set()
+        url_iter = iter(urls)
+        try:
+            while True:
+                while len(pending) < max_in_flight:
+                    url = next(url_iter, None)
+                    if url is None:
+                        break
+                    pending.add(asyncio.ensure_future(
+                        self._scrape_one(url, is_html, agentql_schema, fetch_limit, extract_limit)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
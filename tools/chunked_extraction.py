@@ -0,0 +1,114 @@
+import re
+import json
+
+# Structural boundaries a chunk is allowed to end on
+_HTML_BOUNDARY = re.compile(r"(</(?:article|section|li|tr|div|ul|ol|table|p)>)", re.IGNORECASE)
+_MARKDOWN_BOUNDARY = re.compile(r"(\n(?=#{1,6} )|\n\s*\n)")
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+DEFAULT_KEY_FIELDS = ("url", "property_url", "job_url", "product_url", "link", "address", "id", "name", "title")
+MISSING_VALUES = (None, "", "n/a", "N/A")
+
+
+def _segments(text: str, is_html: bool) -> list:
+    pattern = _HTML_BOUNDARY if is_html else _MARKDOWN_BOUNDARY
+    parts = pattern.split(text)
+    # split() with a capturing group alternates text and boundary; keep each
+    # boundary attached to the segment it closes
+    segments = [parts[i] + (parts[i + 1] if i + 1 < len(parts) else "") for i in range(0, len(parts), 2)]
+    return [segment for segment in segments if segment]
+
+
+def split_document(text: str, max_chars: int, overlap_chars: int = 0, is_html: bool = False) -> list:
+    """
+    Splits text into chunks of at most max_chars on structural boundaries
+    (closing block tags for HTML, headings and blank lines for markdown).
+    The tail of each chunk is repeated at the start of the next one, up to
+    overlap_chars, so records straddling a boundary appear whole somewhere.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    segments = []
+    for segment in _segments(text, is_html):
+        # A single oversized segment gets a hard split
+        while len(segment) > max_chars:
+            segments.append(segment[:max_chars])
+            segment = segment[max_chars:]
+        segments.append(segment)
+
+    chunks = []
+    current = []
+    size = 0
+    for segment in segments:
+        if current and size + len(segment) > max_chars:
+            chunks.append("".join(current))
+            overlap = []
+            overlap_size = 0
+            for previous in reversed(current):
+                if overlap_size + len(previous) > overlap_chars or overlap_size + len(previous) + len(segment) > max_chars:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += len(previous)
+            current = overlap
+            size = overlap_size
+        current.append(segment)
+        size += len(segment)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def parse_json_result(content) -> object:
+    if not isinstance(content, str):
+        return None
+    try:
+        return json.loads(_CODE_FENCE.sub("", content.strip()))
+    except ValueError:
+        return None
+
+
+def _record_key(record, key_fields) -> str:
+    if isinstance(record, dict):
+        for field in key_fields:
+            value = record.get(field)
+            if value not in MISSING_VALUES:
+                return f"{field}:{str(value).strip().lower()}"
+    return json.dumps(record, sort_keys=True)
+
+
+def merge_results(results: list, key_fields=DEFAULT_KEY_FIELDS):
+    """
+    Merges per-chunk extraction results into one. Lists are concatenated and
+    de-duplicated by the first present key field (e.g. listings[] by url or
+    address); objects are merged field by field, preferring values that are
+    not "n/a".
+    """
+    merged = None
+    for result in results:
+        merged = _merge(merged, result, key_fields)
+    return merged
+
+
+def _merge(left, right, key_fields):
+    if left in MISSING_VALUES:
+        return right
+    if right in MISSING_VALUES:
+        return left
+    if isinstance(left, dict) and isinstance(right, dict):
+        merged = dict(left)
+        for key, value in right.items():
+            merged[key] = _merge(merged.get(key), value, key_fields)
+        return merged
+    if isinstance(left, list) and isinstance(right, list):
+        merged = list(left)
+        index = {_record_key(record, key_fields): i for i, record in enumerate(merged)}
+        for record in right:
+            key = _record_key(record, key_fields)
+            if key in index:
+                merged[index[key]] = _merge(merged[index[key]], record, key_fields)
+            else:
+                index[key] = len(merged)
+                merged.append(record)
+        return merged
+    return left
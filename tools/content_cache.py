@@ -0,0 +1,160 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+
+class CacheMissError(LookupError):
+    pass
+
+
+def parse_domain_ttls(value: str) -> dict:
+    """
+    Parses "zillow.com=600,finance.yahoo.com=60" into {"zillow.com": 600.0, ...}
+    """
+    ttls = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        domain, ttl = item.split("=", 1)
+        ttls[domain.strip().lower()] = float(ttl)
+    return ttls
+
+
+class ContentCache:
+    """
+    Byte-budgeted LRU cache of Web Unlocker responses on local disk, keyed by
+    (url, zone, data_format). Each entry is one file; its mtime is the fetch
+    time used for TTL checks and its atime is the last use used for eviction.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024, default_ttl: float = 3600,
+                 domain_ttls: dict = None, offline: bool = False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def from_env(cls):
+        cache_dir = os.getenv("CONTENT_CACHE_DIR", "")
+        if not cache_dir:
+            return None
+        return cls(
+            cache_dir=cache_dir,
+            max_bytes=int(os.getenv("CONTENT_CACHE_MAX_MB") or 512) * 1024 * 1024,
+            default_ttl=float(os.getenv("CONTENT_CACHE_TTL") or 3600),
+            domain_ttls=parse_domain_ttls(os.getenv("CONTENT_CACHE_DOMAIN_TTLS", "")),
+            offline=os.getenv("CONTENT_CACHE_OFFLINE", "").lower() in ("1", "true", "yes"),
+        )
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".cache"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((stat.st_atime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    def ttl_for(self, url: str) -> float:
+        host = (urlparse(url).hostname or "").lower()
+        # Most specific configured domain wins, e.g. finance.yahoo.com over yahoo.com
+        for domain in sorted(self.domain_ttls, key=len, reverse=True):
+            if host == domain or host.endswith("." + domain):
+                return self.domain_ttls[domain]
+        return self.default_ttl
+
+    @staticmethod
+    def _key(url: str, zone: str, data_format: str) -> str:
+        digest = hashlib.sha256(f"{zone}\n{data_format}\n{url}".encode("utf-8")).hexdigest()
+        return f"{digest}.cache"
+
+    def _remove(self, name: str):
+        size = self._entries.pop(name, 0)
+        self._total_bytes -= size
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except FileNotFoundError:
+            pass
+
+    def get(self, url: str, zone: str, data_format: str) -> str:
+        """
+        Returns the cached content, or None on a miss. In offline mode a miss
+        raises CacheMissError instead of letting the caller hit the network.
+        """
+        name = self._key(url, zone, data_format)
+        path = os.path.join(self.cache_dir, name)
+        with self._lock:
+            content = None
+            if name in self._entries and not os.path.exists(path):
+                self._remove(name)
+            if name in self._entries:
+                fetched_at = os.stat(path).st_mtime
+                if self.offline or time.time() - fetched_at <= self.ttl_for(url):
+                    with open(path, "r", encoding="utf-8") as f:
+                        content = f.read()
+                    # Touch atime only, mtime stays the fetch time
+                    os.utime(path, (time.time(), fetched_at))
+                    self._entries.move_to_end(name)
+                else:
+                    self._remove(name)
+            if content is not None:
+                self.hits += 1
+                return content
+            self.misses += 1
+        if self.offline:
+            raise CacheMissError(f"{url} ({data_format}) is not cached and the content cache is offline")
+        return None
+
+    def put(self, url: str, zone: str, data_format: str, content: str):
+        if self.ttl_for(url) <= 0:
+            return
+        name = self._key(url, zone, data_format)
+        path = os.path.join(self.cache_dir, name)
+        data = content.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(name)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._entries[name] = len(data)
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._entries):
+                self._remove(name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
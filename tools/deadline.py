@@ -0,0 +1,100 @@
+"""
+Request deadlines. An entry point (a service job, a Streamlit query, a demo
+run) sets one with deadline(seconds), and every layer below reads what is
+left of it from a context variable:
+
+- Web Unlocker requests and Gemini calls cap their timeouts at the remaining time
+- a retry whose backoff would outlast the deadline is not attempted
+- MCP tool calls and agent steps check it before they start
+- bounded() cancels an awaitable still running when the deadline expires
+
+Nested deadlines only ever shorten it, so a stage given deadline(30) inside
+a request with 10 seconds left still gets 10. Threads started with a copy
+of the context (chunked extraction, asyncio.to_thread) inherit it.
+"""
+import os
+import time
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Default for the demos and the Streamlit app; 0 means no deadline
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS") or 300)
+
+_expires_at = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Runs the block with at most seconds left; None or 0 keeps the
+    enclosing deadline, if any.
+    """
+    if not seconds:
+        yield
+        return
+    expires_at = time.monotonic() + seconds
+    current = _expires_at.get()
+    token = _expires_at.set(expires_at if current is None else min(current, expires_at))
+    try:
+        yield
+    finally:
+        _expires_at.reset(token)
+
+
+def remaining() -> float:
+    """
+    Seconds left before the deadline, None without one.
+    """
+    expires_at = _expires_at.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+def check(what: str = "the next step"):
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def timeout(default: float = None, what: str = "the next call") -> float:
+    """
+    default capped at the time left; raises DeadlineExceeded when there is none.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    return left if default is None else min(default, left)
+
+
+def allows(seconds: float) -> bool:
+    """
+    Whether waiting seconds (e.g. a retry backoff) still leaves time.
+    """
+    left = remaining()
+    return left is None or left > seconds
+
+
+async def bounded(awaitable, what: str = "the call"):
+    """
+    Awaits awaitable, cancelling it when the deadline expires first.
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError as e:
+        if remaining() > 0:
+            # A timeout of the call itself, not of the deadline
+            raise
+        raise DeadlineExceeded(f"Deadline exceeded during {what}") from e
@@ -0,0 +1,118 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _whitespace.sub(" ", text).strip()
+
+
+def memo_key(text: str, schema: str, model_name: str, prompt_version: str) -> str:
+    digest = hashlib.sha256()
+    for part in (normalize_text(text), normalize_text(schema), model_name or "", prompt_version):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class MemoBackend(ABC):
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str):
+        ...
+
+
+class InMemoryMemoBackend(MemoBackend):
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteMemoBackend(MemoBackend):
+    def __init__(self, path: str, table: str = "extractions"):
+        self.path = path
+        self.table = table
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+
+class ExtractionMemo:
+    """
+    Memoizes extraction results by a digest of (normalized page text,
+    normalized schema, model name, prompt version), so an unchanged page
+    is never sent to the model twice.
+    """
+
+    def __init__(self, backend: MemoBackend = None):
+        self.backend = backend or InMemoryMemoBackend()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        kind = os.getenv("EXTRACTION_MEMO", "").lower()
+        if kind == "memory":
+            return cls(InMemoryMemoBackend(int(os.getenv("EXTRACTION_MEMO_MAX_ENTRIES") or 10000)))
+        if kind == "sqlite":
+            return cls(SQLiteMemoBackend(os.getenv("EXTRACTION_MEMO_PATH") or ".cache/extractions.sqlite3"))
+        return None
+
+    def get(self, key: str):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value):
+        # Model content can also be a list of parts; only plain text is memoized
+        if isinstance(value, str):
+            self.backend.set(key, value)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
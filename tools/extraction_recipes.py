@@ -0,0 +1,448 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+from tools.chunked_extraction import parse_json_result
+from tools.html_pruner import VOID_TAGS
+from tools.schema_compiler import MISSING_VALUES, CompiledSchema, SchemaField, try_compile_schema
+
+_whitespace = re.compile(r"\s+")
+_IDENT = re.compile(r"^[A-Za-z][\w-]*$")
+_STEP = re.compile(r'^(?P<tag>[a-z0-9]+)?(?:#(?P<id>[\w-]+))?(?P<classes>(?:\.[\w-]+)*)'
+                   r'(?:\[(?P<attr>[\w-]+)="(?P<value>[^"]*)"\])?$')
+_URL_ATTRIBUTES = ("href", "src", "content")
+MAX_SELECTOR_DEPTH = 6
+
+
+def _normalize(text: str) -> str:
+    return _whitespace.sub(" ", text).strip().lower()
+
+
+class Element:
+    __slots__ = ("tag", "attrs", "parent", "children", "_text")
+
+    def __init__(self, tag: str, attrs: dict, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+        self._text = None
+
+    @property
+    def classes(self) -> list:
+        return (self.attrs.get("class") or "").split()
+
+    def text(self) -> str:
+        if self._text is None:
+            parts = [child if isinstance(child, str) else child.text() for child in self.children]
+            self._text = _whitespace.sub(" ", " ".join(parts)).strip()
+        return self._text
+
+    def iter(self):
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+                yield from child.iter()
+
+    def ancestors(self):
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+
+class _DomBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#root", {})
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, {name: value or "" for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        element = Element(tag, {name: value or "" for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(element)
+
+    def handle_endtag(self, tag):
+        # Close the nearest open element with this tag, tolerating unclosed children
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                return
+
+    def handle_data(self, data):
+        if data.strip() and self._stack[-1].tag not in ("script", "style"):
+            self._stack[-1].children.append(data)
+
+
+def parse_dom(html: str) -> Element:
+    builder = _DomBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _parse_step(step: str) -> dict:
+    match = _STEP.match(step)
+    if not match:
+        raise ValueError(f"Unsupported selector step {step!r}")
+    return {
+        "tag": match.group("tag"),
+        "id": match.group("id"),
+        "classes": [c for c in match.group("classes").split(".") if c],
+        "attr": match.group("attr"),
+        "value": match.group("value"),
+    }
+
+
+def _step_matches(element: Element, step: dict) -> bool:
+    if step["tag"] and element.tag != step["tag"]:
+        return False
+    if step["id"] and element.attrs.get("id") != step["id"]:
+        return False
+    if step["classes"] and not set(step["classes"]).issubset(element.classes):
+        return False
+    if step["attr"] and element.attrs.get(step["attr"]) != step["value"]:
+        return False
+    return True
+
+
+def select(scope: Element, selector: str) -> list:
+    """
+    Descendant-only CSS subset: "div.card span#price a[itemprop="url"]".
+    Returns matching descendants of scope in document order.
+    """
+    steps = [_parse_step(step) for step in selector.split()]
+    matches = []
+    for element in scope.iter():
+        if not _step_matches(element, steps[-1]):
+            continue
+        remaining = len(steps) - 2
+        for ancestor in element.ancestors():
+            if remaining < 0 or ancestor is scope:
+                break
+            if _step_matches(ancestor, steps[remaining]):
+                remaining -= 1
+        if remaining < 0:
+            matches.append(element)
+    return matches
+
+
+def _simple_selector(element: Element, bare: bool = True) -> str:
+    element_id = element.attrs.get("id", "")
+    if _IDENT.match(element_id) and not re.search(r"\d{3,}", element_id):
+        return f"{element.tag}#{element_id}"
+    selector = element.tag + "".join(f".{c}" for c in element.classes[:2] if _IDENT.match(c))
+    itemprop = element.attrs.get("itemprop", "")
+    if _IDENT.match(itemprop):
+        selector += f'[itemprop="{itemprop}"]'
+    return selector if bare or selector != element.tag else ""
+
+
+def _selector_for(element: Element, scope: Element) -> str:
+    """
+    Shortest descendant selector whose first match inside scope is element.
+    """
+    steps = [_simple_selector(element)]
+    for ancestor in element.ancestors():
+        selector = " ".join(steps)
+        if select(scope, selector)[:1] == [element]:
+            return selector
+        if ancestor is scope or len(steps) >= MAX_SELECTOR_DEPTH:
+            return None
+        step = _simple_selector(ancestor, bare=False)
+        if step:
+            steps.insert(0, step)
+    return None
+
+
+def _same_url(attr_value: str, value: str) -> bool:
+    """
+    Whether an href/src/content attribute is the url the model returned;
+    a relative link matches an absolute url with the same path and query.
+    Bare "/" or "#" links never match anything but themselves.
+    """
+    if attr_value == value:
+        return True
+    link, wanted = urlparse(attr_value.strip()), urlparse(value.strip())
+    path = link.path.rstrip("/")
+    if not path or not wanted.scheme or path != wanted.path.rstrip("/") or link.query != wanted.query:
+        return False
+    return not link.netloc or link.netloc.lower().removeprefix("www.") == wanted.netloc.lower().removeprefix("www.")
+
+
+def _find_value(scope: Element, value):
+    """
+    Locates the smallest element whose text (or url attribute) is the value.
+    Returns (element, attribute) or (None, None).
+    """
+    wanted = _normalize(str(value))
+    if not wanted:
+        return None, None
+    best = None
+    for element in scope.iter():
+        for attr in _URL_ATTRIBUTES:
+            attr_value = element.attrs.get(attr)
+            if attr_value and _same_url(attr_value, str(value)):
+                return element, attr
+        text = _normalize(element.text())
+        if text == wanted or (wanted in text and len(text) <= len(wanted) + 12):
+            # Keep descending to the innermost element with the same text
+            if best is None or best in element.ancestors():
+                best = element
+    return best, None
+
+
+_NUMBER = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+
+
+def _read(element: Element, rule: dict):
+    if element is None:
+        return "n/a"
+    attr = rule.get("attr")
+    value = element.attrs.get(attr, "n/a") if attr else element.text()
+    if rule.get("type") in ("number", "integer"):
+        match = _NUMBER.search(value)
+        if not match:
+            return "n/a"
+        number = float(match.group(0).replace(",", ""))
+        return int(number) if rule["type"] == "integer" else number
+    return value
+
+
+def _common_ancestor(elements: list) -> Element:
+    paths = [[e] + list(e.ancestors()) for e in elements]
+    common = set(paths[0]).intersection(*paths[1:]) if len(paths) > 1 else set(paths[0][1:])
+    return next(node for node in paths[0] if node in common)
+
+
+class ExtractionRecipe:
+    """
+    Selectors learned for one (domain, schema) pair. Scalar fields map to a
+    document-level selector; list fields map to a record container selector
+    plus field selectors relative to each container. Fields the model
+    reported missing on the learning page are optional: they have no
+    selector and always read as missing.
+    """
+
+    def __init__(self, fields: dict, fill_ratio: float):
+        self.fields = fields
+        self.fill_ratio = fill_ratio
+
+    def to_dict(self) -> dict:
+        return {"fields": self.fields, "fill_ratio": self.fill_ratio}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ExtractionRecipe":
+        return cls(data["fields"], data["fill_ratio"])
+
+    def apply(self, root: Element) -> dict:
+        return self._apply_fields(self.fields, root)
+
+    def _apply_fields(self, fields: dict, scope: Element) -> dict:
+        result = {}
+        for name, rule in fields.items():
+            if rule.get("optional"):
+                result[name] = [] if rule.get("list") else "n/a"
+            elif "container" in rule:
+                result[name] = [self._apply_fields(rule["fields"], container)
+                                for container in select(scope, rule["container"])]
+            elif "fields" in rule:
+                result[name] = self._apply_fields(rule["fields"], scope)
+            else:
+                matches = select(scope, rule["selector"])
+                result[name] = _read(matches[0] if matches else None, rule)
+        return result
+
+
+def _fill_ratio(data) -> float:
+    leaves = []
+
+    def walk(value):
+        if isinstance(value, dict):
+            for child in value.values():
+                walk(child)
+        elif isinstance(value, list):
+            for child in value:
+                walk(child)
+        else:
+            leaves.append(value not in MISSING_VALUES)
+
+    walk(data)
+    return sum(leaves) / len(leaves) if leaves else 0.0
+
+
+class _Learner:
+    def learn(self, schema: SchemaField, data: dict, scope: Element) -> dict:
+        fields = {}
+        for field in schema.children:
+            value = data.get(field.name) if isinstance(data, dict) else None
+            if field.is_list:
+                rule = self._learn_list(field, value, scope)
+            elif field.children:
+                nested = self.learn(field, value or {}, scope)
+                rule = {"fields": nested} if nested is not None else None
+            else:
+                rule = self._learn_leaf(field, value, scope)
+            if rule is None:
+                return None
+            fields[field.name] = rule
+        return fields
+
+    def _learn_leaf(self, field: SchemaField, value, scope: Element) -> dict:
+        if value in MISSING_VALUES:
+            # Nothing to anchor on; the other fields are still learned
+            return {"optional": True, "type": field.type}
+        if isinstance(value, (dict, list)):
+            return None
+        element, attr = _find_value(scope, value)
+        if element is None:
+            return None
+        selector = _selector_for(element, scope)
+        if selector is None:
+            return None
+        return {"selector": selector, "attr": attr, "type": field.type}
+
+    def _record_container(self, field: SchemaField, record: dict, scope: Element) -> Element:
+        located = []
+        for child in field.children:
+            value = record.get(child.name) if isinstance(record, dict) else None
+            if child.children or child.is_list or value in MISSING_VALUES:
+                continue
+            element, _ = _find_value(scope, value)
+            if element is not None:
+                located.append(element)
+        if not located:
+            return None
+        return _common_ancestor(located)
+
+    def _learn_list(self, field: SchemaField, records, scope: Element) -> dict:
+        if records in MISSING_VALUES or records == []:
+            return {"optional": True, "list": True}
+        if not field.children:
+            # Lists of scalars are not learnable without a record structure
+            return None
+        container = self._record_container(field, records[0], scope)
+        if container is None or container is scope:
+            return None
+        container_selector = _simple_selector(container)
+        containers = select(scope, container_selector)
+        if len(containers) < len(records) or containers[0] is not container:
+            return None
+        if container_selector == container.tag and len(containers) != len(records):
+            # A bare tag like "div" would also match unrelated blocks
+            return None
+        fields = self.learn(field, records[0], container)
+        if fields is None:
+            return None
+        rule = {"container": container_selector, "fields": fields}
+        # The rule must also reproduce the second record, if there is one
+        if len(records) > 1:
+            replayed = ExtractionRecipe({field.name: rule}, 1.0).apply(scope)[field.name]
+            if len(replayed) < 2 or _fill_ratio(replayed[1]) < _fill_ratio(records[1]):
+                return None
+        return rule
+
+
+def _complete(fields: dict) -> bool:
+    # Recipes saved by older versions may have fields without a selector
+    for rule in fields.values():
+        if "fields" in rule:
+            if not _complete(rule["fields"]):
+                return False
+        elif not rule.get("selector") and not rule.get("optional"):
+            return False
+    return True
+
+
+def _learned(fields: dict) -> bool:
+    return any(_learned(rule["fields"]) if "fields" in rule else bool(rule.get("selector"))
+               for rule in fields.values())
+
+
+class RecipeStore:
+    """
+    Learned extraction recipes per (domain, schema), persisted as JSON.
+    After a successful LLM extraction, learn() derives selectors from the
+    raw HTML; apply() then extracts later pages from the same domain locally
+    and returns None whenever the local result fails validation, so the
+    caller falls back to the LLM and re-learns. Fields missing from the
+    learning page stay missing in local results until such a re-learn.
+    """
+
+    def __init__(self, path: str = None, min_fill_ratio: float = 0.8):
+        self.path = path
+        self.min_fill_ratio = min_fill_ratio
+        self.hits = 0
+        self.misses = 0
+        self._recipes = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._recipes = {key: ExtractionRecipe.from_dict(value) for key, value in json.load(f).items()
+                                 if _complete(value["fields"])}
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv("EXTRACTION_RECIPES", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(os.getenv("EXTRACTION_RECIPES_PATH") or ".cache/recipes.json")
+
+    @staticmethod
+    def _key(url: str, compiled: CompiledSchema) -> str:
+        domain = (urlparse(url).hostname or "").lower()
+        schema_digest = hashlib.sha256(compiled.render_prompt().encode("utf-8")).hexdigest()[:16]
+        return f"{domain}|{schema_digest}"
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({key: recipe.to_dict() for key, recipe in self._recipes.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def apply(self, url: str, schema: str, html: str):
+        compiled = try_compile_schema(schema)
+        if not compiled:
+            return None
+        key = self._key(url, compiled)
+        recipe = self._recipes.get(key)
+        if recipe is None:
+            return None
+        result = recipe.apply(parse_dom(html))
+        if compiled.validate(result) or _fill_ratio(result) < recipe.fill_ratio * self.min_fill_ratio:
+            # Layout changed; drop the recipe so the next LLM result re-learns it
+            self.misses += 1
+            with self._lock:
+                self._recipes.pop(key, None)
+                self._save()
+            return None
+        self.hits += 1
+        return json.dumps(result, indent=2, ensure_ascii=False)
+
+    def learn(self, url: str, schema: str, html: str, llm_result) -> bool:
+        compiled = try_compile_schema(schema)
+        data = parse_json_result(llm_result)
+        if not compiled or not isinstance(data, dict) or compiled.validate(data):
+            return False
+        root = parse_dom(html)
+        fields = _Learner().learn(compiled.root, data, root)
+        if fields is None or not _learned(fields):
+            return False
+        recipe = ExtractionRecipe(fields, _fill_ratio(data))
+        with self._lock:
+            self._recipes[self._key(url, compiled)] = recipe
+            self._save()
+        return True
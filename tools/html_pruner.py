@@ -0,0 +1,173 @@
+import os
+import re
+import threading
+from dataclasses import dataclass
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+_whitespace = re.compile(r"\s+")
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly 4 characters per token for Gemini/GPT style tokenizers
+    return (len(text) + 3) // 4
+
+
+@dataclass(frozen=True)
+class PruneConfig:
+    drop_tags: frozenset = frozenset({
+        "script", "style", "noscript", "svg", "iframe", "template", "canvas",
+        "link", "meta", "nav", "footer", "button",
+    })
+    keep_attributes: frozenset = frozenset({
+        "href", "src", "alt", "title", "datetime", "aria-label", "itemprop", "property", "content", "value",
+    })
+    keep_json_ld: bool = True
+    collapse_whitespace: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PruneConfig":
+        config = cls()
+        drop_tags = os.getenv("HTML_PRUNE_DROP_TAGS", "")
+        keep_attributes = os.getenv("HTML_PRUNE_KEEP_ATTRIBUTES", "")
+        keep_json_ld = os.getenv("HTML_PRUNE_KEEP_JSON_LD", "")
+        return cls(
+            drop_tags=frozenset(t.strip().lower() for t in drop_tags.split(",") if t.strip()) or config.drop_tags,
+            keep_attributes=frozenset(a.strip().lower() for a in keep_attributes.split(",") if a.strip())
+            or config.keep_attributes,
+            keep_json_ld=keep_json_ld.lower() not in ("0", "false", "no") if keep_json_ld else config.keep_json_ld,
+        )
+
+
+@dataclass
+class PruneStats:
+    bytes_before: int = 0
+    bytes_after: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    pages: int = 0
+
+    @property
+    def reduction(self) -> float:
+        return 1 - self.bytes_after / self.bytes_before if self.bytes_before else 0.0
+
+    def add(self, other: "PruneStats"):
+        self.bytes_before += other.bytes_before
+        self.bytes_after += other.bytes_after
+        self.tokens_before += other.tokens_before
+        self.tokens_after += other.tokens_after
+        self.pages += other.pages
+
+
+class _PruningParser(HTMLParser):
+    def __init__(self, config: PruneConfig):
+        super().__init__(convert_charrefs=True)
+        self.config = config
+        self.out = []
+        # Open elements; a dropped one is skipped up to its own end tag or,
+        # when it is never closed, its parent's
+        self._open = []
+        self._skip_at = None
+        self._in_json_ld = False
+
+    def _attrs(self, attrs) -> str:
+        kept = [
+            f' {name}="{escape(value or "", quote=True)}"'
+            for name, value in attrs
+            if name in self.config.keep_attributes
+        ]
+        return "".join(kept)
+
+    def _dropped(self, tag, attrs) -> bool:
+        if tag == "meta":
+            # Microdata and Open Graph values (price, rating, ...) are data
+            names = {name for name, _ in attrs}
+            if "itemprop" in names or "property" in names:
+                return False
+        return tag in self.config.drop_tags
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_at is not None:
+            if tag not in VOID_TAGS:
+                self._open.append(tag)
+            return
+        if tag == "script" and self.config.keep_json_ld and dict(attrs).get("type") == "application/ld+json":
+            self._in_json_ld = True
+            self._open.append(tag)
+            self.out.append('<script type="application/ld+json">')
+            return
+        if self._dropped(tag, attrs):
+            if tag not in VOID_TAGS:
+                self._skip_at = len(self._open)
+                self._open.append(tag)
+            return
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+        self.out.append(f"<{tag}{self._attrs(attrs)}>")
+
+    def handle_startendtag(self, tag, attrs):
+        if self._skip_at is not None or self._dropped(tag, attrs):
+            return
+        self.out.append(f"<{tag}{self._attrs(attrs)}>")
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or tag not in self._open:
+            return
+        depth = len(self._open) - 1 - self._open[::-1].index(tag)
+        del self._open[depth:]
+        if self._skip_at is not None:
+            if depth > self._skip_at:
+                return
+            skipped, self._skip_at = self._skip_at, None
+            if depth == skipped:
+                return
+        if self._in_json_ld and tag == "script":
+            self._in_json_ld = False
+            self.out.append("</script>")
+            return
+        self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self._skip_at is not None:
+            return
+        if self.config.collapse_whitespace:
+            data = _whitespace.sub(" ", data)
+            if data == " " and (not self.out or self.out[-1].endswith(" ")):
+                return
+        self.out.append(data if self._in_json_ld else escape(data, quote=False))
+
+
+class HTMLPruner:
+    """
+    Strips scripts, styles, inline SVG, navigation boilerplate and
+    extraction-irrelevant attributes from unlocker HTML before it is put in
+    the extraction prompt. Byte and estimated token counts are accumulated
+    per domain so the reduction can be measured.
+    """
+
+    def __init__(self, config: PruneConfig = None):
+        self.config = config or PruneConfig.from_env()
+        self.domain_stats = {}
+        self._lock = threading.Lock()
+
+    def prune(self, html: str, url: str = None):
+        parser = _PruningParser(self.config)
+        parser.feed(html)
+        parser.close()
+        pruned = "".join(parser.out).strip()
+
+        stats = PruneStats(
+            bytes_before=len(html.encode("utf-8")),
+            bytes_after=len(pruned.encode("utf-8")),
+            tokens_before=estimate_tokens(html),
+            tokens_after=estimate_tokens(pruned),
+            pages=1,
+        )
+        domain = (urlparse(url).hostname or "") if url else ""
+        with self._lock:
+            self.domain_stats.setdefault(domain, PruneStats()).add(stats)
+        return pruned, stats
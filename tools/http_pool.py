@@ -0,0 +1,123 @@
+import os
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "")
+    return int(value) if value.strip() else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name, "")
+    return float(value) if value.strip() else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name, "")
+    if not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    # Number of distinct hosts kept in the pool and connections kept per host
+    pool_connections: int = 4
+    pool_maxsize: int = 32
+    keep_alive: bool = True
+    connect_timeout: float = 10.0
+    read_timeout: float = 120.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            pool_connections=_env_int("BRIGHT_DATA_POOL_CONNECTIONS", cls.pool_connections),
+            pool_maxsize=_env_int("BRIGHT_DATA_POOL_MAXSIZE", cls.pool_maxsize),
+            keep_alive=_env_bool("BRIGHT_DATA_KEEP_ALIVE", cls.keep_alive),
+            connect_timeout=_env_float("BRIGHT_DATA_CONNECT_TIMEOUT", cls.connect_timeout),
+            read_timeout=_env_float("BRIGHT_DATA_READ_TIMEOUT", cls.read_timeout),
+        )
+
+    @property
+    def timeout(self) -> tuple:
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def httpx_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    @property
+    def httpx_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.pool_maxsize,
+            max_keepalive_connections=self.pool_maxsize if self.keep_alive else 0,
+        )
+
+
+_sessions: dict = {}
+_sessions_lock = threading.Lock()
+# httpx.AsyncClient is bound to the loop it was first used on, so async
+# clients are kept per running event loop.
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_session(config: PoolConfig) -> requests.Session:
+    """
+    Returns the process-wide requests.Session for the given pool config.
+    Every unlocker created with an equal config shares the same connection
+    pool, so TCP+TLS connections to api.brightdata.com are reused across
+    BrightQLAgentScraperTool instances.
+    """
+    with _sessions_lock:
+        session = _sessions.get(config)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=config.pool_connections,
+                pool_maxsize=config.pool_maxsize,
+                pool_block=False,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            if not config.keep_alive:
+                session.headers["Connection"] = "close"
+            _sessions[config] = session
+        return session
+
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_async_client(config: PoolConfig) -> httpx.AsyncClient:
+    """
+    Async counterpart of get_session, shared by every unlocker running on
+    the current event loop.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(config)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=config.httpx_limits,
+            timeout=config.httpx_timeout,
+            headers=None if config.keep_alive else {"Connection": "close"},
+        )
+        clients[config] = client
+    return client
+
+
+async def aclose_async_clients():
+    loop = asyncio.get_running_loop()
+    for client in _async_clients.pop(loop, {}).values():
+        await client.aclose()
@@ -0,0 +1,171 @@
+import json
+
+_OPENERS = {"{": "}", "[": "]"}
+
+
+def _path(stack: list) -> str:
+    return ".".join(entry[1] for entry in stack if entry[0] == "{" and entry[1])
+
+
+def records_from_document(document, path: str = ""):
+    """
+    Yields (path, record) pairs for an already parsed document, with the same
+    rules as JSONRecordStream: objects inside the outermost arrays are records,
+    followed by the top-level members holding none, and a document without
+    any records is yielded whole.
+    """
+    found = False
+    for record_path, record in _records(document, path):
+        found = True
+        yield record_path, record
+    if not found:
+        if document is not None:
+            yield path, document
+    elif isinstance(document, dict):
+        members = [(key, child) for key, child in document.items() if next(_records(child, key), None) is None]
+        yield from _member_records(members)
+
+
+def _records(value, path: str):
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                yield path, item
+            else:
+                yield from _records(item, path)
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            yield from _records(child, f"{path}.{key}" if path else key)
+
+
+def _member_records(members: list) -> list:
+    """
+    Object members as (key, object) records, and the remaining scalar and
+    list members together as one ("", {key: value, ...}) record.
+    """
+    records = [(key, value) for key, value in members if isinstance(value, dict)]
+    rest = {key: value for key, value in members if not isinstance(value, dict)}
+    if rest:
+        records.append(("", rest))
+    return records
+
+
+class JSONRecordStream:
+    """
+    Incremental parser for a JSON document arriving in pieces, e.g. an LLM
+    token stream. feed() returns each object in an outermost array (such as
+    every listings[] entry) as soon as its closing brace arrives, paired with
+    the dotted path of the array ("listings", "" for a top-level array).
+    Text before the first { or [ (like a ```json fence) is ignored.
+
+    Top-level members holding no records (company, stock_quote, ... next to
+    recent_earnings[]) are kept as they close and returned by finish().
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.emitted = 0
+        self._pos = 0
+        self._started = False
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._record_start = None
+        self._record_depth = None
+        self._members = []
+        self._member_start = None
+        self._member_emitted = 0
+
+    def _end_member(self, text: str, end: int, emitted: int):
+        if self._member_start is None:
+            return
+        start, self._member_start = self._member_start, None
+        if emitted != self._member_emitted:
+            return
+        try:
+            self._members.append((self._stack[0][1], json.loads(text[start:end])))
+        except ValueError:
+            pass
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        records = []
+        text = self.text
+        while self._pos < len(text):
+            i = self._pos
+            char = text[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = (self._string_start, i + 1)
+                continue
+
+            if not self._started:
+                if char in _OPENERS:
+                    self._started = True
+                else:
+                    continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":" and self._stack and self._stack[-1][0] == "{" and self._last_string:
+                start, end = self._last_string
+                self._stack[-1][1] = json.loads(text[start:end])
+                if len(self._stack) == 1:
+                    self._member_start = i + 1
+                    self._member_emitted = self.emitted + len(records)
+            elif char == "," and len(self._stack) == 1 and self._stack[0][0] == "{":
+                self._end_member(text, i, self.emitted + len(records))
+            elif char in _OPENERS:
+                if char == "{" and self._record_start is None and self._stack and self._stack[-1][0] == "[":
+                    self._record_start = i
+                    self._record_depth = len(self._stack)
+                self._stack.append([char, None])
+            elif char in ("}", "]"):
+                if not self._stack:
+                    continue
+                if len(self._stack) == 1 and self._stack[0][0] == "{":
+                    self._end_member(text, i, self.emitted + len(records))
+                self._stack.pop()
+                if char == "}" and self._record_start is not None and len(self._stack) == self._record_depth:
+                    try:
+                        records.append((_path(self._stack), json.loads(text[self._record_start:i + 1])))
+                    except ValueError:
+                        pass
+                    self._record_start = None
+                    self._record_depth = None
+        self.emitted += len(records)
+        return records
+
+    def document(self):
+        """
+        The complete document parsed from everything fed so far, or None.
+        """
+        if not self._started:
+            return None
+        start = min(index for index in (self.text.find("{"), self.text.find("[")) if index >= 0)
+        end = max(self.text.rfind("}"), self.text.rfind("]"))
+        try:
+            return json.loads(self.text[start:end + 1])
+        except ValueError:
+            return None
+
+    def finish(self) -> list:
+        """
+        Called once the stream ends: when no record was emitted the whole
+        document is returned as a single record, so single-object schemas
+        still produce output; otherwise the top-level members holding no
+        records are.
+        """
+        if self.emitted:
+            return _member_records(self._members)
+        return list(records_from_document(self.document()))
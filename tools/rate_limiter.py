@@ -0,0 +1,292 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from tools.deadline import DeadlineExceeded
+
+_OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+# A 429/503 leading the message ("429 Resource has been exhausted") or after
+# a status label, never any number in the text (a price, a product id)
+_OVERLOAD_CODE = re.compile(r"(?:^|\b(?:HTTP|status|status code|code|error)[\s:='\"]*)(?:429|503)\b", re.IGNORECASE)
+_OVERLOAD_NAMES = re.compile(r"\b(?:RESOURCE_EXHAUSTED|UNAVAILABLE|Too Many Requests|Service Unavailable)\b")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name, "")
+    return float(value) if value.strip() else default
+
+
+def status_of(error) -> int:
+    for candidate in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code", "status"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def is_overload(error) -> bool:
+    """
+    True for errors meaning "slow down": HTTP 429/5xx from requests/httpx or
+    quota errors from the Gemini client, which only carry the code in text.
+    """
+    status = status_of(error)
+    if status is not None:
+        return status in _OVERLOAD_STATUSES
+    text = str(error).strip()
+    return bool(_OVERLOAD_CODE.search(text) or _OVERLOAD_NAMES.search(text))
+
+
+class TokenBucket:
+    """
+    Allows rate requests per second on average with bursts of up to burst.
+    A rate of 0 disables the bucket.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Takes a token, returning how long the caller must wait for it.
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit: grows by about one slot per limit's worth of
+    successful calls and is cut by backoff_ratio on an overload error or a
+    latency spike (a call slower than latency_factor times the smoothed
+    latency). Cuts happen at most once per smoothed latency so one burst of
+    failures doesn't collapse the limit.
+    """
+
+    def __init__(self, initial: float, min_limit: float = 1, max_limit: float = 64,
+                 backoff_ratio: float = 0.5, latency_factor: float = 3.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.latency = None
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._async_waiters = deque()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= max(int(self.limit), 1):
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.in_flight < max(int(self.limit), 1):
+                    self.in_flight += 1
+                    return
+                # Slots are shared with threads and other loops, so async
+                # waiters are woken through their own loop
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._condition:
+                    try:
+                        self._async_waiters.remove((loop, waiter))
+                    except ValueError:
+                        # Already woken for a free slot: pass it on
+                        self._wake_async_waiters()
+                raise
+
+    def _wake_async_waiters(self):
+        free = max(int(self.limit), 1) - self.in_flight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not waiter.done():
+                loop.call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+                free -= 1
+
+    def abandon(self):
+        """
+        Frees the slot of a call cut short by its caller (cancelled, or
+        stopped by the deadline) without adjusting the limit.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+            self._wake_async_waiters()
+
+    def release(self, latency: float, overloaded: bool):
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            spike = (not overloaded and self.latency is not None
+                     and latency > self.latency * self.latency_factor)
+            if overloaded or spike:
+                if now - self._last_decrease >= (self.latency or 0.0):
+                    self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                    self.decreases += 1
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.increases += 1
+            if not overloaded:
+                self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+            self._condition.notify_all()
+            self._wake_async_waiters()
+
+
+class _Call:
+    def __init__(self):
+        self.status = None
+
+
+class RateLimiter:
+    """
+    Token bucket plus adaptive concurrency for one upstream (a Bright Data
+    zone or a Gemini model). Calls go through limit()/alimit(); set
+    call.status to the HTTP status when the upstream returns one instead of
+    raising.
+    """
+
+    def __init__(self, name: str, rate: float = 0, burst: float = None, initial_concurrency: float = 8,
+                 max_concurrency: float = 64):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AIMDLimiter(initial_concurrency, max_limit=max_concurrency)
+        self.calls = 0
+        self.overloads = 0
+        self.wait_time = 0.0
+        # Limiters are shared by threads (chunked extraction workers)
+        self._lock = threading.Lock()
+
+    def _started(self, waited: float) -> float:
+        started = time.monotonic()
+        with self._lock:
+            self.wait_time += started - waited
+        return started
+
+    def _finish(self, started: float, call: _Call, error):
+        overloaded = (error is not None and is_overload(error)) or (call.status in _OVERLOAD_STATUSES)
+        with self._lock:
+            self.calls += 1
+            self.overloads += overloaded
+        self.concurrency.release(time.monotonic() - started, overloaded)
+
+    @contextmanager
+    def limit(self):
+        waited = time.monotonic()
+        self.bucket.acquire()
+        self.concurrency.acquire()
+        started = self._started(waited)
+        call = _Call()
+        try:
+            yield call
+        except DeadlineExceeded:
+            self.concurrency.abandon()
+            raise
+        except Exception as e:
+            self._finish(started, call, e)
+            raise
+        except BaseException:
+            # Cancelled or closed: its latency says nothing about the upstream
+            self.concurrency.abandon()
+            raise
+        self._finish(started, call, None)
+
+    @asynccontextmanager
+    async def alimit(self):
+        waited = time.monotonic()
+        await self.bucket.aacquire()
+        await self.concurrency.aacquire()
+        started = self._started(waited)
+        call = _Call()
+        try:
+            yield call
+        except DeadlineExceeded:
+            self.concurrency.abandon()
+            raise
+        except Exception as e:
+            self._finish(started, call, e)
+            raise
+        except BaseException:
+            self.concurrency.abandon()
+            raise
+        self._finish(started, call, None)
+
+    def metrics(self) -> dict:
+        return {
+            "rate": self.bucket.rate,
+            "burst": self.bucket.burst,
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "latency_ewma": self.concurrency.latency,
+            "calls": self.calls,
+            "overloads": self.overloads,
+            "decreases": self.concurrency.decreases,
+            "wait_time": round(self.wait_time, 3),
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(kind: str, name: str) -> RateLimiter:
+    """
+    Returns the process-wide limiter for a Bright Data zone (kind="zone") or
+    a Gemini model (kind="model"), configured from RATE_LIMIT_<KIND>_* env
+    vars, e.g. RATE_LIMIT_MODEL_RPS=0.25 for 15 requests per minute.
+    """
+    key = (kind, name)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            prefix = f"RATE_LIMIT_{kind.upper()}_"
+            defaults = {"zone": (16, 64), "model": (4, 32)}.get(kind, (8, 64))
+            limiter = RateLimiter(
+                f"{kind}:{name}",
+                rate=_env_float(prefix + "RPS", 0),
+                burst=_env_float(prefix + "BURST", 0) or None,
+                initial_concurrency=_env_float(prefix + "CONCURRENCY", defaults[0]),
+                max_concurrency=_env_float(prefix + "MAX_CONCURRENCY", defaults[1]),
+            )
+            _limiters[key] = limiter
+        return limiter
+
+
+def limiter_metrics() -> dict:
+    with _limiters_lock:
+        return {limiter.name: limiter.metrics() for limiter in _limiters.values()}
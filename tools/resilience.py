@@ -0,0 +1,303 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from dataclasses import dataclass
+
+import httpx
+import requests
+
+from tools.deadline import DeadlineExceeded, allows as deadline_allows
+from tools.rate_limiter import is_overload, status_of
+
+_RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+_LLM_RETRYABLE_MARKERS = ("DEADLINE_EXCEEDED", "INTERNAL", "timed out", "Timeout")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name, "")
+    return float(value) if value.strip() else default
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_retryable_unlocker_error(error) -> bool:
+    """
+    Connection failures, timeouts and 408/425/429/5xx responses from the
+    Web Unlocker API; other 4xx responses (bad token, unknown zone) are final.
+    """
+    status = status_of(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUSES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout,
+                              httpx.TransportError, httpx.TimeoutException, TimeoutError))
+
+
+def is_retryable_llm_error(error) -> bool:
+    """
+    Gemini quota, overload and deadline errors. The Gemini client wraps most
+    of them, so the message is checked as well as the status.
+    """
+    if isinstance(error, (TimeoutError, httpx.TransportError)):
+        return True
+    status = status_of(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUSES
+    return is_overload(error) or any(marker in str(error) for marker in _LLM_RETRYABLE_MARKERS)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    retryable: object = is_retryable_unlocker_error
+
+    @classmethod
+    def from_env(cls, prefix: str, retryable, **defaults) -> "RetryPolicy":
+        policy = cls(retryable=retryable, **defaults)
+        return cls(
+            max_attempts=int(_env_float(f"RETRY_{prefix}_ATTEMPTS", policy.max_attempts)),
+            base_delay=_env_float(f"RETRY_{prefix}_BASE_DELAY", policy.base_delay),
+            max_delay=_env_float(f"RETRY_{prefix}_MAX_DELAY", policy.max_delay),
+            retryable=retryable,
+        )
+
+    def delay(self, attempt: int, error=None) -> float:
+        """
+        Full-jitter exponential backoff for the given retry (1-based), never
+        shorter than a Retry-After header sent with the error.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        retry_after = headers.get("Retry-After")
+        if retry_after and str(retry_after).isdigit():
+            delay = max(delay, min(float(retry_after), self.max_delay))
+        return delay
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic: every first attempt
+    deposits ratio tokens and every retry spends one, so during an outage
+    retries add at most ratio extra load instead of multiplying it.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max(min_tokens, 1.0)
+        self.tokens = self.max_tokens
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                self.exhausted += 1
+                return False
+            self.tokens -= 1
+            self.retries += 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive retryable failures and fails
+    fast with CircuitOpenError for reset_timeout seconds; then lets one probe
+    call through and closes again if it succeeds.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.short_circuited = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self._probing:
+                self._probing = True
+                return
+            self.short_circuited += 1
+            raise CircuitOpenError(f"Circuit for {self.name} is open after {self.failures} failures")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def abandon(self):
+        """
+        For a call cut short by its caller: neither outcome is recorded,
+        and the next call may probe instead.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+_breakers = {}
+_budgets = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Process-wide breaker per target host (or model), so every caller fails
+    fast while that target is down.
+    """
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(_env_float("CIRCUIT_FAILURE_THRESHOLD", 5)),
+                reset_timeout=_env_float("CIRCUIT_RESET_TIMEOUT", 30.0),
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_retry_budget(name: str) -> RetryBudget:
+    with _registry_lock:
+        budget = _budgets.get(name)
+        if budget is None:
+            budget = RetryBudget(ratio=_env_float("RETRY_BUDGET_RATIO", 0.2))
+            _budgets[name] = budget
+        return budget
+
+
+def _should_retry(error, attempt: int, policy: RetryPolicy, budget: RetryBudget, delay: float) -> bool:
+    if attempt >= policy.max_attempts or not policy.retryable(error):
+        return False
+    # A retry that can't finish before the request's deadline only adds load
+    if not deadline_allows(delay):
+        return False
+    return budget is None or budget.withdraw()
+
+
+def call_with_retry(fn, policy: RetryPolicy, breaker: CircuitBreaker = None, budget: RetryBudget = None,
+                    on_retry=None):
+    if budget:
+        budget.deposit()
+    attempt = 1
+    while True:
+        if breaker:
+            breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if isinstance(e, DeadlineExceeded) or not deadline_allows(0):
+                # Cut short by the caller's deadline (e.g. a read timeout
+                # capped at it), which says nothing about the target
+                if breaker:
+                    breaker.abandon()
+                if isinstance(e, DeadlineExceeded):
+                    raise
+                raise DeadlineExceeded(f"Deadline exceeded during the call: {e}") from e
+            if breaker and policy.retryable(e):
+                breaker.record_failure()
+            elif breaker:
+                # Non-retryable errors (e.g. a 404) still mean the target is up
+                breaker.record_success()
+            delay = policy.delay(attempt, e)
+            if not _should_retry(e, attempt, policy, budget, delay):
+                raise
+            if on_retry:
+                on_retry(attempt, e)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled or interrupted: a half-open probe must not stay taken
+            if breaker:
+                breaker.abandon()
+            raise
+        if breaker:
+            breaker.record_success()
+        return result
+
+
+async def acall_with_retry(fn, policy: RetryPolicy, breaker: CircuitBreaker = None, budget: RetryBudget = None,
+                           on_retry=None):
+    """
+    Async counterpart of call_with_retry; fn returns a new awaitable per attempt.
+    on_retry(attempt, error) is called before each retry's backoff.
+    """
+    if budget:
+        budget.deposit()
+    attempt = 1
+    while True:
+        if breaker:
+            breaker.before_call()
+        try:
+            result = await fn()
+        except Exception as e:
+            if isinstance(e, DeadlineExceeded) or not deadline_allows(0):
+                # Cut short by the caller's deadline (e.g. a read timeout
+                # capped at it), which says nothing about the target
+                if breaker:
+                    breaker.abandon()
+                if isinstance(e, DeadlineExceeded):
+                    raise
+                raise DeadlineExceeded(f"Deadline exceeded during the call: {e}") from e
+            if breaker and policy.retryable(e):
+                breaker.record_failure()
+            elif breaker:
+                # Non-retryable errors (e.g. a 404) still mean the target is up
+                breaker.record_success()
+            delay = policy.delay(attempt, e)
+            if not _should_retry(e, attempt, policy, budget, delay):
+                raise
+            if on_retry:
+                on_retry(attempt, e)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled or interrupted: a half-open probe must not stay taken
+            if breaker:
+                breaker.abandon()
+            raise
+        if breaker:
+            breaker.record_success()
+        return result
+
+
+def resilience_metrics() -> dict:
+    with _registry_lock:
+        return {
+            "breakers": {name: {"state": breaker.state, "failures": breaker.failures,
+                                "short_circuited": breaker.short_circuited}
+                         for name, breaker in _breakers.items()},
+            "retry_budgets": {name: {"tokens": round(budget.tokens, 2), "retries": budget.retries,
+                                     "exhausted": budget.exhausted}
+                              for name, budget in _budgets.items()},
+        }
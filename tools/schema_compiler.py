@@ -0,0 +1,253 @@
+import re
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+
+_NAME = re.compile(r"[A-Za-z0-9_$@][^\s{}()\[\],:]*")
+_TYPE_WORDS = {
+    "string": "string", "str": "string", "text": "string",
+    "float": "number", "number": "number", "double": "number", "decimal": "number",
+    "int": "integer", "integer": "integer",
+    "bool": "boolean", "boolean": "boolean",
+}
+MISSING_VALUES = (None, "n/a", "N/A")
+
+
+class SchemaSyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SchemaField:
+    name: str
+    type: str = "string"
+    is_list: bool = False
+    hint: str = None
+    children: tuple = ()
+
+
+class _AgentQLParser:
+    """
+    Parses AgentQL-style schemas such as
+
+        { listings[] { name rating(in stars) listing_agent { name, phone } } }
+
+    Commas between fields are optional and hints may contain nested parentheses.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def _skip(self):
+        while self.pos < len(self.text) and (self.text[self.pos].isspace() or self.text[self.pos] == ","):
+            self.pos += 1
+
+    def _peek(self) -> str:
+        self._skip()
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def _error(self, message: str):
+        raise SchemaSyntaxError(f"{message} at position {self.pos}")
+
+    def parse(self) -> tuple:
+        if self._peek() == "{":
+            self.pos += 1
+            fields = self._fields(closing="}")
+        else:
+            fields = self._fields(closing="")
+        if self._peek():
+            self._error(f"Unexpected {self.text[self.pos]!r}")
+        return fields
+
+    def _fields(self, closing: str) -> tuple:
+        fields = []
+        while True:
+            char = self._peek()
+            if char == closing:
+                if closing:
+                    self.pos += 1
+                return tuple(fields)
+            if not char:
+                self._error(f"Expected {closing!r}")
+            fields.append(self._field())
+
+    def _hint(self) -> str:
+        depth = 0
+        start = self.pos
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            self.pos += 1
+            if depth == 0:
+                return self.text[start + 1:self.pos - 1].strip()
+        self._error("Unterminated '('")
+
+    def _field(self) -> SchemaField:
+        match = _NAME.match(self.text, self.pos)
+        if not match:
+            self._error(f"Expected a field name, got {self.text[self.pos]!r}")
+        name = match.group(0)
+        self.pos = match.end()
+        is_list = self.text.startswith("[]", self.pos)
+        if is_list:
+            self.pos += 2
+        hint = None
+        if self._peek() == "(":
+            hint = self._hint()
+        children = ()
+        if self._peek() == "{":
+            self.pos += 1
+            children = self._fields(closing="}")
+        return SchemaField(
+            name=name,
+            type="object" if children else "string",
+            is_list=is_list,
+            hint=hint,
+            children=children,
+        )
+
+
+def _json_field(name: str, value) -> SchemaField:
+    if isinstance(value, dict):
+        return SchemaField(name=name, type="object",
+                           children=tuple(_json_field(key, child) for key, child in value.items()))
+    if isinstance(value, list):
+        item = _json_field(name, value[0] if value else "string")
+        return SchemaField(name=name, type=item.type, is_list=True, hint=item.hint, children=item.children)
+    description = str(value).strip()
+    word = re.match(r"[A-Za-z]+", description)
+    field_type = _TYPE_WORDS.get(word.group(0).lower()) if word else None
+    if not field_type:
+        # e.g. "YYYY-MM-DD": the whole description is the hint
+        return SchemaField(name=name, hint=description or None)
+    # e.g. "string (e.g., NASDAQ, NYSE)": type word plus a hint
+    hint = description[word.end():].strip().strip("()").strip()
+    return SchemaField(name=name, type=field_type, hint=hint or None)
+
+
+class CompiledSchema:
+    def __init__(self, source: str, root: SchemaField):
+        self.source = source
+        self.root = root
+        self._prompt = None
+        self._json_schema = None
+
+    def render_prompt(self) -> str:
+        """
+        Compact canonical rendering used in extraction prompts, e.g.
+        listings[] { name rating (in stars) price: number }
+        """
+        if self._prompt is None:
+            self._prompt = "{\n" + "".join(self._render(field, 1) for field in self.root.children) + "}"
+        return self._prompt
+
+    def _render(self, field: SchemaField, depth: int) -> str:
+        indent = "  " * depth
+        line = indent + field.name + ("[]" if field.is_list else "")
+        if field.type not in ("string", "object"):
+            line += f": {field.type}"
+        if field.hint:
+            line += f" ({field.hint})"
+        if not field.children:
+            return line + "\n"
+        return line + " {\n" + "".join(self._render(child, depth + 1) for child in field.children) + indent + "}\n"
+
+    def json_schema(self) -> dict:
+        """
+        JSON Schema (the OpenAPI subset accepted by Gemini's response_schema)
+        describing the expected output. Leaves are nullable because missing
+        values may be reported as null or "n/a"; nullability is spelled as
+        anyOf [type, null], the form langchain-google-genai converts.
+        """
+        if self._json_schema is None:
+            self._json_schema = self._to_json_schema(self.root)
+        return self._json_schema
+
+    def _to_json_schema(self, field: SchemaField) -> dict:
+        if field.children:
+            schema = {
+                "type": "object",
+                "properties": {child.name: self._to_json_schema(child) for child in field.children},
+                "required": [child.name for child in field.children],
+            }
+        else:
+            schema = {"anyOf": [{"type": field.type}, {"type": "null"}]}
+        if field.hint:
+            schema["description"] = field.hint
+        if field.is_list:
+            schema = {"type": "array", "items": schema}
+        return schema
+
+    def validate(self, data) -> list:
+        """
+        Returns a list of "path: problem" strings; empty when data matches.
+        Missing leaves reported as null or "n/a" are accepted.
+        """
+        errors = []
+        self._validate(self.root, data, "$", errors)
+        return errors
+
+    def _validate(self, field: SchemaField, value, path: str, errors: list, in_list: bool = False):
+        if field.is_list and not in_list:
+            if value in MISSING_VALUES:
+                return
+            if not isinstance(value, list):
+                errors.append(f"{path}: expected a list")
+                return
+            for i, item in enumerate(value):
+                self._validate(field, item, f"{path}[{i}]", errors, in_list=True)
+            return
+        if field.children:
+            if not isinstance(value, dict):
+                if value not in MISSING_VALUES:
+                    errors.append(f"{path}: expected an object")
+                return
+            for child in field.children:
+                if child.name not in value:
+                    errors.append(f"{path}.{child.name}: missing")
+                else:
+                    self._validate(child, value[child.name], f"{path}.{child.name}", errors)
+            return
+        if value in MISSING_VALUES:
+            return
+        if field.type == "number" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            errors.append(f"{path}: expected a number")
+        elif field.type == "integer" and (isinstance(value, bool) or not isinstance(value, int)):
+            errors.append(f"{path}: expected an integer")
+        elif field.type == "boolean" and not isinstance(value, bool):
+            errors.append(f"{path}: expected a boolean")
+        elif field.type == "string" and isinstance(value, (dict, list)):
+            errors.append(f"{path}: expected a scalar")
+
+
+@lru_cache(maxsize=256)
+def compile_schema(source: str) -> CompiledSchema:
+    """
+    Compiles an AgentQL-style schema or a JSON schema sketch such as
+    {"stock_quote": {"price": "float"}} into a cached CompiledSchema.
+    Raises SchemaSyntaxError when the text is neither; prose ("the product
+    name and price") is not a schema, so only text starting with "{" is
+    compiled.
+    """
+    text = source.strip()
+    if not text.startswith("{"):
+        raise SchemaSyntaxError("Schema must start with '{'")
+    try:
+        document = json.loads(text)
+    except ValueError:
+        document = None
+    if isinstance(document, dict):
+        root = _json_field("", document)
+    else:
+        root = SchemaField(name="", type="object", children=_AgentQLParser(text).parse())
+    if not root.children:
+        raise SchemaSyntaxError("Schema has no fields")
+    return CompiledSchema(source, root)
+
+
+def try_compile_schema(source: str):
+    try:
+        return compile_schema(source)
+    except SchemaSyntaxError:
+        return None
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+
+from tools.deadline import DeadlineExceeded, allows as deadline_allows, bounded, timeout as deadline_timeout
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller does the
+    work and every caller that arrives while it is in flight gets the same
+    result (or exception) instead of starting its own upstream request.
+    Nothing is cached once the call completes.
+
+    The call runs under the first caller's deadline. A caller that is still
+    waiting when that deadline cuts the call short runs it again if it has
+    time left, and stops waiting once its own deadline passes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._tasks = {}
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None:
+                    self.shared += 1
+                    leader = False
+                else:
+                    call = self._calls[key] = _Call()
+                    leader = True
+            if leader:
+                break
+            if not call.done.wait(deadline_timeout(what="the shared call")):
+                raise DeadlineExceeded("Deadline exceeded waiting for the shared call")
+            if call.error is None:
+                return call.result
+            if not self._retry(call.error):
+                raise call.error
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, fn):
+        """
+        Async counterpart of do; fn returns an awaitable. The work runs in its
+        own task, so cancelling the caller that started it doesn't cancel it
+        for the others; it is cancelled once every caller waiting on it has
+        gone.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            self.calls += 1
+        while True:
+            with self._lock:
+                task = self._tasks.get(task_key)
+                if task is not None and not task.done():
+                    self.shared += 1
+                    leader = False
+                else:
+                    task = self._tasks[task_key] = loop.create_task(fn())
+                    task.add_done_callback(lambda done: self._forget(task_key, done))
+                    leader = True
+                self._waiters[task] = self._waiters.get(task, 0) + 1
+            try:
+                if leader:
+                    return await asyncio.shield(task)
+                return await bounded(asyncio.shield(task), "the shared call")
+            except DeadlineExceeded as e:
+                if not task.done() or not self._retry(e):
+                    raise
+            finally:
+                self._leave(task_key, task)
+
+    @staticmethod
+    def _retry(error) -> bool:
+        # Whether a follower runs the call itself after the leader's
+        # deadline cut it short
+        return isinstance(error, DeadlineExceeded) and deadline_allows(0)
+
+    def _leave(self, task_key, task):
+        with self._lock:
+            self._waiters[task] -= 1
+            if self._waiters[task]:
+                return
+            del self._waiters[task]
+        if not task.done():
+            task.cancel()
+            self._forget(task_key, task)
+
+    def _forget(self, task_key, task):
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared}